@@ -8,6 +8,7 @@ load_dotenv(ROOT / ".env")  # root .env: only CLIENT_NAME (and optionally ENV)
 
 from sources.manager import SourceManager
 from entities.loader import load_entities
+from entities.spec import parse_entity_spec, referenced_tables
 
 _mgr: SourceManager | None = None
 _entities: dict | None = None
@@ -36,11 +37,26 @@ def get_manager() -> SourceManager:
         if not isinstance(sources, dict) or not isinstance(routing, dict):
             raise RuntimeError(f"clients/{_client_name()}/env.py must define SOURCES and ROUTING dicts")
 
+        if any(s.get("reflect") == "targeted" for s in sources.values()):
+            # targeted reflection: only the tables the entities (and their custom queries) use;
+            # custom query modules must be imported before this runs
+            specs = {n: parse_entity_spec(n, c) for n, c in get_entities().items()}
+            sources = {
+                name: dict(s, reflect_tables=sorted(referenced_tables(specs, name)))
+                if s.get("reflect") == "targeted" and "reflect_tables" not in s else s
+                for name, s in sources.items()
+            }
+
         cfg = {
             "client_name": _client_name(),
             "env": getattr(mod, "ENV", os.getenv("ENV", "dev")),
             "routing": routing,
             "sources": sources,
+            "outbox": getattr(mod, "OUTBOX", {}),  # optional: {"table": "studio_outbox"}
+            "health": getattr(mod, "HEALTH", {}),  # optional: {"ttl_s", "interval_s", "timeout_s"}
+            "init_timeout_s": getattr(mod, "INIT_TIMEOUT_S", 30),
+            "metrics": getattr(mod, "METRICS", {}),  # optional: {"enabled": true, "buckets": [...]}
+            "slow_queries": getattr(mod, "SLOW_QUERIES", {}),  # optional, see engine/slow_queries.py
         }
 
         _mgr = SourceManager.from_dict(cfg)
@@ -48,6 +64,12 @@ def get_manager() -> SourceManager:
     return _mgr
 
 
+def configure(manager: SourceManager, entities: dict) -> None:
+    # in-process harnesses (bench/) run the app against their own sources/entities
+    global _mgr, _entities
+    _mgr, _entities = manager, entities
+
+
 def get_entities() -> dict:
     global _entities
     if _entities is None:
@@ -1,74 +1,423 @@
 from __future__ import annotations
-from fastapi import FastAPI, HTTPException, Query
-from typing import Any, Dict, Optional
+import inspect
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager
+from http.cookies import SimpleCookie
+from fastapi import Body, FastAPI, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import cookie_parser
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 from app.config import get_manager, get_entities
+from sources.routing import READ_SESSION, ReadRouter
 from entities.spec import parse_entity_spec
 from sources.crud.sql_row import SqlRowCrud
+from sources.crud.sql_row_async import AsyncSqlRowCrud
+from sources.crud.sql_filters import SEP, split_key
+from sources.crud.document import DocumentCrud
 
 # load custom queries
 import sources.queries.sample_po_with_totals  # noqa: F401
 
-# load sinks (register)
-import sinks.es_index  # noqa: F401
-import sinks.s3_put_json  # noqa: F401
-import sinks.bq_append  # noqa: F401
-import sinks.cache_set  # noqa: F401
-
 from engine.post_write import PostWritePipeline
+from engine.query_planner import compile_entity_plans
+from engine.outbox import Outbox, DEFAULT_TABLE
+from engine.export import EXPORT_FORMATS, encode_batches, aencode_batches
+from engine.metrics import METRICS, CURRENT_ENTITY
+from engine.slow_queries import SlowQueryLog
+from engine.responses import FastJSONResponse
+from engine.columnar import ARROW_MEDIA_TYPE, COLUMNS_MEDIA_TYPE, arrow_available, encode_arrow, encode_columns, negotiate
+
+log = logging.getLogger(__name__)
 
-app = FastAPI(title="Low-code Backend V1")
+BULK_MAX_ITEMS = 10000
+
+_runtime: Optional[Tuple[Union[SqlRowCrud, AsyncSqlRowCrud], PostWritePipeline]] = None
+_runtime_lock = threading.Lock()
+_slow_queries: Optional[SlowQueryLog] = None
 
 def build_sql_crud_and_pipeline():
-    mgr = get_manager()
-    entities_cfg = get_entities()
+    # built once: specs parsed, plans compiled and sinks cached for the process lifetime
+    global _runtime, _slow_queries
+    if _runtime is not None:
+        return _runtime
+
+    with _runtime_lock:
+        if _runtime is None:
+            mgr = get_manager()
+            entities_cfg = get_entities()
+
+            METRICS.configure(mgr.config.get("metrics"))
+            with METRICS.stage("spec_build"):
+                specs = {name: parse_entity_spec(name, cfg) for name, cfg in entities_cfg.items()}
+
+            db_source = mgr.get_source(mgr.config["routing"]["active_source"])
+            meta = db_source.meta
+
+            with METRICS.stage("plan_compile"):
+                plans = compile_entity_plans(specs, meta)
+
+            if METRICS.enabled:
+                for name, src in mgr.sources.items():
+                    METRICS.instrument_engine(name, getattr(src, "engine", None))
+                    METRICS.instrument_engine(name, getattr(src, "async_engine", None))
+                METRICS.add_collector(METRICS.pool_collector(lambda: mgr.sources))
+
+            # SLOW_QUERIES: ring buffer of slow statements + sampled EXPLAIN (GET /debug/slow-queries)
+            _slow_queries = SlowQueryLog.from_config(mgr.config.get("slow_queries"))
+            if _slow_queries is not None:
+                for name, src in mgr.sources.items():
+                    _slow_queries.attach(name, getattr(src, "engine", None))
+                    _slow_queries.attach(name, getattr(src, "async_engine", None), explain_engine=getattr(src, "engine", None))
+                mgr.add_close_hook(_slow_queries.stop)
+
+            outbox = None
+            if any(s.post_write_mode == "outbox" for s in specs.values()):
+                outbox = Outbox(mgr.config.get("outbox", {}).get("table", DEFAULT_TABLE))
+                outbox.create_table(db_source.engine)
+
+            # read-through cache for read.cache entities (routing.cache_source)
+            cache_source = mgr.cache()
+            cache = cache_source.client if cache_source is not None else None
+
+            # routing.read_replicas: reads go to replicas, writes stay on the active source
+            read_router = ReadRouter.from_manager(mgr)
+
+            # read.search_mode "es": q goes to the entity's search source (default routing.search_source)
+            default_search = mgr.config["routing"].get("search_source")
+            search_names = {s.search_source or default_search for s in specs.values() if s.search_mode == "es"}
+            search_clients = {n: DocumentCrud(mgr.get_source(n).client) for n in search_names if n}
+            crud_kwargs = dict(
+                meta=meta, entity_specs=specs, plans=plans, outbox=outbox, cache=cache, read_router=read_router,
+                search_clients=search_clients, default_search_source=default_search,
+            )
+
+            # async mode when the active source built an AsyncEngine ("async": true)
+            if getattr(db_source, "async_engine", None) is not None:
+                sql = AsyncSqlRowCrud(engine=db_source.async_engine, **crud_kwargs)
+            else:
+                sql = SqlRowCrud(engine=db_source.engine, **crud_kwargs)
+            listeners = [sql.invalidate_counts]
+            if cache is not None:
+                # this process sees its own writes at once; cache_set sinks cover other processes
+                listeners.append(cache.invalidate)
+            pipeline = PostWritePipeline(
+                manager=mgr,
+                entity_specs=entities_cfg,  # NOTE: raw cfg for post_write
+                listeners=listeners,
+            )
+            _runtime = (sql, pipeline)
+    return _runtime
 
-    specs = {name: parse_entity_spec(name, cfg) for name, cfg in entities_cfg.items()}
+async def get_runtime():
+    if _runtime is not None:
+        return _runtime
+    # first build connects sources + reflects: keep it off the event loop
+    return await run_in_threadpool(build_sql_crud_and_pipeline)
 
-    db_source = mgr.get_source(mgr.config["routing"]["active_source"])
-    engine = db_source.engine
-    meta = db_source.meta
+async def call_crud(fn, *args, **kwargs):
+    # AsyncSqlRowCrud ops are awaited directly; the sync backend runs on the threadpool
+    if inspect.iscoroutinefunction(fn):
+        return await fn(*args, **kwargs)
+    return await run_in_threadpool(fn, *args, **kwargs)
 
-    sql = SqlRowCrud(engine=engine, meta=meta, entity_specs=specs)
-    pipeline = PostWritePipeline(manager=mgr, entity_specs=entities_cfg)  # NOTE: raw cfg for post_write
-    return sql, pipeline
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # compile plans at startup; a failure here is retried lazily on the first request
+    try:
+        await get_runtime()
+    except Exception as e:
+        log.warning("startup plan compilation failed: %s", e)
+    yield
+    if _runtime is not None:
+        # runs the pipeline's close hook (flushes buffered sinks) before closing sources
+        await _runtime[1].manager.aclose()
+
+# dict-returning handlers still go through jsonable_encoder, then this encoder; the
+# read paths return FastJSONResponse themselves and skip the encoder walk
+app = FastAPI(title="Low-code Backend V1", lifespan=lifespan, default_response_class=FastJSONResponse)
+
+# read-your-writes: the client echoes back the deadline it got after its last write
+# (cookie, or the header for non-browser clients); until then its reads use the primary
+RYW_COOKIE = "studio_read_primary_until"
+RYW_HEADER = "x-read-primary-until"
+
+class RequestContext:
+    """
+    Pure ASGI middleware (no BaseHTTPMiddleware task/stream wrapping on every request):
+    labels the request's stages and slow queries with its /api/{entity}, opens the
+    read-your-writes session, and times the request when metrics are on.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        parts = scope["path"].split("/", 3)
+        entity_token = CURRENT_ENTITY.set(parts[2] if len(parts) > 2 and parts[1] == "api" else "")
+        headers = Headers(scope=scope)
+        raw = headers.get(RYW_HEADER) or cookie_parser(headers.get("cookie", "")).get(RYW_COOKIE) or 0
+        try:
+            primary_until = float(raw)
+        except ValueError:
+            primary_until = 0.0
+        # mutable: writes in threadpool/greenlet contexts update the same dict
+        session = {"primary_until": primary_until, "wrote": False}
+        session_token = READ_SESSION.set(session)
+        t0 = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if session["wrote"]:
+                    _set_primary_until(MutableHeaders(scope=message), session["primary_until"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            READ_SESSION.reset(session_token)
+            if METRICS.enabled:
+                route = scope.get("route")
+                METRICS.observe(
+                    "studio_request_seconds", time.perf_counter() - t0,
+                    method=scope["method"], route=getattr(route, "path", "unmatched"), status=str(status),
+                )
+            CURRENT_ENTITY.reset(entity_token)
+
+def _set_primary_until(headers: MutableHeaders, until: float) -> None:
+    cookie: SimpleCookie = SimpleCookie()
+    cookie[RYW_COOKIE] = f"{until:.3f}"
+    cookie[RYW_COOKIE].update({"max-age": max(1, int(until - time.time()) + 1), "path": "/", "httponly": True, "samesite": "lax"})
+    headers[RYW_HEADER] = f"{until:.3f}"
+    headers.append("set-cookie", cookie.output(header="").strip())
+
+app.add_middleware(RequestContext)
+
+@app.get("/metrics")
+async def metrics():
+    # Prometheus text exposition (METRICS = {"enabled": true} in the client env)
+    await get_runtime()
+    if not METRICS.enabled:
+        raise HTTPException(status_code=404, detail="metrics disabled")
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/debug/slow-queries")
+async def debug_slow_queries(
+    limit: int = Query(20, ge=1, le=500),
+    order: str = Query("total", pattern="^(total|max|count|mean)$"),
+    recent: int = Query(0, ge=0, le=500),
+):
+    # worst statements (grouped by SQL text) with their sampled plans
+    await get_runtime()
+    if _slow_queries is None:
+        raise HTTPException(status_code=404, detail="slow query log disabled")
+    out: Dict[str, Any] = {
+        "threshold_ms": _slow_queries.threshold_s * 1000,
+        "worst": _slow_queries.worst(limit=limit, order=order),
+    }
+    if recent:
+        out["recent"] = _slow_queries.recent(recent)
+    return out
 
 @app.get("/health/sources")
-def health_sources():
-    return get_manager().health()
+async def health_sources():
+    mgr = await run_in_threadpool(get_manager)
+    return await mgr.ahealth()
+
+@app.get("/health/routing")
+async def health_routing():
+    sql, _ = await get_runtime()
+    if sql.read_router is None:
+        return {"read_replicas": []}
+    return sql.read_router.status()
+
+@app.get("/health/plugins")
+async def health_plugins():
+    mgr = await run_in_threadpool(get_manager)
+    return mgr.plugin_report()
+
+@app.get("/health/cache")
+async def health_cache():
+    # hit/miss/eviction counters of the read-through cache
+    mgr = await run_in_threadpool(get_manager)
+    cache_source = mgr.cache()
+    if cache_source is None:
+        raise HTTPException(status_code=404, detail="No cache_source configured")
+    return cache_source.client.stats()
+
+LIST_PARAMS = {"page", "size", "q", "cursor", "total", "format", "fields"}
+
+def _query_filters(request: Request, reserved: set) -> Optional[Dict[str, Any]]:
+    # every other query param is a filter; a repeated field=v means field__in (any of
+    # them), any other repeated filter is ambiguous and rejected
+    grouped: Dict[str, List[str]] = {}
+    for k, v in request.query_params.multi_items():
+        if k not in reserved:
+            grouped.setdefault(k, []).append(v)
+    filters: Dict[str, Any] = {}
+    for k, values in grouped.items():
+        if len(values) == 1:
+            filters[k] = values[0]
+            continue
+        field, op = split_key(k)
+        in_key = f"{field}{SEP}in"
+        if op != "eq" or in_key in grouped:
+            raise ValueError(f"Repeated filter parameter: {k}")
+        filters[in_key] = values
+    return filters or None
+
+def _split_fields(fields: Optional[str]) -> Optional[List[str]]:
+    if fields is None:
+        return None
+    return [f.strip() for f in fields.split(",") if f.strip()]
 
 @app.get("/api/{entity}")
-def list_entity(
+async def list_entity(
+    request: Request,
     entity: str,
     page: int = Query(1, ge=1),
     size: int = Query(25, ge=1, le=500),
-    q: Optional[str] = None
+    q: Optional[str] = None,
+    cursor: Optional[str] = None,  # keyset mode: pass "" for the first page, then next_cursor
+    total: Optional[str] = Query(None, pattern="^(exact|estimated|cached|none)$"),
+    format: Optional[str] = Query(None, pattern="^(rows|columns|arrow)$"),  # or Accept: application/vnd.apache.arrow.stream
+    fields: Optional[str] = None,  # comma-separated read fields; unread joins are skipped
+):
+    # any other query param is a filter: field=v, field__in=a,b, field__gte=v, field__prefix=v,
+    # field__isnull=true (sources/crud/sql_filters.py); unknown fields are a 400
+    try:
+        filters = _query_filters(request, LIST_PARAMS)
+        sql, _ = await get_runtime()
+        fmt = negotiate(format, request.headers.get("accept"))
+        if fmt == "rows":
+            out = await call_crud(sql.list, entity, page=page, size=size, q=q, filters=filters, cursor=cursor, total=total, fields=_split_fields(fields))
+            return FastJSONResponse(out)
+        # columnar: rows stay cursor tuples, encoded column-wise without row dicts
+        out = await call_crud(sql.list, entity, page=page, size=size, q=q, filters=filters, cursor=cursor, total=total, columnar=True, fields=_split_fields(fields))
+        meta = {k: v for k, v in out.items() if k not in ("items", "columns")}
+        if fmt == "columns":
+            return Response(encode_columns(out["columns"], out["items"], meta), media_type=COLUMNS_MEDIA_TYPE)
+        core = sql.core if isinstance(sql, AsyncSqlRowCrud) else sql
+        column_types = core.column_types(entity, q=q, filters=filters, fields=_split_fields(fields))
+        body = encode_arrow(out["columns"], out["items"], column_types, meta)
+        return Response(body, media_type=ARROW_MEDIA_TYPE)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# ---- bulk (declared before the /{id_value} routes so "bulk" is not taken as an id) ----
+# One transaction per request; items that fail are reported per index and the rest
+# commit. Sinks get the successful rows as one batch.
+
+def _bulk_out(res: Dict[str, Any], warnings: List[Dict[str, Any]]) -> Dict[str, Any]:
+    out = {"ok": res["failed"] == 0, **res}
+    if warnings:
+        out["warnings"] = warnings
+    return out
+
+def _check_bulk_size(items: List[Any]) -> None:
+    if len(items) > BULK_MAX_ITEMS:
+        raise ValueError(f"Too many items: {len(items)} > {BULK_MAX_ITEMS}")
+
+@app.post("/api/{entity}/bulk")
+async def bulk_create_entity(entity: str, items: List[Dict[str, Any]] = Body(...)):
+    try:
+        _check_bulk_size(items)
+        sql, pipeline = await get_runtime()
+        res = await call_crud(sql.bulk_create, entity, items)
+        rows = [r["row"] for r in res["items"] if r["ok"]]
+        warnings = await pipeline.arun_bulk(entity, "create", rows=rows)
+        return _bulk_out(res, warnings)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.put("/api/{entity}/bulk")
+async def bulk_update_entity(entity: str, items: List[Dict[str, Any]] = Body(...)):
+    # each item: {<pk>: ..., <field>: ...}
+    try:
+        _check_bulk_size(items)
+        sql, pipeline = await get_runtime()
+        res = await call_crud(sql.bulk_update, entity, items)
+        rows = [r["row"] for r in res["items"] if r["ok"]]
+        warnings = await pipeline.arun_bulk(entity, "update", rows=rows)
+        return _bulk_out(res, warnings)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.delete("/api/{entity}/bulk")
+async def bulk_delete_entity(entity: str, ids: List[Any] = Body(...)):
+    try:
+        _check_bulk_size(ids)
+        sql, pipeline = await get_runtime()
+        res = await call_crud(sql.bulk_delete, entity, ids)
+        deleted = [r["id"] for r in res["items"] if r["ok"]]
+        warnings = await pipeline.arun_bulk(entity, "delete", ids=deleted)
+        return _bulk_out(res, warnings)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+EXPORT_PARAMS = {"format", "q", "batch_size", "fields"}
+
+@app.get("/api/{entity}/export")
+async def export_entity(
+    request: Request,
+    entity: str,
+    format: str = Query("ndjson", pattern="^(ndjson|csv|columns|arrow)$"),
+    q: Optional[str] = None,
+    batch_size: int = Query(2000, ge=100, le=50000),
+    fields: Optional[str] = None,
 ):
+    # any other query param is a filter, as for list
     try:
-        sql, _ = build_sql_crud_and_pipeline()
-        return sql.list(entity, page=page, size=size, q=q, filters=None)
+        filters = _query_filters(request, EXPORT_PARAMS)
+        sql, _ = await get_runtime()
+        media_type, ext = EXPORT_FORMATS[format]
+        if format == "arrow" and not arrow_available():
+            raise RuntimeError("format=arrow requires the 'pyarrow' package")
+        # build the statement up front so bad input is a 400, not a broken stream
+        core = sql.core if isinstance(sql, AsyncSqlRowCrud) else sql
+        column_types = core.column_types(entity, q=q, filters=filters, fields=_split_fields(fields))
+        batches = sql.export(entity, q=q, filters=filters, batch_size=batch_size, fields=_split_fields(fields))
+        if isinstance(sql, AsyncSqlRowCrud):
+            body = aencode_batches(format, batches, column_types)
+        else:
+            body = encode_batches(format, batches, column_types)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    # sync generators are iterated on the threadpool by StreamingResponse
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{entity}.{ext}"'},
+    )
 
 @app.get("/api/{entity}/{id_value}")
-def get_one(entity: str, id_value: str):
+async def get_one(entity: str, id_value: str):
     try:
-        sql, _ = build_sql_crud_and_pipeline()
-        row = sql.get_one(entity, id_value)
+        sql, _ = await get_runtime()
+        row = await call_crud(sql.get_one, entity, id_value)
         if not row:
             raise HTTPException(status_code=404, detail="Not found")
-        return row
+        return FastJSONResponse(row)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @app.post("/api/{entity}")
-def create_entity(entity: str, payload: Dict[str, Any]):
+async def create_entity(entity: str, payload: Dict[str, Any]):
     try:
-        sql, pipeline = build_sql_crud_and_pipeline()
-        row = sql.create(entity, payload)  # DB commit happens inside begin()
-        warnings = pipeline.run(entity, "create", row=row)
+        sql, pipeline = await get_runtime()
+        row = await call_crud(sql.create, entity, payload)  # DB commit happens inside begin()
+        warnings = await pipeline.arun(entity, "create", row=row)
         out = {"row": row, "ok": True}
         if warnings:
             out["warnings"] = warnings
@@ -77,11 +426,11 @@ def create_entity(entity: str, payload: Dict[str, Any]):
         raise HTTPException(status_code=400, detail=str(e))
 
 @app.put("/api/{entity}/{id_value}")
-def update_entity(entity: str, id_value: str, payload: Dict[str, Any]):
+async def update_entity(entity: str, id_value: str, payload: Dict[str, Any]):
     try:
-        sql, pipeline = build_sql_crud_and_pipeline()
-        row = sql.update(entity, id_value, payload)
-        warnings = pipeline.run(entity, "update", row=row)
+        sql, pipeline = await get_runtime()
+        row = await call_crud(sql.update, entity, id_value, payload)
+        warnings = await pipeline.arun(entity, "update", row=row)
         out = {"row": row, "ok": True}
         if warnings:
             out["warnings"] = warnings
@@ -90,11 +439,11 @@ def update_entity(entity: str, id_value: str, payload: Dict[str, Any]):
         raise HTTPException(status_code=400, detail=str(e))
 
 @app.delete("/api/{entity}/{id_value}")
-def delete_entity(entity: str, id_value: str):
+async def delete_entity(entity: str, id_value: str):
     try:
-        sql, pipeline = build_sql_crud_and_pipeline()
-        res = sql.delete(entity, id_value)
-        warnings = pipeline.run(entity, "delete", id_value=id_value)
+        sql, pipeline = await get_runtime()
+        res = await call_crud(sql.delete, entity, id_value)
+        warnings = await pipeline.arun(entity, "delete", id_value=id_value)
         out = {"ok": True, "result": res}
         if warnings:
             out["warnings"] = warnings
@@ -0,0 +1,71 @@
+from __future__ import annotations
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Diff two bench/run.py result files.
+#
+# usage: python -m bench.compare base.json new.json [--metric p95] [--fail-above 10]
+#
+# --fail-above N exits 1 when any scenario's latency metric regressed by more than N%.
+
+def _pct(old: Optional[float], new: Optional[float]) -> Optional[float]:
+    if old in (None, 0) or new is None:
+        return None
+    return (new - old) / old * 100
+
+
+def compare(base: Dict[str, Any], new: Dict[str, Any], metric: str = "p95") -> List[Dict[str, Any]]:
+    rows = []
+    for name in sorted(set(base["scenarios"]) | set(new["scenarios"])):
+        b = base["scenarios"].get(name)
+        n = new["scenarios"].get(name)
+        if b is None or n is None:
+            rows.append({"scenario": name, "missing": "base" if b is None else "new"})
+            continue
+        rows.append({
+            "scenario": name,
+            "rps": (b["throughput_rps"], n["throughput_rps"], _pct(b["throughput_rps"], n["throughput_rps"])),
+            metric: (b["latency_ms"][metric], n["latency_ms"][metric], _pct(b["latency_ms"][metric], n["latency_ms"][metric])),
+            "alloc_peak_kib": (b["alloc_peak_kib"]["p50"], n["alloc_peak_kib"]["p50"], _pct(b["alloc_peak_kib"]["p50"], n["alloc_peak_kib"]["p50"])),
+        })
+    return rows
+
+
+def _fmt(cell) -> str:
+    old, new, pct = cell
+    d = f"{pct:+.1f}%" if pct is not None else "n/a"
+    return f"{old} -> {new} ({d})"
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--metric", default="p95", choices=["p50", "p95", "p99", "mean", "max"])
+    parser.add_argument("--fail-above", type=float, default=None, help="max allowed latency regression (%%)")
+    args = parser.parse_args(argv)
+
+    base = json.loads(Path(args.base).read_text())
+    new = json.loads(Path(args.new).read_text())
+    print(f"base {base['meta'].get('git_rev')} ({base['meta']['timestamp']})  vs  new {new['meta'].get('git_rev')} ({new['meta']['timestamp']})")
+
+    regressions = []
+    for row in compare(base, new, args.metric):
+        if "missing" in row:
+            print(f"{row['scenario']:<16} missing in {row['missing']}")
+            continue
+        print(f"{row['scenario']:<16} rps {_fmt(row['rps']):<34} {args.metric} ms {_fmt(row[args.metric]):<34} alloc KiB {_fmt(row['alloc_peak_kib'])}")
+        pct = row[args.metric][2]
+        if args.fail_above is not None and pct is not None and pct > args.fail_above:
+            regressions.append(row["scenario"])
+
+    if regressions:
+        print(f"latency regression above {args.fail_above}%: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
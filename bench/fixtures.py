@@ -0,0 +1,88 @@
+from __future__ import annotations
+import random
+from decimal import Decimal
+from typing import Any, Dict, List
+from sqlalchemy import Column, ForeignKey, Integer, MetaData, Numeric, String, Table, insert
+
+# Deterministic purchase_orders / purchase_order_items / vendors data at a given scale,
+# for the bench harness (sqlite file or a throwaway postgres database).
+
+STATUSES = ("draft", "open", "approved", "closed")
+
+
+def bench_metadata() -> MetaData:
+    meta = MetaData()
+    Table(
+        "vendors", meta,
+        Column("id", Integer, primary_key=True),
+        Column("name", String(200), nullable=False),
+    )
+    Table(
+        "purchase_orders", meta,
+        Column("id", Integer, primary_key=True),
+        Column("po_number", String(50), nullable=False, unique=True),
+        Column("vendor_id", Integer, ForeignKey("vendors.id"), index=True),
+        Column("status", String(20), nullable=False),
+        Column("total_amount", Numeric(12, 2)),
+    )
+    Table(
+        "purchase_order_items", meta,
+        Column("id", Integer, primary_key=True),
+        Column("purchase_order_id", Integer, ForeignKey("purchase_orders.id"), index=True),
+        Column("qty", Integer, nullable=False),
+        Column("price", Numeric(12, 2), nullable=False),
+    )
+    return meta
+
+
+def seed(engine, *, orders: int = 10000, vendors: int = 200, items_per_order: int = 3, seed: int = 42, chunk: int = 5000) -> Dict[str, int]:
+    """
+    Drops and recreates the three tables, then inserts orders/vendors/items.
+    items_per_order is the mean; each order gets 0..2*mean items.
+    """
+    rng = random.Random(seed)
+    meta = bench_metadata()
+    meta.drop_all(engine)
+    meta.create_all(engine)
+    t = meta.tables
+
+    def flush(conn, table, rows: List[Dict[str, Any]]) -> None:
+        if rows:
+            conn.execute(insert(table), rows)
+            rows.clear()
+
+    n_items = 0
+    with engine.begin() as conn:
+        conn.execute(insert(t["vendors"]), [{"id": i, "name": f"Vendor {i:05d} {rng.choice(['Supply', 'Parts', 'Goods', 'Logistics'])}"} for i in range(1, vendors + 1)])
+
+        po_rows: List[Dict[str, Any]] = []
+        item_rows: List[Dict[str, Any]] = []
+        for i in range(1, orders + 1):
+            po_rows.append({
+                "id": i,
+                "po_number": f"PO-{i:08d}",
+                "vendor_id": rng.randint(1, vendors),
+                "status": rng.choice(STATUSES),
+                "total_amount": Decimal(rng.randint(100, 10_000_000)) / 100,
+            })
+            for _ in range(rng.randint(0, 2 * items_per_order)):
+                n_items += 1
+                item_rows.append({
+                    "id": n_items,
+                    "purchase_order_id": i,
+                    "qty": rng.randint(1, 50),
+                    "price": Decimal(rng.randint(100, 100_000)) / 100,
+                })
+            if len(po_rows) >= chunk:
+                flush(conn, t["purchase_orders"], po_rows)
+            if len(item_rows) >= chunk:
+                # items reference orders: flush pending orders first
+                flush(conn, t["purchase_orders"], po_rows)
+                flush(conn, t["purchase_order_items"], item_rows)
+        flush(conn, t["purchase_orders"], po_rows)
+        flush(conn, t["purchase_order_items"], item_rows)
+
+        if engine.dialect.name == "postgresql":
+            conn.exec_driver_sql("analyze vendors, purchase_orders, purchase_order_items")
+
+    return {"vendors": vendors, "purchase_orders": orders, "purchase_order_items": n_items}
@@ -0,0 +1,338 @@
+from __future__ import annotations
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+import sqlalchemy
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+
+from bench.fixtures import seed
+from entities.loader import load_entities
+
+log = logging.getLogger("bench")
+
+# End-to-end API benchmark: app.main:app in-process (ASGI transport, no sockets) against
+# a seeded local database.
+#
+# usage: python -m bench.run [--db sqlite:///bench.db | postgresql+psycopg://u:p@host/db]
+#                            [--orders 10000] [--requests 300] [--concurrency 1] [--out results.json]
+#
+# Per scenario: throughput, p50/p95/p99/mean latency (ms), then a smaller sequential
+# pass under tracemalloc for per-request allocation (peak and retained KiB).
+# Results are JSON; bench/compare.py diffs two runs.
+
+Request = Tuple[str, str, Optional[Any]]   # method, url, json body
+
+
+def percentile(sorted_vals: List[float], p: float) -> Optional[float]:
+    # nearest rank
+    if not sorted_vals:
+        return None
+    k = max(0, min(len(sorted_vals) - 1, int(round(p / 100 * len(sorted_vals) + 0.5)) - 1))
+    return sorted_vals[k]
+
+
+def summarize(values: List[float]) -> Dict[str, Optional[float]]:
+    s = sorted(values)
+    return {
+        "p50": _r(percentile(s, 50)),
+        "p95": _r(percentile(s, 95)),
+        "p99": _r(percentile(s, 99)),
+        "mean": _r(sum(s) / len(s)) if s else None,
+        "max": _r(s[-1]) if s else None,
+    }
+
+
+def _r(v: Optional[float]) -> Optional[float]:
+    return round(v, 3) if v is not None else None
+
+
+def source_cfg(url: str) -> Dict[str, Any]:
+    u = make_url(url)
+    if u.get_backend_name() == "sqlite":
+        return {"kind": "sqlite", "path": u.database or ":memory:", "reflect": True}
+    if u.get_backend_name() == "postgresql":
+        return {
+            "kind": "postgres",
+            "host": u.host or "localhost",
+            "port": u.port or 5432,
+            "database": u.database,
+            "username": u.username or "",
+            "password": u.password or "",
+            "driver": u.get_driver_name() or "psycopg",
+            "reflect": True,
+            "reflect_cache": False,
+            "connect": {"pool_size": 10, "max_overflow": 10},
+        }
+    raise SystemExit(f"unsupported --db: {url} (sqlite or postgresql)")
+
+
+def bench_entities(path: str, keep_sinks: bool, list_strategy: Optional[str] = None) -> Dict[str, Any]:
+    entities = load_entities(path)
+    for cfg in entities.values():
+        cfg.setdefault("storage", {})["source"] = "db_main"
+        if list_strategy:
+            cfg.setdefault("read", {})["list_strategy"] = list_strategy
+        if not keep_sinks:
+            # sinks would measure ES/BQ/S3, not this service
+            cfg.pop("post_write", None)
+        if cfg.get("read", {}).get("search_mode") == "es":
+            cfg["read"]["search_mode"] = "ilike"
+    return entities
+
+
+def git_rev() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+class Scenarios:
+    """
+    Request generators by scenario name; each call returns the next request.
+    Writes share state: update/delete work through the rows create made.
+    """
+    def __init__(self, orders: int, size: int, seed_: int = 7):
+        self.orders = orders
+        self.size = size
+        self.rng = random.Random(seed_)
+        self.created: List[Any] = []
+        self.updated = 0
+        self.deleted = 0
+        self.tag = f"{int(time.time())}"
+        self.n = 0
+        last_page = max(1, orders // size)
+        self.deep_page = max(1, last_page - 1)
+
+    def build(self) -> Dict[str, Callable[[], Request]]:
+        s = self.size
+        return {
+            "list_shallow": lambda: ("GET", f"/api/purchase_order?page=1&size={s}", None),
+            "list_deep": lambda: ("GET", f"/api/purchase_order?page={self.rng.randint(max(1, self.deep_page - 20), self.deep_page)}&size={s}", None),
+            "list_q_shallow": lambda: ("GET", f"/api/purchase_order?page=1&size={s}&q=PO-0000{self.rng.randint(10, 99)}", None),
+            # vendor names: roughly a quarter of the rows match each word
+            "list_q_deep": lambda: ("GET", f"/api/purchase_order?page={self.rng.randint(1, max(1, self.deep_page // 4 - 1))}&size={s}&q=Supply", None),
+            "get_one": lambda: ("GET", f"/api/purchase_order/{self.rng.randint(1, self.orders)}", None),
+            "custom_shallow": lambda: ("GET", f"/api/po_with_totals?page=1&size={s}", None),
+            "custom_deep": lambda: ("GET", f"/api/po_with_totals?page={self.rng.randint(max(1, self.deep_page - 20), self.deep_page)}&size={s}", None),
+            "create": self._create,
+            "update": self._update,
+            "delete": self._delete,
+        }
+
+    def _create(self) -> Request:
+        self.n += 1
+        return ("POST", "/api/purchase_order", {
+            "po_number": f"BENCH-{self.tag}-{self.n}",
+            "vendor_id": self.rng.randint(1, 50),
+            "status": "draft",
+            "total_amount": 10.5,
+        })
+
+    def _update(self) -> Request:
+        id_value = self.created[self.updated % len(self.created)]
+        self.updated += 1
+        return ("PUT", f"/api/purchase_order/{id_value}", {"status": "open"})
+
+    def _delete(self) -> Request:
+        id_value = self.created[self.deleted]
+        self.deleted += 1
+        return ("DELETE", f"/api/purchase_order/{id_value}", None)
+
+
+async def _send(client: httpx.AsyncClient, req: Request) -> httpx.Response:
+    method, url, body = req
+    return await client.request(method, url, json=body)
+
+
+async def run_scenario(client, name: str, gen: Callable[[], Request], state: Scenarios, *, requests: int, warmup: int, concurrency: int, alloc_requests: int) -> Dict[str, Any]:
+    n_errors = 0
+    samples: List[str] = []
+
+    def check(resp: httpx.Response) -> None:
+        nonlocal n_errors
+        if resp.status_code >= 400:
+            n_errors += 1
+            if len(samples) < 5:
+                samples.append(f"{resp.status_code}: {resp.text[:200]}")
+        elif name == "create":
+            state.created.append(resp.json()["row"]["id"])
+
+    for _ in range(warmup):
+        check(await _send(client, gen()))
+
+    latencies: List[float] = []
+    queue = [gen() for _ in range(requests)]
+
+    async def worker() -> None:
+        while queue:
+            req = queue.pop()
+            t0 = time.perf_counter()
+            resp = await _send(client, req)
+            latencies.append((time.perf_counter() - t0) * 1000)
+            check(resp)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    wall = time.perf_counter() - started
+
+    # allocation pass: sequential, traced separately so tracing doesn't skew latency
+    peaks: List[float] = []
+    retained: List[float] = []
+    tracemalloc.start()
+    try:
+        for _ in range(alloc_requests):
+            req = gen()
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            resp = await _send(client, req)
+            current, peak = tracemalloc.get_traced_memory()
+            peaks.append((peak - before) / 1024)
+            retained.append((current - before) / 1024)
+            check(resp)
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": n_errors,
+        "error_samples": samples,
+        "throughput_rps": round(requests / wall, 2) if wall > 0 else None,
+        "latency_ms": summarize(latencies),
+        "alloc_peak_kib": summarize(peaks),
+        "alloc_retained_kib": summarize(retained),
+    }
+
+
+async def run(args) -> Dict[str, Any]:
+    from app import config as app_config
+    from sources.manager import SourceManager
+
+    # seed with a plain engine, then boot the app against the same database
+    seed_engine = create_engine(args.db)
+    try:
+        t0 = time.perf_counter()
+        counts = seed(seed_engine, orders=args.orders, vendors=args.vendors, items_per_order=args.items_per_order)
+        seed_s = time.perf_counter() - t0
+    finally:
+        seed_engine.dispose()
+
+    entities = bench_entities(args.entities, args.keep_sinks, args.list_strategy)
+    mgr = SourceManager.from_dict({
+        "client_name": "bench",
+        "env": "bench",
+        "routing": {"active_source": "db_main"},
+        "sources": {"db_main": source_cfg(args.db)},
+        "health": {"interval_s": 0},
+        "metrics": {"enabled": args.metrics},
+    })
+    mgr.init_all()
+    app_config.configure(mgr, entities)
+
+    from app.main import app
+
+    state = Scenarios(args.orders, args.size)
+    gens = state.build()
+    names = [n for n in gens if not args.only or n in args.only]
+    # writes in dependency order: update/delete consume the rows create made
+    order = [n for n in names if n not in ("create", "update", "delete")] + [n for n in ("create", "update", "delete") if n in names]
+
+    results: Dict[str, Any] = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for name in order:
+                if name in ("update", "delete") and not state.created:
+                    log.warning("skipping %s: no rows created (run create too)", name)
+                    continue
+                requests = args.requests
+                if name == "delete":
+                    # one delete per created row
+                    requests = min(requests, max(0, len(state.created) - args.warmup - args.alloc_requests))
+                results[name] = await run_scenario(
+                    client, name, gens[name], state,
+                    requests=requests, warmup=args.warmup, concurrency=args.concurrency, alloc_requests=args.alloc_requests,
+                )
+                lat = results[name]["latency_ms"]
+                log.info("%-15s %8s rps  p50 %7sms  p95 %7sms  p99 %7sms  errors %s", name, results[name]["throughput_rps"], lat["p50"], lat["p95"], lat["p99"], results[name]["errors"])
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_rev": git_rev(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sqlalchemy": sqlalchemy.__version__,
+            "db": make_url(args.db).get_backend_name(),
+            "scale": counts,
+            "seed_s": round(seed_s, 2),
+            "args": {k: v for k, v in vars(args).items() if k != "db"},
+        },
+        "scenarios": results,
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="End-to-end API benchmark against a seeded local database")
+    parser.add_argument("--db", default=None, help="sqlite:///path or postgresql+psycopg://... (default: temp sqlite file)")
+    parser.add_argument("--entities", default=str(ROOT / "clients" / "syskill" / "entities_config.json"))
+    parser.add_argument("--keep-sinks", action="store_true", help="keep post_write sinks (they must be reachable)")
+    parser.add_argument("--orders", type=int, default=10000)
+    parser.add_argument("--vendors", type=int, default=200)
+    parser.add_argument("--items-per-order", type=int, default=3)
+    parser.add_argument("--size", type=int, default=50, help="page size for list scenarios")
+    parser.add_argument("--requests", type=int, default=300, help="timed requests per scenario")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--alloc-requests", type=int, default=30, help="requests per scenario under tracemalloc")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--list-strategy", choices=["serial", "window", "cte", "concurrent"], help="read.list_strategy for every entity (default: as configured)")
+    parser.add_argument("--metrics", action="store_true", help="enable /metrics instrumentation (measures its overhead)")
+    parser.add_argument("--only", nargs="*", help="scenario names to run")
+    parser.add_argument("--out", help="write JSON results here (default: stdout)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+    # request/plugin logging would dominate the profile
+    logging.getLogger("sources").setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    tmpdir = None
+    if args.db is None:
+        tmpdir = tempfile.TemporaryDirectory(prefix="studio-bench-")
+        args.db = f"sqlite:///{os.path.join(tmpdir.name, 'bench.db')}"
+    try:
+        result = asyncio.run(run(args))
+    finally:
+        if tmpdir is not None:
+            tmpdir.cleanup()
+
+    out = json.dumps(result, indent=2, default=str)
+    if args.out:
+        Path(args.out).write_text(out + "\n")
+        log.info("wrote %s", args.out)
+    else:
+        print(out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+from __future__ import annotations
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Callable, Dict, List
+from uuid import uuid4
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from bench.run import summarize
+from engine import responses
+
+# Microbenchmark: response encoding of one list page, default FastAPI path
+# (jsonable_encoder + stdlib json) vs FastJSONResponse, and row conversion
+# (RowMapping -> dict vs zip over plain tuples).
+#
+# usage: python -m bench.serialize [--rows 500] [--iterations 200] [--out results.json]
+
+
+def page(rows: int) -> Dict[str, Any]:
+    t0 = datetime(2024, 1, 1, 12, 0, 0)
+    items = [
+        {
+            "id": i,
+            "po_number": f"PO-{i:08d}",
+            "status": "open",
+            "vendor_name": f"Vendor {i % 200:05d} Supply",
+            "total_amount": Decimal(i * 137 % 100000) / 100,
+            "created_at": t0 + timedelta(minutes=i),
+            "external_id": uuid4(),
+        }
+        for i in range(1, rows + 1)
+    ]
+    return {"items": items, "total": rows * 20}
+
+
+def timeit(fn: Callable[[], Any], iterations: int) -> List[float]:
+    for _ in range(min(20, iterations)):
+        fn()
+    out = []
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        fn()
+        out.append((time.perf_counter() - t0) * 1000)
+    return out
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Compare JSON response encoding paths")
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--out")
+    args = parser.parse_args(argv)
+
+    payload = page(args.rows)
+    default_body = JSONResponse(jsonable_encoder(payload)).body
+    fast_body = responses.FastJSONResponse(payload).body
+    if json.loads(default_body) != json.loads(fast_body):
+        raise SystemExit("fast path output differs from the default path")
+
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("create table t (id integer primary key, po_number text, status text, vendor_name text, total_amount numeric)")
+        conn.execute(text("insert into t values (:id, :po_number, :status, :vendor_name, :total_amount)"),
+                     [{k: payload["items"][i][k] for k in ("id", "po_number", "status", "vendor_name")} | {"total_amount": float(payload["items"][i]["total_amount"])} for i in range(args.rows)])
+    with engine.connect() as conn:
+        result = conn.exec_driver_sql("select * from t")
+        keys = tuple(result.keys())
+        rows = result.all()
+
+    cases = {
+        "encode_default": lambda: JSONResponse(jsonable_encoder(payload)).body,
+        "encode_fast": lambda: responses.FastJSONResponse(payload).body,
+        "rows_mapping_dict": lambda: [dict(r._mapping) for r in rows],
+        "rows_zip_dict": lambda: [dict(zip(keys, r)) for r in rows],
+    }
+    results = {name: summarize(timeit(fn, args.iterations)) for name, fn in cases.items()}
+    out = {
+        "meta": {"rows": args.rows, "iterations": args.iterations, "orjson": responses.orjson is not None, "bytes": len(fast_body)},
+        "latency_ms": results,
+        "speedup_p50": {
+            "encode": round(results["encode_default"]["p50"] / results["encode_fast"]["p50"], 2),
+            "rows": round(results["rows_mapping_dict"]["p50"] / results["rows_zip_dict"]["p50"], 2),
+        },
+    }
+    text_out = json.dumps(out, indent=2)
+    if args.out:
+        Path(args.out).write_text(text_out + "\n")
+    print(text_out)
+
+
+if __name__ == "__main__":
+    main()
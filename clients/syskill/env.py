@@ -11,8 +11,19 @@ def env(name: str, default=None, *, required: bool = False):
 ROUTING = {
     "active_source": "db_main",
     "search_source": "search_main",
+    # read replicas (postgres sources with "reflect": False), see sources/routing.py:
+    # "read_replicas": ["db_replica_1"],
+    # "read_policy": "round_robin",  # | "least_connections"
+    # "read_your_writes_s": 5,
+    # "max_replica_lag_s": 10,
 }
 
+# GET /metrics (Prometheus text), see engine/metrics.py
+METRICS = {"enabled": True}
+
+# GET /debug/slow-queries: statements over threshold_ms, sampled EXPLAIN (ANALYZE, BUFFERS)
+SLOW_QUERIES = {"enabled": True, "threshold_ms": 200, "explain_sample": 0.1}
+
 if ENV == "dev":
     # Out-of-the-box local config
     SOURCES = {
@@ -24,7 +35,7 @@ if ENV == "dev":
             "database": "appdb",
             "username": "app",
             "password": "app",
-            "reflect": True,
+            "reflect": "targeted",  # only entity tables; schema cached in .cache/schema/
             "connect": {"pool_pre_ping": True, "pool_size": 10, "max_overflow": 20},
         },
         "search_main": {
@@ -45,7 +56,7 @@ else:
             "database": env("DB_NAME", "appdb"),
             "username_env": "DB_USER",
             "password_env": "DB_PASSWORD",
-            "reflect": True,
+            "reflect": "targeted",  # only entity tables; schema cached in .cache/schema/
             "connect": {"pool_pre_ping": True},
         },
         "search_main": {
@@ -0,0 +1,160 @@
+from __future__ import annotations
+import io
+import json
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import types as sqltypes
+
+from engine.responses import dumps, json_default
+
+# Columnar encodings for list and export, built straight from cursor tuples (no row dicts).
+#
+#   columns: {"columns": [...], "data": {col: [...]}, ...page meta}   (compact JSON)
+#   arrow:   Apache Arrow IPC stream; one record batch per cursor batch/page, page meta
+#            (total, next_cursor, ...) in the schema metadata under b"studio"
+#
+# Clients pick one with ?format=columns|arrow or Accept: application/vnd.apache.arrow.stream
+# (arrow needs the optional pyarrow package).
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+COLUMNS_MEDIA_TYPE = "application/json"
+
+
+def negotiate(format: Optional[str], accept: Optional[str]) -> str:
+    # rows (default) | columns | arrow
+    if format:
+        return format
+    if accept and ARROW_MEDIA_TYPE in accept:
+        return "arrow"
+    return "rows"
+
+
+def transpose(keys: Sequence[str], rows: Sequence[Sequence[Any]]) -> Dict[str, List[Any]]:
+    if not rows:
+        return {k: [] for k in keys}
+    return {k: list(col) for k, col in zip(keys, zip(*rows))}
+
+
+def encode_columns(keys: Sequence[str], rows: Sequence[Sequence[Any]], meta: Optional[Dict[str, Any]] = None) -> bytes:
+    return dumps({"columns": list(keys), "data": transpose(keys, rows), **(meta or {})})
+
+
+# ---- arrow ----
+
+def _pa():
+    try:
+        import pyarrow as pa
+        import pyarrow.ipc  # noqa: F401
+    except ImportError:
+        raise RuntimeError("format=arrow requires the 'pyarrow' package")
+    return pa
+
+
+def arrow_available() -> bool:
+    try:
+        _pa()
+        return True
+    except RuntimeError:
+        return False
+
+
+def arrow_schema(keys: Sequence[str], column_types: Dict[str, Any], meta: Optional[Dict[str, Any]] = None):
+    """
+    Arrow schema from the statement's SQLAlchemy column types, so every batch shares
+    one schema whatever its values (an all-NULL batch can't be inferred).
+    """
+    pa = _pa()
+    fields = [pa.field(k, _arrow_type(pa, column_types.get(k))) for k in keys]
+    metadata = {b"studio": json.dumps(meta, default=json_default).encode("utf-8")} if meta else None
+    return pa.schema(fields, metadata=metadata)
+
+
+def _arrow_type(pa, t):
+    if t is None:
+        return pa.string()
+    if isinstance(t, sqltypes.Boolean):
+        return pa.bool_()
+    if isinstance(t, (sqltypes.SmallInteger, sqltypes.Integer, sqltypes.BigInteger)):
+        return pa.int64()
+    if isinstance(t, sqltypes.Float):
+        return pa.float64()
+    if isinstance(t, sqltypes.Numeric):
+        # declared precision/scale keeps exact decimals; unconstrained NUMERIC -> float64
+        if t.precision and t.precision <= 38 and t.scale is not None:
+            return pa.decimal128(t.precision, t.scale)
+        return pa.float64()
+    if isinstance(t, sqltypes.DateTime):
+        return pa.timestamp("us", tz="UTC" if getattr(t, "timezone", False) else None)
+    if isinstance(t, sqltypes.Date):
+        return pa.date32()
+    if isinstance(t, sqltypes.Time):
+        return pa.time64("us")
+    if isinstance(t, sqltypes.LargeBinary):
+        return pa.binary()
+    return pa.string()
+
+
+def _arrow_values(pa, typ, values: Sequence[Any]) -> List[Any]:
+    # coerce what the driver returns into what pa.array accepts for the schema type
+    if pa.types.is_string(typ):
+        return [v if v is None or isinstance(v, str) else str(json_default(v)) for v in values]
+    if pa.types.is_floating(typ):
+        return [None if v is None else float(v) for v in values]
+    return list(values)
+
+
+def arrow_batch(schema, rows: Sequence[Sequence[Any]]):
+    pa = _pa()
+    cols = list(zip(*rows)) if rows else [() for _ in schema]
+    arrays = [pa.array(_arrow_values(pa, f.type, c), type=f.type) for f, c in zip(schema, cols)]
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class ArrowStreamEncoder:
+    # IPC stream writer that hands back the bytes written so far after each batch
+    def __init__(self, schema):
+        pa = _pa()
+        self._buf = io.BytesIO()
+        self._writer = pa.ipc.new_stream(self._buf, schema)
+        self.schema = schema
+
+    def _take(self) -> bytes:
+        data = self._buf.getvalue()
+        self._buf.seek(0)
+        self._buf.truncate()
+        return data
+
+    def write(self, rows: Sequence[Sequence[Any]]) -> bytes:
+        if rows:
+            self._writer.write_batch(arrow_batch(self.schema, rows))
+        return self._take()
+
+    def close(self) -> bytes:
+        self._writer.close()
+        return self._take()
+
+
+def encode_arrow(keys: Sequence[str], rows: Sequence[Sequence[Any]], column_types: Dict[str, Any], meta: Optional[Dict[str, Any]] = None) -> bytes:
+    enc = ArrowStreamEncoder(arrow_schema(keys, column_types, meta))
+    return enc.write(rows) + enc.close()
+
+
+def arrow_batches(batches: Iterable[Tuple[List[str], List[Any]]], column_types: Dict[str, Any]) -> Iterator[bytes]:
+    # export: one record batch per cursor partition
+    enc = None
+    for keys, rows in batches:
+        if enc is None:
+            enc = ArrowStreamEncoder(arrow_schema(keys, column_types))
+        yield enc.write(rows)
+    if enc is not None:
+        yield enc.close()
+
+
+async def aarrow_batches(batches: AsyncIterator[Tuple[List[str], List[Any]]], column_types: Dict[str, Any]) -> AsyncIterator[bytes]:
+    enc = None
+    async for keys, rows in batches:
+        if enc is None:
+            enc = ArrowStreamEncoder(arrow_schema(keys, column_types))
+        yield enc.write(rows)
+    if enc is not None:
+        yield enc.close()
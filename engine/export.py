@@ -0,0 +1,76 @@
+from __future__ import annotations
+import csv
+import io
+from typing import Any, Dict, Iterable, Optional, Sequence
+
+from engine.columnar import ARROW_MEDIA_TYPE, aarrow_batches, arrow_batches, transpose
+from engine.responses import dumps, json_default
+
+# Row encoders for GET /api/{entity}/export. Each call encodes one partition of rows
+# (a server-side cursor batch) so the response never holds more than one batch.
+
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "columns": ("application/x-ndjson", "ndjson"),   # one {"columns", "data"} line per batch
+    "arrow": (ARROW_MEDIA_TYPE, "arrows"),             # Arrow IPC stream, one record batch per batch
+}
+
+def encode_ndjson(keys: Sequence[str], rows: Iterable[Sequence[Any]]) -> bytes:
+    return b"".join(dumps(dict(zip(keys, row))) + b"\n" for row in rows)
+
+def encode_columns_line(keys: Sequence[str], rows: Sequence[Sequence[Any]]) -> bytes:
+    if not rows:
+        return b""
+    return dumps({"columns": list(keys), "data": transpose(keys, rows)}) + b"\n"
+
+def _csv_value(v: Any) -> Any:
+    if v is None:
+        return ""
+    if isinstance(v, (str, int, float)):
+        return v
+    return json_default(v)
+
+def encode_csv(keys: Sequence[str], rows: Iterable[Sequence[Any]], *, header: bool = False) -> bytes:
+    buf = io.StringIO()
+    w = csv.writer(buf, lineterminator="\n")
+    if header:
+        w.writerow(keys)
+    for row in rows:
+        w.writerow([_csv_value(v) for v in row])
+    return buf.getvalue().encode("utf-8")
+
+def _encode(fmt: str, keys: Sequence[str], rows: Sequence[Sequence[Any]], first: bool) -> bytes:
+    if fmt == "csv":
+        return encode_csv(keys, rows, header=first)
+    if fmt == "columns":
+        return encode_columns_line(keys, rows)
+    return encode_ndjson(keys, rows)
+
+def encode_batches(fmt: str, batches: Iterable[tuple], column_types: Optional[Dict[str, Any]] = None) -> Iterable[bytes]:
+    """
+    batches: (keys, rows) per cursor batch, as yielded by SqlRowCrud.export.
+    column_types (SqlRowCrud.column_types) types the arrow schema.
+    """
+    if fmt == "arrow":
+        yield from arrow_batches(batches, column_types or {})
+        return
+    first = True
+    for keys, rows in batches:
+        chunk = _encode(fmt, keys, rows, first)
+        first = False
+        if chunk:
+            yield chunk
+
+async def aencode_batches(fmt: str, batches, column_types: Optional[Dict[str, Any]] = None) -> Any:
+    # async generator twin of encode_batches for AsyncSqlRowCrud.export
+    if fmt == "arrow":
+        async for chunk in aarrow_batches(batches, column_types or {}):
+            yield chunk
+        return
+    first = True
+    async for keys, rows in batches:
+        chunk = _encode(fmt, keys, rows, first)
+        first = False
+        if chunk:
+            yield chunk
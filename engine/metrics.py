@@ -0,0 +1,255 @@
+from __future__ import annotations
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+# In-process metrics with Prometheus text exposition (GET /metrics).
+#
+# METRICS = {"enabled": true, "buckets": [...seconds]} in clients/<client>/env.py.
+# Disabled (the default), stage() hands back one shared no-op context manager and no
+# engine events are attached, so instrumented code pays a bool check.
+#
+# studio_stage_seconds{stage, entity}   spec_build, plan_compile, sql_compile, db_execute,
+#                                       rows_to_dict, serialize
+# studio_db_pool_wait_seconds{source}   pool checkout
+# studio_request_seconds{method, route, status}
+# studio_sink_seconds{sink, kind, entity, action} / studio_sink_errors_total{...}
+# studio_db_pool_*{source}              gauges read from each engine's pool at scrape time
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# the entity a request works on (set by app.main's request middleware)
+CURRENT_ENTITY: ContextVar[str] = ContextVar("metrics_entity", default="")
+
+Labels = Tuple[Tuple[str, str], ...]
+Collector = Callable[[], List[Tuple[str, str, str, Dict[str, str], float]]]  # name, type, help, labels, value
+
+_NOOP = nullcontext()
+
+
+class _Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, n: int):
+        self.counts = [0] * (n + 1)   # last slot: +Inf
+        self.sum = 0.0
+        self.count = 0
+
+
+class Registry:
+    def __init__(self):
+        self.enabled = False
+        self.buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+        self._help: Dict[str, Tuple[str, str]] = {}  # name -> (type, help)
+        self._hist: Dict[Tuple[str, Labels], _Histogram] = {}
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._collectors: List[Collector] = []
+        self._instrumented: set = set()
+        self._lock = threading.Lock()
+
+    def configure(self, cfg: Optional[Dict[str, Any]]) -> None:
+        cfg = cfg or {}
+        self.enabled = bool(cfg.get("enabled", False))
+        if cfg.get("buckets"):
+            self.buckets = tuple(sorted(float(b) for b in cfg["buckets"]))
+
+    def describe(self, name: str, kind: str, help_: str) -> None:
+        self._help.setdefault(name, (kind, help_))
+
+    # ---- recording ----
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            h = self._hist.get(key)
+            if h is None:
+                h = self._hist[key] = _Histogram(len(self.buckets))
+            h.counts[i] += 1
+            h.sum += value
+            h.count += 1
+
+    def inc(self, name: str, value: float = 1.0, **labels: str) -> None:
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def stage(self, stage: str, entity: Optional[str] = None):
+        """
+        with METRICS.stage("rows_to_dict"): ...  (entity defaults to CURRENT_ENTITY)
+        """
+        if not self.enabled:
+            return _NOOP
+        return self._timed("studio_stage_seconds", stage=stage, entity=entity if entity is not None else CURRENT_ENTITY.get())
+
+    @contextmanager
+    def _timed(self, name: str, **labels: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - t0, **labels)
+
+    def sink_call(self, sink: str, kind: str, entity: str, action: str):
+        # times one sink call and counts it as an error if it raises
+        if not self.enabled:
+            return _NOOP
+        return self._sink_timed(sink=sink, kind=kind, entity=entity, action=action)
+
+    @contextmanager
+    def _sink_timed(self, **labels: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.inc("studio_sink_errors_total", **labels)
+            raise
+        finally:
+            self.observe("studio_sink_seconds", time.perf_counter() - t0, **labels)
+
+    def add_collector(self, fn: Collector) -> None:
+        self._collectors.append(fn)
+
+    # ---- engines ----
+
+    def instrument_engine(self, source: str, engine) -> None:
+        """
+        Pool checkout wait, statement compilation and execution times for one engine
+        (sync Engine, or an AsyncEngine's sync_engine). No-op while disabled.
+        """
+        if not self.enabled or engine is None:
+            return
+        engine = getattr(engine, "sync_engine", engine)
+        if id(engine) in self._instrumented:
+            return
+        self._instrumented.add(id(engine))
+
+        # Connection() checks out its DBAPI connection through raw_connection(): the
+        # time spent there is the pool wait (plus connect, when the pool grows)
+        raw_connection = engine.raw_connection
+
+        def timed_raw_connection(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return raw_connection(*args, **kwargs)
+            finally:
+                self.observe("studio_db_pool_wait_seconds", time.perf_counter() - t0, source=source)
+
+        engine.raw_connection = timed_raw_connection
+
+        # before_execute -> before_cursor_execute: compile (or compiled-cache lookup) and
+        # parameter processing; before/after_cursor_execute: the driver round trip
+        @event.listens_for(engine, "before_execute")
+        def _before_execute(conn, clauseelement, multiparams, params, execution_options):
+            conn.info["metrics_t0"] = time.perf_counter()
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def _before_cursor(conn, cursor, statement, parameters, context, executemany):
+            now = time.perf_counter()
+            t0 = conn.info.pop("metrics_t0", None)
+            if t0 is not None:
+                self.observe("studio_stage_seconds", now - t0, stage="sql_compile", entity=CURRENT_ENTITY.get())
+            conn.info["metrics_exec_t0"] = now
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def _after_cursor(conn, cursor, statement, parameters, context, executemany):
+            t0 = conn.info.pop("metrics_exec_t0", None)
+            if t0 is not None:
+                self.observe("studio_stage_seconds", time.perf_counter() - t0, stage="db_execute", entity=CURRENT_ENTITY.get())
+
+        @event.listens_for(engine, "handle_error")
+        def _error(ctx):
+            if ctx.connection is not None:
+                ctx.connection.info.pop("metrics_exec_t0", None)
+            self.inc("studio_db_errors_total", source=source)
+
+    def pool_collector(self, sources: Callable[[], Dict[str, Any]]) -> Collector:
+        # gauges from every source that has a pooled SQLAlchemy engine
+        def collect():
+            out = []
+            for name, src in sources().items():
+                engine = getattr(src, "engine", None)
+                pool = getattr(engine, "pool", None)
+                if pool is None or not hasattr(pool, "checkedout"):
+                    continue
+                labels = {"source": name}
+                out.append(("studio_db_pool_checked_out", "gauge", "Connections currently checked out", labels, pool.checkedout()))
+                out.append(("studio_db_pool_checked_in", "gauge", "Idle connections in the pool", labels, pool.checkedin()))
+                if hasattr(pool, "overflow"):
+                    out.append(("studio_db_pool_overflow", "gauge", "Connections beyond pool_size (negative: unused capacity)", labels, pool.overflow()))
+                    out.append(("studio_db_pool_size", "gauge", "Configured pool_size", labels, pool.size()))
+            return out
+        return collect
+
+    # ---- exposition ----
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            hist = {k: (list(h.counts), h.sum, h.count) for k, h in self._hist.items()}
+            counters = dict(self._counters)
+
+        def header(name: str, kind: str, help_: Optional[str] = None) -> None:
+            kind_, help_default = self._help.get(name, (kind, name))
+            lines.append(f"# HELP {name} {help_ or help_default}")
+            lines.append(f"# TYPE {name} {kind_}")
+
+        for name in sorted({k[0] for k in hist}):
+            header(name, "histogram")
+            for (n, labels), (counts, total, count) in sorted(hist.items()):
+                if n != name:
+                    continue
+                cum = 0
+                for bound, c in zip(list(self.buckets) + [float("inf")], counts):
+                    cum += c
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{name}_bucket{_fmt_labels(labels + (('le', le),))} {cum}")
+                lines.append(f"{name}_sum{_fmt_labels(labels)} {total}")
+                lines.append(f"{name}_count{_fmt_labels(labels)} {count}")
+
+        for name in sorted({k[0] for k in counters}):
+            header(name, "counter")
+            for (n, labels), v in sorted(counters.items()):
+                if n == name:
+                    lines.append(f"{name}{_fmt_labels(labels)} {v}")
+
+        gauges: Dict[str, List[str]] = {}
+        helps: Dict[str, str] = {}
+        for fn in self._collectors:
+            for name, kind, help_, labels, value in fn():
+                helps.setdefault(name, f"{kind}\0{help_}")
+                gauges.setdefault(name, []).append(f"{name}{_fmt_labels(tuple(sorted(labels.items())))} {value}")
+        for name in sorted(gauges):
+            kind, help_ = helps[name].split("\0", 1)
+            header(name, kind, help_)
+            lines.extend(gauges[name])
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape(v: str) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_labels(labels: Sequence[Tuple[str, str]]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+METRICS = Registry()
+METRICS.describe("studio_stage_seconds", "histogram", "Time per request stage")
+METRICS.describe("studio_request_seconds", "histogram", "HTTP request latency")
+METRICS.describe("studio_sink_seconds", "histogram", "Post-write sink call latency")
+METRICS.describe("studio_sink_errors_total", "counter", "Post-write sink failures")
+METRICS.describe("studio_db_pool_wait_seconds", "histogram", "Time to check a connection out of the pool")
+METRICS.describe("studio_db_errors_total", "counter", "Statement errors raised by the driver")
@@ -0,0 +1,189 @@
+from __future__ import annotations
+import json
+import logging
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+from sqlalchemy import (
+    Table, Column, MetaData, Index, BigInteger, Integer, String, Text, DateTime, JSON,
+    insert, select, update, delete, exists,
+)
+from sqlalchemy.dialects.postgresql import JSONB
+
+from engine.responses import json_default
+
+log = logging.getLogger(__name__)
+
+# Transactional outbox for post-write sinks.
+# SqlRowCrud writes one outbox row in the same transaction as the entity write; the
+# worker (python -m engine.outbox_worker) claims batches with FOR UPDATE SKIP LOCKED,
+# fans them out through PostWritePipeline.deliver and retries failures with backoff.
+# Delivery is at-least-once: sinks must tolerate replays (ES/S3 upserts by id do).
+# Events for the same (entity, id) are delivered in order: a pending earlier event
+# holds back later ones, so a retried create never lands after its update.
+
+DEFAULT_TABLE = "studio_outbox"
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+def _jsonable(v: Any) -> Any:
+    # same encoding as the JSON responses (Decimal -> int/float, isoformat dates, UUID -> str),
+    # so outbox-delivered rows reach sinks in the shapes inline delivery's clients produce
+    return json.loads(json.dumps(v, default=json_default))
+
+def outbox_table(name: str = DEFAULT_TABLE) -> Table:
+    payload = JSON().with_variant(JSONB(), "postgresql")
+    return Table(
+        name, MetaData(),
+        Column("id", BigInteger().with_variant(Integer(), "sqlite"), primary_key=True, autoincrement=True),
+        Column("entity", String(200), nullable=False),
+        Column("action", String(20), nullable=False),
+        Column("id_value", Text),
+        Column("row", payload),
+        Column("status", String(20), nullable=False, default="pending"),  # pending | dead
+        Column("attempts", Integer, nullable=False, default=0),
+        Column("delivered", payload),  # sink names already done (skipped on retry)
+        Column("last_error", Text),
+        Column("available_at", DateTime(timezone=True), nullable=False, default=_utcnow, index=True),
+        Column("created_at", DateTime(timezone=True), nullable=False, default=_utcnow),
+        Index(f"ix_{name}_key", "entity", "id_value", "id"),
+    )
+
+class Outbox:
+    def __init__(self, table_name: str = DEFAULT_TABLE):
+        self.table = outbox_table(table_name)
+
+    def create_table(self, engine) -> None:
+        self.table.create(engine, checkfirst=True)
+
+    def enqueue(self, conn, entity: str, action: str, *, row: Optional[Dict[str, Any]] = None, id_value: Any = None, pk: str = "id") -> None:
+        # conn is the caller's open transaction: the event commits or rolls back with the write
+        if id_value is None and row is not None:
+            id_value = row.get(pk)
+        conn.execute(insert(self.table).values(
+            entity=entity,
+            action=action,
+            id_value=None if id_value is None else str(id_value),
+            row=_jsonable(row) if row is not None else None,
+            delivered=[],
+        ))
+
+    def enqueue_many(self, conn, entity: str, action: str, *, rows: Optional[List[Dict[str, Any]]] = None, ids: Optional[List[Any]] = None, pk: str = "id") -> None:
+        # bulk writes: one multi-row INSERT for the whole batch, same transaction
+        if rows is not None:
+            events = [{"id_value": r.get(pk), "row": _jsonable(r)} for r in rows]
+        else:
+            events = [{"id_value": i, "row": None} for i in ids or []]
+        if not events:
+            return
+        conn.execute(insert(self.table), [
+            {
+                "entity": entity,
+                "action": action,
+                "id_value": None if ev["id_value"] is None else str(ev["id_value"]),
+                "row": ev["row"],
+                "delivered": [],
+            }
+            for ev in events
+        ])
+
+class OutboxWorker:
+    def __init__(
+        self,
+        engine,
+        outbox: Outbox,
+        pipeline,
+        *,
+        batch_size: int = 100,
+        max_attempts: int = 20,
+        backoff_base_s: float = 1.0,
+        backoff_max_s: float = 300.0,
+    ):
+        self.engine = engine
+        self.outbox = outbox
+        self.pipeline = pipeline
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+        self._stop = False
+
+    def _backoff(self, attempts: int) -> float:
+        delay = min(self.backoff_max_s, self.backoff_base_s * (2 ** (attempts - 1)))
+        return delay * random.uniform(0.5, 1.0)
+
+    def run_once(self) -> int:
+        """
+        Claims and delivers one batch. Returns number of events claimed.
+        """
+        t = self.outbox.table
+        prev = t.alias("prev")
+        now = _utcnow()
+        blocked = exists().where(
+            prev.c.entity == t.c.entity,
+            prev.c.id_value == t.c.id_value,
+            prev.c.id < t.c.id,
+            prev.c.status == "pending",
+        )
+        claim = (
+            select(t)
+            .where(t.c.status == "pending", t.c.available_at <= now, ~blocked)
+            .order_by(t.c.id)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+
+        with self.engine.begin() as conn:
+            events = [dict(r) for r in conn.execute(claim).mappings().all()]
+            results = []
+            for ev in events:
+                done: List[str] = list(ev["delivered"] or [])
+                delivered, errors = self.pipeline.deliver(
+                    ev["entity"], ev["action"], row=ev["row"], id_value=ev["id_value"], skip=done,
+                )
+                results.append((ev, done, delivered, errors))
+
+            # batching sinks report per-row failures on flush: fold them back into their events
+            late: Dict[Any, List[Dict[str, Any]]] = {}
+            for f in self.pipeline.flush():
+                late.setdefault((f.get("entity"), str(f.get("id"))), []).append(f)
+
+            for ev, done, delivered, errors in results:
+                for f in late.get((ev["entity"], ev["id_value"]), []):
+                    if f.get("sink") in delivered:
+                        delivered.remove(f["sink"])
+                    errors.append({"sink": f.get("sink"), "error": str(f.get("error"))})
+
+                if not errors:
+                    conn.execute(delete(t).where(t.c.id == ev["id"]))
+                    continue
+
+                attempts = ev["attempts"] + 1
+                dead = attempts >= self.max_attempts
+                conn.execute(
+                    update(t).where(t.c.id == ev["id"]).values(
+                        attempts=attempts,
+                        delivered=done + delivered,
+                        last_error=json.dumps(errors),
+                        status="dead" if dead else "pending",
+                        available_at=now + timedelta(seconds=self._backoff(attempts)),
+                    )
+                )
+                if dead:
+                    log.error("outbox event %s dead after %s attempts: %s", ev["id"], attempts, errors)
+        return len(events)
+
+    def run_forever(self, *, interval_s: float = 1.0) -> None:
+        while not self._stop:
+            try:
+                n = self.run_once()
+            except Exception:
+                log.exception("outbox batch failed")
+                n = 0
+            if n < self.batch_size:
+                time.sleep(interval_s)
+
+    def stop(self) -> None:
+        self._stop = True
@@ -0,0 +1,73 @@
+from __future__ import annotations
+import argparse
+import logging
+import signal
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.config import get_manager, get_entities
+from engine.outbox import Outbox, OutboxWorker, DEFAULT_TABLE
+from engine.post_write import PostWritePipeline
+from engine.query_planner import compile_entity_plans
+from entities.spec import parse_entity_spec
+
+# load custom queries (plans + targeted reflection need their builders/tables)
+import sources.queries.sample_po_with_totals  # noqa: F401
+
+# usage: python -m engine.outbox_worker [--once] [--batch-size 100] [--interval 1.0]
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Deliver post-write outbox events to sinks")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--interval", type=float, default=1.0, help="idle poll interval (seconds)")
+    parser.add_argument("--max-attempts", type=int, default=20)
+    parser.add_argument("--backoff-base", type=float, default=1.0)
+    parser.add_argument("--backoff-max", type=float, default=300.0)
+    parser.add_argument("--once", action="store_true", help="deliver one batch and exit")
+    parser.add_argument("--create-table", action="store_true", help="create the outbox table if missing")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+
+    mgr = get_manager()
+    outbox_cfg = mgr.config.get("outbox", {})
+    db_source = mgr.get_source(mgr.config["routing"]["active_source"])
+    outbox = Outbox(outbox_cfg.get("table", DEFAULT_TABLE))
+    if args.create_table:
+        outbox.create_table(db_source.engine)
+
+    cache_source = mgr.cache()
+    if cache_source is not None:
+        # cache_set sinks need the join graph to invalidate entities reading the written table
+        specs = {name: parse_entity_spec(name, cfg) for name, cfg in get_entities().items()}
+        cache_source.client.configure(compile_entity_plans(specs, db_source.meta))
+
+    pipeline = PostWritePipeline(manager=mgr, entity_specs=get_entities())
+    worker = OutboxWorker(
+        db_source.engine,
+        outbox,
+        pipeline,
+        batch_size=args.batch_size,
+        max_attempts=args.max_attempts,
+        backoff_base_s=args.backoff_base,
+        backoff_max_s=args.backoff_max,
+    )
+
+    try:
+        if args.once:
+            n = worker.run_once()
+            logging.info("delivered batch of %s event(s)", n)
+            return
+
+        signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+        signal.signal(signal.SIGINT, lambda *_: worker.stop())
+        worker.run_forever(interval_s=args.interval)
+    finally:
+        mgr.close()  # flushes the pipeline's sinks first
+
+if __name__ == "__main__":
+    main()
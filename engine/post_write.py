@@ -1,12 +1,23 @@
 from __future__ import annotations
-from typing import Any, Dict, List, Optional
+import threading
+from anyio import to_thread
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 from sinks.registry import SINK_REGISTRY
+from engine.metrics import METRICS
+
+# listener(entity, action) runs before the sinks on every write (e.g. cache invalidation)
+WriteListener = Callable[[str, str], None]
 
 class PostWritePipeline:
-    def __init__(self, manager, entity_specs: Dict[str, Any]):
+    def __init__(self, manager, entity_specs: Dict[str, Any], listeners: Optional[List[WriteListener]] = None):
         self.manager = manager
         self.entity_specs = entity_specs
+        self.listeners: List[WriteListener] = list(listeners or [])
         self._sink_cache: Dict[str, Any] = {}
+        self._sink_lock = threading.Lock()
+        # buffered sinks flush on SourceManager.close(), before their sources go away
+        if hasattr(manager, "add_close_hook"):
+            manager.add_close_hook(self.close)
 
     def _build_sink(self, sink_cfg: Dict[str, Any]):
         kind = sink_cfg["kind"]
@@ -16,34 +27,111 @@ class PostWritePipeline:
         if key in self._sink_cache:
             return self._sink_cache[key]
 
-        cls = SINK_REGISTRY[kind]
-        inst = cls(name=name, cfg=sink_cfg, manager=self.manager)
-        self._sink_cache[key] = inst
-        return inst
+        # sinks may own buffers/flusher threads: build each one exactly once
+        with self._sink_lock:
+            if key not in self._sink_cache:
+                cls = SINK_REGISTRY[kind]
+                self._sink_cache[key] = cls(name=name, cfg=sink_cfg, manager=self.manager)
+        return self._sink_cache[key]
 
-    def run(self, entity: str, action: str, *, row: Optional[Dict[str, Any]] = None, id_value: Any = None) -> List[Dict[str, Any]]:
+    def _post(self, entity: str) -> Dict[str, Any]:
+        return self.entity_specs[entity].get("post_write", {})
+
+    def is_outbox(self, entity: str) -> bool:
+        # mode: inline (default) | outbox
+        return self._post(entity).get("mode", "inline") == "outbox"
+
+    def _sink_call(self, sink, entity: str, action: str, *, row: Optional[Dict[str, Any]] = None, id_value: Any = None, rows: Optional[List[Dict[str, Any]]] = None, ids: Optional[List[Any]] = None, bulk: bool = False) -> None:
+        if bulk:
+            sink.on_bulk(entity, action, rows=rows, ids=ids)
+        elif action == "create":
+            sink.on_create(entity, row or {})
+        elif action == "update":
+            sink.on_update(entity, row or {})
+        elif action == "delete":
+            sink.on_delete(entity, id_value)
+
+    def _fan_out(self, entity: str, action: str, *, strict: bool, skip: Sequence[str] = (), bulk: bool = False, **payload: Any) -> Tuple[List[str], List[Dict[str, Any]]]:
         """
-        Returns warnings list: [{sink, error}]
+        The one sink loop behind run/run_bulk/deliver (and their async wrappers): every
+        sink in order, each failure recorded as {sink, error} (or raised when strict).
+        Returns (delivered sink names, failures); sinks named in skip are not re-run.
         """
-        spec = self.entity_specs[entity]
-        post = spec.get("post_write", {})
-        sinks = post.get("sinks", [])
-        policy = post.get("policy", "best_effort")  # best_effort | strict
+        delivered: List[str] = []
+        errors: List[Dict[str, Any]] = []
 
-        warnings: List[Dict[str, Any]] = []
-
-        for s_cfg in sinks:
+        for s_cfg in self._post(entity).get("sinks", []):
+            sink_name = s_cfg.get("name") or s_cfg["kind"]
+            if sink_name in skip:
+                continue
             sink = self._build_sink(s_cfg)
             try:
-                if action == "create":
-                    sink.on_create(entity, row or {})
-                elif action == "update":
-                    sink.on_update(entity, row or {})
-                elif action == "delete":
-                    sink.on_delete(entity, id_value)
+                with METRICS.sink_call(sink_name, s_cfg["kind"], entity, f"bulk_{action}" if bulk else action):
+                    self._sink_call(sink, entity, action, bulk=bulk, **payload)
+                delivered.append(sink_name)
             except Exception as e:
-                if policy == "strict":
+                if strict:
                     raise
-                warnings.append({"sink": s_cfg.get("name") or s_cfg["kind"], "error": str(e)})
+                errors.append({"sink": sink_name, "error": str(e)})
+
+        return delivered, errors
+
+    def _notify(self, entity: str, action: str) -> None:
+        for fn in self.listeners:
+            fn(entity, action)
+
+    def _strict(self, entity: str) -> bool:
+        return self._post(entity).get("policy", "best_effort") == "strict"  # best_effort | strict
+
+    def _after_write(self, entity: str, action: str, *, bulk: bool = False, **payload: Any) -> List[Dict[str, Any]]:
+        self._notify(entity, action)
+        if self.is_outbox(entity) or (bulk and not (payload.get("rows") or payload.get("ids"))):
+            return []
+        return self._fan_out(entity, action, strict=self._strict(entity), bulk=bulk, **payload)[1]
+
+    def run(self, entity: str, action: str, *, row: Optional[Dict[str, Any]] = None, id_value: Any = None) -> List[Dict[str, Any]]:
+        """
+        Returns warnings list: [{sink, error}]
+        Outbox-mode entities only notify listeners; the worker delivers their sinks.
+        """
+        return self._after_write(entity, action, row=row, id_value=id_value)
+
+    async def arun(self, entity: str, action: str, *, row: Optional[Dict[str, Any]] = None, id_value: Any = None) -> List[Dict[str, Any]]:
+        """
+        Async variant of run() for async handlers. Listeners (a redis cache tier does
+        network I/O) and the sink SDKs (ES, boto3, BigQuery) are blocking, so the whole
+        of run() goes to a worker thread.
+        """
+        return await to_thread.run_sync(lambda: self._after_write(entity, action, row=row, id_value=id_value))
+
+    def run_bulk(self, entity: str, action: str, *, rows: Optional[List[Dict[str, Any]]] = None, ids: Optional[List[Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Bulk endpoints: listeners run once and each sink gets the whole batch (on_bulk).
+        Returns warnings list: [{sink, error}]
+        """
+        return self._after_write(entity, action, bulk=True, rows=rows, ids=ids)
+
+    async def arun_bulk(self, entity: str, action: str, *, rows: Optional[List[Dict[str, Any]]] = None, ids: Optional[List[Any]] = None) -> List[Dict[str, Any]]:
+        return await to_thread.run_sync(lambda: self._after_write(entity, action, bulk=True, rows=rows, ids=ids))
+
+    def deliver(self, entity: str, action: str, *, row: Optional[Dict[str, Any]] = None, id_value: Any = None, skip: Sequence[str] = ()) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """
+        Outbox delivery: every sink is attempted regardless of policy/mode.
+        Returns (delivered sink names, [{sink, error}]); sinks named in skip are not re-run.
+        """
+        return self._fan_out(entity, action, strict=False, skip=skip, row=row, id_value=id_value)
+
+    def flush(self) -> List[Dict[str, Any]]:
+        """
+        Flushes batching sinks; returns their per-row failures [{sink, entity, id, error}].
+        """
+        failures: List[Dict[str, Any]] = []
+        for sink in list(self._sink_cache.values()):
+            failures.extend(sink.flush())
+        return failures
 
-        return warnings
+    def close(self) -> List[Dict[str, Any]]:
+        failures: List[Dict[str, Any]] = []
+        for sink in list(self._sink_cache.values()):
+            failures.extend(sink.close())
+        return failures
@@ -0,0 +1,233 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Dict, FrozenSet, Iterable, Mapping, Optional, Sequence, Tuple
+from sqlalchemy import Table, UniqueConstraint, select, func, bindparam
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.util import find_tables
+
+from entities.spec import EntitySpec
+from sources.queries.registry import QUERY_REGISTRY
+
+# Compiled, immutable per-entity query plans.
+# Built once at startup from the parsed EntitySpecs + reflected MetaData and shared
+# by every request, so handlers only attach WHERE/LIMIT and SQLAlchemy's compiled
+# cache sees the same statement structure each time. Plans hold no mutable state:
+# per-shape projections are built by projection() and cached by the caller
+# (SqlRowCrud keeps a locked LRU of them).
+
+
+@dataclass(frozen=True)
+class JoinPlan:
+    alias: str
+    target: Any                         # aliased Table
+    onclause: Any
+    type: str                           # left | inner
+    depends: FrozenSet[str]             # other join aliases the ON clause reads
+    # LEFT join on a unique key of the joined table: never adds or removes rows,
+    # so it can be dropped when nothing reads its columns
+    prunable: bool
+
+
+@dataclass(frozen=True)
+class EntityPlan:
+    spec: EntitySpec
+    table: Optional[Table]
+    aliases: Mapping[str, Any]          # table_or_alias -> Table / Alias
+    from_clause: Any
+    columns: Mapping[str, Any]          # out_key -> column (unlabelled, for filters/search)
+    search_columns: Tuple[Any, ...]
+    pk_key: str                         # out_key used to look up one row
+    cursor_key: str                     # out_key keyset pagination sorts on (then pk_key)
+    select_stmt: Select                 # select(labelled fields) FROM joins
+    list_stmt: Select                   # what list() pages over (custom: select(subquery))
+    count_stmt: Select                  # select(count()) over the same FROM
+    get_one_stmt: Select                # select_stmt WHERE pk = :id_value
+    tables: FrozenSet[str]              # real table names the plan reads
+    joins: Tuple[JoinPlan, ...] = ()
+    field_aliases: Mapping[str, str] = field(default_factory=lambda: MappingProxyType({}))   # out_key -> join alias it reads ("" = base)
+
+    @property
+    def custom(self) -> bool:
+        return self.spec.custom_query_id is not None
+
+    def needed_aliases(self, keys: Iterable[str]) -> FrozenSet[str]:
+        # joins the given out_keys read, plus every join that can't be dropped, plus what their ON clauses read
+        by_alias = {j.alias: j for j in self.joins}
+        todo = [self.field_aliases.get(k, "") for k in keys] + [j.alias for j in self.joins if not j.prunable]
+        needed = set()
+        while todo:
+            a = todo.pop()
+            if a in needed or a not in by_alias:
+                continue
+            needed.add(a)
+            todo.extend(by_alias[a].depends)
+        return frozenset(needed)
+
+    def projection(self, fields: Sequence[str], used: Iterable[str] = ()) -> Tuple[Select, Select]:
+        """
+        (select of fields, count) FROM the base table and only the joins that fields,
+        used (filter/search/sort keys) or row counts depend on. The count's FROM only
+        keeps what used needs. Builds new statements on every call: callers cache them.
+        """
+        if self.custom:
+            return select(*[self.from_clause.c[k] for k in fields]), self.count_stmt
+        used = frozenset(used)
+        stmt = select(*[self.columns[k].label(k) for k in fields]).select_from(self._join_from(self.needed_aliases(used.union(fields))))
+        return stmt, select(func.count()).select_from(self._join_from(self.needed_aliases(used)))
+
+    def _join_from(self, aliases: FrozenSet[str]):
+        from_clause = self.table
+        for j in self.joins:
+            if j.alias not in aliases:
+                continue
+            if j.type == "left":
+                from_clause = from_clause.outerjoin(j.target, j.onclause)
+            else:
+                from_clause = from_clause.join(j.target, j.onclause)
+        return from_clause
+
+
+def _parse_col(token: str) -> Tuple[str, str]:
+    # token = "alias_or_table.col"
+    left, col = token.split(".", 1)
+    return left, col
+
+
+def _table(meta, name: str) -> Table:
+    if name not in meta.tables:
+        raise ValueError(f"Table not found in metadata: {name}")
+    return meta.tables[name]
+
+
+def _unique_key(table: Table, col: str) -> bool:
+    # col alone is the primary key or carries a unique constraint/index
+    if [c.name for c in table.primary_key.columns] == [col]:
+        return True
+    if table.c[col].unique:
+        return True
+    for con in table.constraints:
+        if isinstance(con, UniqueConstraint) and [c.name for c in con.columns] == [col]:
+            return True
+    return any(ix.unique and [c.name for c in ix.columns] == [col] for ix in table.indexes)
+
+
+def _compile_custom(spec: EntitySpec, meta) -> EntityPlan:
+    builder = QUERY_REGISTRY.get(spec.custom_query_id)
+    if not builder:
+        raise ValueError(f"Unknown custom_query_id: {spec.custom_query_id}")
+
+    # the unfiltered statement is reused as-is; filtered/q calls still go through the builder
+    stmt = builder(meta, None, None, None)
+    columns = dict(stmt.selected_columns.items())
+    # we expect "id" in selected columns
+    if "id" not in columns:
+        raise ValueError(f"custom query {spec.custom_query_id} must select an 'id' column")
+    if spec.cursor_key and spec.cursor_key not in columns:
+        raise ValueError(f"cursor_key {spec.cursor_key} is not selected by {spec.custom_query_id}")
+
+    subq = stmt.subquery()
+    return EntityPlan(
+        spec=spec,
+        table=None,
+        aliases=MappingProxyType({}),
+        from_clause=subq,
+        columns=MappingProxyType(columns),
+        search_columns=(),
+        pk_key="id",
+        cursor_key=spec.cursor_key or "id",
+        select_stmt=stmt,
+        list_stmt=select(subq),
+        count_stmt=select(func.count()).select_from(subq),
+        get_one_stmt=stmt.where(columns["id"] == bindparam("id_value")),
+        tables=frozenset(t.name for t in find_tables(stmt, include_joins=True) if isinstance(t, Table)),
+    )
+
+
+def compile_entity_plan(spec: EntitySpec, meta) -> EntityPlan:
+    if spec.custom_query_id:
+        return _compile_custom(spec, meta)
+
+    base = _table(meta, spec.table)
+    from_clause = base
+
+    # build aliases
+    alias_map: Dict[str, Any] = {spec.table: base}
+
+    def resolve(token: str):
+        tbl, col = _parse_col(token)
+        t = alias_map.get(tbl)
+        if t is None:
+            t = _table(meta, tbl)
+        if col not in t.c:
+            raise ValueError(f"{spec.name}: unknown column {token}")
+        return t.c[col]
+
+    joins = []
+    for j in spec.joins:
+        jt = _table(meta, j.table).alias(j.alias)
+        alias_map[j.alias] = jt
+        # join condition
+        cond = resolve(j.on_left) == resolve(j.on_right)
+        if j.type == "left":
+            from_clause = from_clause.outerjoin(jt, cond)
+        else:
+            from_clause = from_clause.join(jt, cond)
+        sides = [_parse_col(j.on_left), _parse_col(j.on_right)]
+        own = [col for tbl, col in sides if tbl == j.alias]
+        joins.append(JoinPlan(
+            alias=j.alias,
+            target=jt,
+            onclause=cond,
+            type=j.type,
+            depends=frozenset(tbl for tbl, _ in sides if tbl != j.alias),
+            prunable=j.type == "left" and len(own) == 1 and _unique_key(_table(meta, j.table), own[0]),
+        ))
+
+    columns = {out_key: resolve(src) for out_key, src in spec.fields.items()}
+    labelled = [c.label(k) for k, c in columns.items()]
+
+    # default: filter by id key if pk itself is not exposed
+    if spec.pk not in spec.fields and "id" in spec.fields:
+        pk_key = "id"
+    else:
+        pk_key = spec.pk
+    pk_col = columns.get(pk_key)
+    if pk_col is None:
+        pk_col = base.c[spec.pk]
+
+    if spec.cursor_key and spec.cursor_key not in columns:
+        raise ValueError(f"{spec.name}: cursor_key {spec.cursor_key} is not a read field")
+
+    select_stmt = select(*labelled).select_from(from_clause)
+    search_columns = tuple(columns[k] for k in spec.search_keys if k in columns)
+
+    return EntityPlan(
+        spec=spec,
+        table=base,
+        aliases=MappingProxyType(alias_map),
+        from_clause=from_clause,
+        columns=MappingProxyType(columns),
+        search_columns=search_columns,
+        pk_key=pk_key,
+        cursor_key=spec.cursor_key or pk_key,
+        select_stmt=select_stmt,
+        list_stmt=select_stmt,
+        count_stmt=select(func.count()).select_from(from_clause),
+        get_one_stmt=select_stmt.where(pk_col == bindparam("id_value")),
+        tables=frozenset([spec.table] + [j.table for j in spec.joins]),
+        joins=tuple(joins),
+        field_aliases=MappingProxyType({k: _parse_col(src)[0] for k, src in spec.fields.items()}),
+    )
+
+
+def compile_entity_plans(specs: Dict[str, EntitySpec], meta) -> Dict[str, EntityPlan]:
+    plans: Dict[str, EntityPlan] = {}
+    for name, spec in specs.items():
+        if spec.crud != "sql_row":
+            continue
+        try:
+            plans[name] = compile_entity_plan(spec, meta)
+        except Exception as e:
+            raise ValueError(f"Failed to compile entity '{name}': {e}") from e
+    return plans
@@ -0,0 +1,235 @@
+from __future__ import annotations
+import hashlib
+import logging
+import queue
+import random
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+
+from engine.metrics import CURRENT_ENTITY
+
+log = logging.getLogger(__name__)
+
+# Slow-query recorder for the SQL sources.
+#
+# SLOW_QUERIES = {
+#     "enabled": True,
+#     "threshold_ms": 200,        # record statements slower than this
+#     "capacity": 500,            # ring buffer size (oldest dropped)
+#     "explain_sample": 0.1,      # share of slow SELECTs to EXPLAIN (ANALYZE, BUFFERS)
+#     "explain_interval_s": 300,  # at most one EXPLAIN per statement per interval
+#     "explain_timeout_ms": 5000, # statement_timeout for the EXPLAIN itself
+# }
+#
+# Engine events time each statement; slow ones go into the ring buffer with their
+# entity (the request's /api/{entity}), a fingerprint of the parameters (values are
+# not kept) and the duration. Sampled reads (SELECT, or WITH ... SELECT: the list
+# strategies' CTEs) are queued to a worker thread that runs
+# EXPLAIN on its own connection, in a rolled-back transaction, off the request path.
+# GET /debug/slow-queries lists the worst statements.
+
+_SKIP = "slow_query_skip"   # execution option on the recorder's own EXPLAIN
+# EXPLAIN ANALYZE runs the statement: never sample writes, even inside a WITH
+_DML = re.compile(r"\b(insert|update|delete|merge)\b", re.IGNORECASE)
+
+
+def explainable(statement: str) -> bool:
+    head = statement.lstrip()[:6].lower()
+    if head == "select":
+        return True
+    return head[:4] == "with" and not _DML.search(statement)
+
+
+def fingerprint(value: Any) -> str:
+    return hashlib.sha1(repr(value).encode("utf-8", "replace")).hexdigest()[:12]
+
+
+class SlowQueryLog:
+    def __init__(
+        self,
+        *,
+        threshold_ms: float = 200.0,
+        capacity: int = 500,
+        explain_sample: float = 0.1,
+        explain_interval_s: float = 300.0,
+        explain_timeout_ms: int = 5000,
+    ):
+        self.threshold_s = threshold_ms / 1000
+        self.explain_sample = explain_sample
+        self.explain_interval_s = explain_interval_s
+        self.explain_timeout_ms = int(explain_timeout_ms)
+        self._entries: deque = deque(maxlen=capacity)
+        self._plans: Dict[str, Dict[str, Any]] = {}       # statement fingerprint -> latest plan
+        self._explained_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=100)
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_config(cls, cfg: Optional[Dict[str, Any]]) -> Optional["SlowQueryLog"]:
+        cfg = cfg or {}
+        if not cfg.get("enabled", False):
+            return None
+        return cls(
+            threshold_ms=float(cfg.get("threshold_ms", 200)),
+            capacity=int(cfg.get("capacity", 500)),
+            explain_sample=float(cfg.get("explain_sample", 0.1)),
+            explain_interval_s=float(cfg.get("explain_interval_s", 300)),
+            explain_timeout_ms=int(cfg.get("explain_timeout_ms", 5000)),
+        )
+
+    # ---- capture ----
+
+    def attach(self, source: str, engine, *, explain_engine=None) -> None:
+        """
+        Records slow statements run on engine (sync, or an AsyncEngine). EXPLAIN runs on
+        explain_engine (default: engine itself when sync; async engines need the source's
+        sync engine, else their statements are recorded without plans).
+        """
+        if engine is None:
+            return
+        sync_engine = getattr(engine, "sync_engine", engine)
+        if explain_engine is None and not hasattr(engine, "sync_engine"):
+            explain_engine = engine
+
+        @event.listens_for(sync_engine, "before_cursor_execute")
+        def _before(conn, cursor, statement, parameters, context, executemany):
+            conn.info["slow_query_t0"] = time.perf_counter()
+
+        @event.listens_for(sync_engine, "after_cursor_execute")
+        def _after(conn, cursor, statement, parameters, context, executemany):
+            t0 = conn.info.pop("slow_query_t0", None)
+            if t0 is None:
+                return
+            elapsed = time.perf_counter() - t0
+            if elapsed < self.threshold_s or (context is not None and context.execution_options.get(_SKIP)):
+                return
+            self.record(source, statement, parameters, elapsed, executemany=executemany,
+                        dialect=conn.dialect.name, engine=explain_engine)
+
+    def record(self, source: str, statement: str, parameters: Any, elapsed_s: float, *, executemany: bool = False, dialect: str = "", engine=None) -> None:
+        sql_fp = fingerprint(statement)
+        entry = {
+            "at": datetime.now(timezone.utc).isoformat(),
+            "source": source,
+            "entity": CURRENT_ENTITY.get() or None,
+            "duration_ms": round(elapsed_s * 1000, 2),
+            "statement_fp": sql_fp,
+            "params_fp": fingerprint(parameters),
+            "executemany": executemany,
+            "sql": statement,
+        }
+        with self._lock:
+            self._entries.append(entry)
+            due = (
+                engine is not None
+                and not executemany
+                and explainable(statement)
+                and time.time() - self._explained_at.get(sql_fp, 0) >= self.explain_interval_s
+                and random.random() < self.explain_sample
+            )
+            if due:
+                self._explained_at[sql_fp] = time.time()
+        if due:
+            try:
+                self._queue.put_nowait((engine, dialect, sql_fp, statement, parameters))
+                self._start()
+            except queue.Full:
+                pass
+
+    # ---- EXPLAIN worker ----
+
+    def _start(self) -> None:
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="slow-query-explain", daemon=True)
+                    self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            engine, dialect, sql_fp, statement, parameters = job
+            try:
+                plan = self.explain(engine, dialect, statement, parameters)
+            except Exception as e:
+                log.warning("EXPLAIN of slow statement %s failed: %s", sql_fp, e)
+                plan = {"error": str(e)}
+            with self._lock:
+                self._plans[sql_fp] = {"at": datetime.now(timezone.utc).isoformat(), **plan}
+
+    def explain(self, engine, dialect: str, statement: str, parameters: Any) -> Dict[str, Any]:
+        with engine.connect() as conn:
+            conn = conn.execution_options(**{_SKIP: True})
+            with conn.begin() as tx:
+                try:
+                    if dialect == "postgresql":
+                        conn.exec_driver_sql(f"SET LOCAL statement_timeout = {self.explain_timeout_ms}")
+                        res = conn.exec_driver_sql(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}", parameters).scalar()
+                        return {"format": "json", "plan": res}
+                    if dialect == "sqlite":
+                        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+                        return {"format": "sqlite", "plan": [list(r) for r in rows]}
+                    return {"error": f"EXPLAIN not supported for dialect {dialect}"}
+                finally:
+                    # ANALYZE executes the statement: never keep its effects
+                    tx.rollback()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                pass
+            self._thread.join(timeout=1)
+
+    # ---- reporting ----
+
+    def recent(self, limit: int = 50) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._entries)[-limit:][::-1]
+
+    def worst(self, limit: int = 20, order: str = "total") -> List[Dict[str, Any]]:
+        """
+        Slow statements in the buffer grouped by SQL text; order: total | max | count | mean.
+        """
+        if order not in ("total", "max", "count", "mean"):
+            raise ValueError(f"Unknown order: {order}")
+        with self._lock:
+            entries = list(self._entries)
+            plans = dict(self._plans)
+
+        groups: Dict[str, Dict[str, Any]] = {}
+        for e in entries:
+            g = groups.get(e["statement_fp"])
+            if g is None:
+                g = groups[e["statement_fp"]] = {
+                    "statement_fp": e["statement_fp"], "sql": e["sql"], "source": e["source"],
+                    "entities": [], "count": 0, "total_ms": 0.0, "max_ms": 0.0, "params_fps": set(), "last_at": None,
+                }
+            g["count"] += 1
+            g["total_ms"] += e["duration_ms"]
+            g["max_ms"] = max(g["max_ms"], e["duration_ms"])
+            g["params_fps"].add(e["params_fp"])
+            g["last_at"] = e["at"]
+            if e["entity"] and e["entity"] not in g["entities"]:
+                g["entities"].append(e["entity"])
+
+        out = []
+        for fp, g in groups.items():
+            g["total_ms"] = round(g["total_ms"], 2)
+            g["mean_ms"] = round(g["total_ms"] / g["count"], 2)
+            g["distinct_params"] = len(g.pop("params_fps"))
+            g["plan"] = plans.get(fp)
+            out.append(g)
+        key = {"total": "total_ms", "max": "max_ms", "count": "count", "mean": "mean_ms"}[order]
+        out.sort(key=lambda g: g[key], reverse=True)
+        return out[:limit]
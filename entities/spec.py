@@ -1,6 +1,7 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Set, Tuple
+from sources.queries.registry import QUERY_TABLES
 
 @dataclass
 class JoinSpec:
@@ -28,11 +29,40 @@ class EntitySpec:
     allowed_write_keys: List[str]
 
     custom_query_id: Optional[str] = None
+    cursor_key: Optional[str] = None  # field key for keyset pagination (default: pk)
+    total_mode: str = "exact"         # exact | estimated | cached | none
+    total_ttl_s: float = 30.0         # TTL for total_mode=cached
+    # read.cursor_total: total mode for keyset (cursor) pages, which exist to avoid
+    # scanning the whole result set; total= on the request overrides either
+    cursor_total_mode: str = "none"
+    unknown_filters: str = "error"    # read.unknown_filters: error | ignore (skip unknown fields)
+    cache_ttl_s: Optional[float] = None  # read.cache: read-through get_one/list cache TTL (None = off)
+    # read.list_strategy: how list() gets an exact total with its page (see SqlRowCrud._list)
+    list_strategy: str = "serial"     # serial | window | cte | concurrent
+
+    # read.search_mode: how q is matched (see sources/crud/sql_search.py); trgm/tsvector
+    # need infra/search_ddl.py applied first
+    search_mode: str = "ilike"        # ilike | trgm | tsvector | es
+    search_config: str = "simple"     # tsvector: text search configuration
+    search_source: Optional[str] = None   # es: source name (default: routing.search_source)
+    search_index: Optional[str] = None    # es: index (default: the entity's es_index sink index)
+    search_hydrate: str = "auto"          # es: sql (pk = ANY) | source (_source) | auto
+    search_indexed_fields: Optional[List[str]] = None  # es: fields the sink indexes (None = unknown)
+
+    post_write_mode: str = "inline"   # inline | outbox
+    copy_threshold: int = 5000        # bulk create: COPY at/above this many rows (postgres)
 
 def parse_entity_spec(name: str, cfg: Dict[str, Any]) -> EntitySpec:
     storage = cfg.get("storage", {})
     read = cfg.get("read", {})
     write = cfg.get("write", {})
+    post = cfg.get("post_write", {})
+
+    # read.cache: true | {"ttl_s": N}
+    cache_cfg = read.get("cache")
+    if cache_cfg is True:
+        cache_cfg = {}
+    cache_ttl_s = float(cache_cfg.get("ttl_s", 30)) if isinstance(cache_cfg, dict) else None
 
     joins_cfg = read.get("joins", [])
     joins: List[JoinSpec] = []
@@ -47,6 +77,9 @@ def parse_entity_spec(name: str, cfg: Dict[str, Any]) -> EntitySpec:
             )
         )
 
+    # es search defaults come from the entity's es_index sink, which maintains the index
+    es_sink = next((sk for sk in post.get("sinks", []) if sk.get("kind") == "es_index"), {})
+
     return EntitySpec(
         name=name,
         source=storage["source"],
@@ -62,4 +95,42 @@ def parse_entity_spec(name: str, cfg: Dict[str, Any]) -> EntitySpec:
         allowed_write_keys=write.get("allowed", []),
 
         custom_query_id=read.get("custom_query_id"),
+        cursor_key=read.get("cursor_key"),
+        total_mode=read.get("total", "exact"),
+        total_ttl_s=float(read.get("total_ttl_s", 30)),
+        cursor_total_mode=read.get("cursor_total", "none"),
+        unknown_filters=read.get("unknown_filters", "error"),
+        cache_ttl_s=cache_ttl_s,
+        list_strategy=read.get("list_strategy", "serial"),
+
+        search_mode=read.get("search_mode", "ilike"),
+        search_config=read.get("search_config", "simple"),
+        search_source=read.get("search_source") or es_sink.get("source"),
+        search_index=read.get("search_index") or es_sink.get("index"),
+        search_hydrate=read.get("search_hydrate", "auto"),
+        search_indexed_fields=es_sink.get("fields"),
+
+        post_write_mode=post.get("mode", "inline"),
+        copy_threshold=int(write.get("copy_threshold", 5000)),
     )
+
+def referenced_tables(specs: Dict[str, EntitySpec], source: str) -> Set[str]:
+    """
+    Tables the entities stored in `source` read or write: storage tables, join tables
+    and the tables custom query builders declare (register_query(..., tables=[...])).
+    """
+    tables: Set[str] = set()
+    for spec in specs.values():
+        if spec.source != source:
+            continue
+        if spec.table:
+            tables.add(spec.table)
+        tables.update(j.table for j in spec.joins)
+        if spec.custom_query_id:
+            if spec.custom_query_id not in QUERY_TABLES:
+                raise ValueError(
+                    f"custom query {spec.custom_query_id} (entity {spec.name}) must declare "
+                    f"register_query(..., tables=[...]) for targeted reflection"
+                )
+            tables.update(QUERY_TABLES[spec.custom_query_id])
+    return tables
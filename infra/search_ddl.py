@@ -0,0 +1,135 @@
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+import argparse
+import importlib
+import os
+from typing import Dict, List, Tuple
+
+from entities.loader import load_entities
+from entities.spec import EntitySpec, parse_entity_spec
+from sources.crud.sql_search import TSV_COLUMN, tsvector_sql
+
+# Postgres DDL backing read.search_mode "trgm" / "tsvector" (see sources/crud/sql_search.py).
+#
+# usage: python infra/search_ddl.py [--tsvector generated|expression] [--apply]
+#
+#   trgm:     CREATE EXTENSION pg_trgm + a GIN (col gin_trgm_ops) index per search column
+#   tsvector: per table, a STORED generated search_tsv column + GIN index (default), or
+#             a GIN expression index on the identical to_tsvector() expression
+#
+# Writes clients/<client>/infra/search.sql; --apply also runs it against each entity's
+# storage source (CREATE INDEX CONCURRENTLY, so outside a transaction).
+
+def _read_root_env():
+    p = ROOT / ".env"
+    if not p.exists():
+        return
+    for line in p.read_text().splitlines():
+        line = line.strip()
+        if not line or line.startswith("#") or "=" not in line:
+            continue
+        k, v = line.split("=", 1)
+        os.environ.setdefault(k.strip(), v.strip())
+
+def search_columns(spec: EntitySpec) -> Dict[str, List[str]]:
+    # search_keys resolved to real {table: [column, ...]} through the join aliases
+    aliases = {spec.table: spec.table, **{j.alias: j.table for j in spec.joins}}
+    out: Dict[str, List[str]] = {}
+    for key in spec.search_keys:
+        src = spec.fields.get(key)
+        if src is None:
+            continue
+        left, col = src.split(".", 1)
+        table = aliases.get(left, left)
+        if col not in out.setdefault(table, []):
+            out[table].append(col)
+    return out
+
+def search_ddl(specs: Dict[str, EntitySpec], tsvector: str = "generated") -> Dict[str, List[str]]:
+    """
+    {source: [statement, ...]} for every entity with a trgm/tsvector search_mode.
+    """
+    stmts: Dict[str, List[str]] = {}
+    tsv_tables: Dict[Tuple[str, str], Tuple[str, List[str], str]] = {}  # (source, table) -> (entity, cols, config)
+
+    for spec in specs.values():
+        if spec.custom_query_id or spec.search_mode not in ("trgm", "tsvector"):
+            continue
+        out = stmts.setdefault(spec.source, [])
+        for table, cols in search_columns(spec).items():
+            if spec.search_mode == "trgm":
+                if "CREATE EXTENSION IF NOT EXISTS pg_trgm" not in out:
+                    out.insert(0, "CREATE EXTENSION IF NOT EXISTS pg_trgm")
+                for col in cols:
+                    s = f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_{table}_{col}_trgm ON {table} USING gin ({col} gin_trgm_ops)"
+                    if s not in out:
+                        out.append(s)
+                continue
+
+            # one tsvector per table: entities sharing a table must agree on its columns
+            seen = tsv_tables.get((spec.source, table))
+            if seen is not None:
+                if (seen[1], seen[2]) != (cols, spec.search_config):
+                    raise SystemExit(
+                        f"{spec.name} and {seen[0]} both search {table} with tsvector "
+                        f"but over different columns/config: {cols} vs {seen[1]}"
+                    )
+                continue
+            tsv_tables[(spec.source, table)] = (spec.name, cols, spec.search_config)
+
+            expr = tsvector_sql(cols, spec.search_config)
+            if tsvector == "generated":
+                out.append(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {TSV_COLUMN} tsvector GENERATED ALWAYS AS ({expr}) STORED")
+                out.append(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_{table}_{TSV_COLUMN} ON {table} USING gin ({TSV_COLUMN})")
+            else:
+                out.append(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_{table}_{TSV_COLUMN}_expr ON {table} USING gin (({expr}))")
+    return stmts
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Emit GIN indexes / generated columns for SQL search modes")
+    parser.add_argument("--tsvector", choices=["generated", "expression"], default="generated")
+    parser.add_argument("--apply", action="store_true", help="run the DDL against the entity sources")
+    args = parser.parse_args(argv)
+
+    _read_root_env()
+    client = os.getenv("CLIENT_NAME", "").strip()
+    if not client:
+        raise SystemExit("CLIENT_NAME missing. Put CLIENT_NAME=syskill in root .env")
+
+    entities = load_entities(str(ROOT / "clients" / client / "entities_config.json"))
+    specs = {name: parse_entity_spec(name, cfg) for name, cfg in entities.items()}
+    stmts = search_ddl(specs, tsvector=args.tsvector)
+    if not stmts:
+        print("No entities use search_mode trgm/tsvector; nothing to emit.")
+        return
+
+    out = ROOT / "clients" / client / "infra"
+    out.mkdir(parents=True, exist_ok=True)
+    sql = "".join(f"-- source: {src}\n" + "".join(f"{s};\n" for s in lines) + "\n" for src, lines in stmts.items())
+    (out / "search.sql").write_text(sql)
+    print(sql, end="")
+    print(f"✅ Generated: {out / 'search.sql'}")
+
+    if args.apply:
+        from sources.registry import SOURCE_REGISTRY
+
+        sources = getattr(importlib.import_module(f"clients.{client}.env"), "SOURCES")
+        for name, lines in stmts.items():
+            cfg = dict(sources[name], reflect=False, reflect_cache=False)
+            src = SOURCE_REGISTRY[cfg["kind"]](name=name, cfg=cfg)
+            src.connect()
+            try:
+                with src.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                    for s in lines:
+                        print(f"-> {name}: {s}")
+                        conn.exec_driver_sql(s)
+            finally:
+                src.close()
+        print("✅ Applied. Restart the app so reflection picks up new columns.")
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 class Sink(ABC):
     kind: str
@@ -18,3 +18,30 @@ class Sink(ABC):
 
     @abstractmethod
     def on_delete(self, entity: str, id_value: Any) -> None: ...
+
+    def on_bulk(self, entity: str, action: str, *, rows: Optional[List[Dict[str, Any]]] = None, ids: Optional[List[Any]] = None) -> None:
+        """
+        Whole batch from a bulk endpoint. Default: one on_* call per item, every item
+        attempted; raises once at the end if any failed. Sinks with a batch API override it.
+        """
+        errors: List[str] = []
+        for item in (ids if action == "delete" else rows) or []:
+            try:
+                if action == "create":
+                    self.on_create(entity, item)
+                elif action == "update":
+                    self.on_update(entity, item)
+                elif action == "delete":
+                    self.on_delete(entity, item)
+            except Exception as e:
+                errors.append(str(e))
+        if errors:
+            raise RuntimeError(f"{len(errors)} item(s) failed: {errors[:10]}")
+
+    # batching sinks buffer writes; flush() sends what is pending and returns
+    # per-item failures [{entity, id, error, ...}], close() flushes for shutdown
+    def flush(self) -> List[Dict[str, Any]]:
+        return []
+
+    def close(self) -> List[Dict[str, Any]]:
+        return self.flush()
@@ -0,0 +1,140 @@
+from __future__ import annotations
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+log = logging.getLogger(__name__)
+
+# Per-key write buffer shared by the batching sinks (es_index, bq_append, s3_put_json).
+# A key (index, table, partition...) is flushed when it reaches max_items or max_bytes
+# (synchronously, in the writer's thread) or when its oldest item is max_age_s old
+# (from a daemon flusher thread). flush_fn(key, items) returns a list of failures, one
+# {entity, id, error, ...} per undelivered item; if flush_fn raises, item_failure(key,
+# item, error) builds that record for each item of the batch.
+#
+# A write only sees failures of its own row, and only when its add() triggered the
+# flush. Anything else (background flushes, other rows' failures deferred by the writer)
+# is fire-and-forget for the request: logged, kept, and returned by the next flush() /
+# close(). The outbox worker drains them after every pass and retries those events;
+# inline (non-outbox) entities only see them at shutdown, in the logs.
+
+FlushFn = Callable[[str, List[Any]], List[Dict[str, Any]]]
+ItemFailureFn = Callable[[str, Any, str], Dict[str, Any]]
+
+class _Pending:
+    __slots__ = ("items", "nbytes", "since")
+
+    def __init__(self):
+        self.items: List[Any] = []
+        self.nbytes = 0
+        self.since = time.monotonic()
+
+class BatchBuffer:
+    def __init__(
+        self,
+        flush_fn: FlushFn,
+        item_failure: ItemFailureFn,
+        *,
+        max_items: int = 500,
+        max_bytes: int = 5_000_000,
+        max_age_s: float = 1.0,
+        name: str = "batch",
+    ):
+        self.flush_fn = flush_fn
+        self.item_failure = item_failure
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.max_age_s = max_age_s
+        self.name = name
+
+        self._pending: Dict[str, _Pending] = {}
+        self._lock = threading.Lock()
+        # one flush per key at a time, so batches for a key are sent in order
+        self._flush_locks: Dict[str, threading.Lock] = {}
+        self._late: deque = deque(maxlen=10000)
+        self._closed = False
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        if max_age_s > 0:
+            self._thread = threading.Thread(target=self._run, name=f"{name}-flusher", daemon=True)
+            self._thread.start()
+
+    def add(self, key: str, item: Any, nbytes: int = 0) -> List[Dict[str, Any]]:
+        """
+        Buffers item; returns failures if this add triggered a size-based flush.
+        """
+        with self._lock:
+            if self._closed:
+                raise RuntimeError(f"{self.name}: buffer is closed")
+            p = self._pending.get(key)
+            if p is None:
+                p = self._pending[key] = _Pending()
+            p.items.append(item)
+            p.nbytes += nbytes
+            full = len(p.items) >= self.max_items or p.nbytes >= self.max_bytes
+            batch = self._take(key) if full else None
+        if batch:
+            return self._flush_batch(key, batch)
+        return []
+
+    def defer(self, failures: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._late.extend(failures)
+
+    def pending(self) -> int:
+        with self._lock:
+            return sum(len(p.items) for p in self._pending.values())
+
+    def _take(self, key: str) -> List[Any]:
+        # caller holds self._lock
+        p = self._pending.pop(key, None)
+        return p.items if p else []
+
+    def _flush_batch(self, key: str, items: List[Any]) -> List[Dict[str, Any]]:
+        with self._lock:
+            flock = self._flush_locks.setdefault(key, threading.Lock())
+        with flock:
+            try:
+                return list(self.flush_fn(key, items) or [])
+            except Exception as e:
+                return [self.item_failure(key, item, str(e)) for item in items]
+
+    def flush(self, key: Optional[str] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            keys = [key] if key is not None else list(self._pending)
+            batches: List[Tuple[str, List[Any]]] = [(k, self._take(k)) for k in keys]
+        failures: List[Dict[str, Any]] = []
+        for k, items in batches:
+            if items:
+                failures.extend(self._flush_batch(k, items))
+        with self._lock:
+            failures = list(self._late) + failures
+            self._late.clear()
+        return failures
+
+    def _due(self) -> List[str]:
+        now = time.monotonic()
+        with self._lock:
+            return [k for k, p in self._pending.items() if now - p.since >= self.max_age_s]
+
+    def _run(self) -> None:
+        tick = min(self.max_age_s, 1.0) / 2
+        while not self._closed:
+            self._wake.wait(tick)
+            for key in self._due():
+                with self._lock:
+                    items = self._take(key)
+                failures = self._flush_batch(key, items) if items else []
+                if failures:
+                    log.warning("%s: %s failure(s) in background flush: %s", self.name, len(failures), failures[:10])
+                    self.defer(failures)
+
+    def close(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            self._closed = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        return self.flush()
@@ -1,12 +1,47 @@
 from __future__ import annotations
-from typing import Any, Dict
+import io
+import json
+from typing import Any, Dict, List, Optional
 from sinks.base import Sink
+from sinks.batching import BatchBuffer
 from sinks.registry import register_sink
 
 @register_sink("bq_append")
 class BigQueryAppendSink(Sink):
+    """
+    One insert_rows_json call per row by default. With "batch": {max_rows, max_bytes,
+    max_age_s} rows are buffered per table and streamed in one call per flush.
+
+    load_job_rows (default 5000, top level or under "batch") is for the bulk endpoint:
+    an on_bulk batch of that many rows or more goes through an NDJSON load job instead
+    (no streaming-insert cost, and no per-request quota for catch-up backlogs). A
+    buffered flush never holds more than max_rows, so it only takes the load-job path
+    when load_job_rows <= max_rows; an explicit batch.load_job_rows above max_rows
+    could never apply there and is rejected.
+    """
     kind = "bq_append"
 
+    def __init__(self, name: str, cfg: Dict[str, Any], manager):
+        super().__init__(name, cfg, manager)
+        self._buffer = None
+        batch = cfg.get("batch")
+        self.load_job_rows = int((batch or {}).get("load_job_rows", cfg.get("load_job_rows", 5000)))
+        if batch:
+            max_rows = int(batch.get("max_rows", 500))
+            if "load_job_rows" in batch and self.load_job_rows > max_rows:
+                raise ValueError(
+                    f"{name}: batch.load_job_rows ({self.load_job_rows}) > max_rows ({max_rows}): "
+                    "buffered flushes never reach it; set it at the top level for bulk-only load jobs"
+                )
+            self._buffer = BatchBuffer(
+                self._flush_rows,
+                lambda table, item, error: self._failure(item[0], item[1], error),
+                max_items=max_rows,
+                max_bytes=int(batch.get("max_bytes", 5_000_000)),
+                max_age_s=float(batch.get("max_age_s", 2.0)),
+                name=f"bq_append:{name}",
+            )
+
     def _client(self):
         bq_source = self.manager.get_source(self.cfg["source"])  # "analytics"
         return bq_source.client
@@ -14,7 +49,44 @@ class BigQueryAppendSink(Sink):
     def _table(self) -> str:
         return self.cfg["table"]  # dataset.table
 
+    def _failure(self, entity: str, row: Dict[str, Any], error: Any) -> Dict[str, Any]:
+        return {"sink": self.name, "entity": entity, "id": str(row.get(self.cfg.get("id_key", "id"))), "error": error}
+
+    def _flush_rows(self, table: str, items: List[Any]) -> List[Dict[str, Any]]:
+        rows = [row for _, row in items]
+        try:
+            if len(rows) >= self.load_job_rows:
+                self._load_job(table, rows)
+                return []
+            errors = self._client().insert_rows_json(table, rows)
+        except Exception as e:
+            return [self._failure(entity, row, str(e)) for entity, row in items]
+
+        # errors: [{"index": i, "errors": [...]}] -> originating rows
+        return [self._failure(items[e["index"]][0], items[e["index"]][1], e.get("errors")) for e in errors or []]
+
+    def _load_job(self, table: str, rows: List[Dict[str, Any]]) -> None:
+        from google.cloud import bigquery
+
+        body = "\n".join(json.dumps(r, default=str) for r in rows).encode("utf-8")
+        job_config = bigquery.LoadJobConfig(
+            source_format=bigquery.SourceFormat.NEWLINE_DELIMITED_JSON,
+            write_disposition=bigquery.WriteDisposition.WRITE_APPEND,
+        )
+        job = self._client().load_table_from_file(io.BytesIO(body), table, job_config=job_config)
+        job.result()  # raises on failure
+
     def on_create(self, entity: str, row: Dict[str, Any]) -> None:
+        if self._buffer is not None:
+            row = json.loads(json.dumps(row, default=str))
+            failures = self._buffer.add(self._table(), (entity, row), len(json.dumps(row)))
+            row_id = str(row.get(self.cfg.get("id_key", "id")))
+            mine = [f for f in failures if f["entity"] == entity and f["id"] == row_id]
+            self._buffer.defer([f for f in failures if f not in mine])
+            if mine:
+                raise RuntimeError(f"BigQuery insert errors: {mine}")
+            return
+
         bq = self._client()
         errors = bq.insert_rows_json(self._table(), [row])
         if errors:
@@ -27,3 +99,18 @@ class BigQueryAppendSink(Sink):
     def on_delete(self, entity: str, id_value: Any) -> None:
         # typically no-op
         pass
+
+    def on_bulk(self, entity: str, action: str, *, rows: Optional[List[Dict[str, Any]]] = None, ids: Optional[List[Any]] = None) -> None:
+        # bulk endpoint: one streaming insert (or load job past load_job_rows) for the batch
+        if action == "delete" or not rows:
+            return
+        items = [(entity, json.loads(json.dumps(r, default=str))) for r in rows]
+        failures = self._flush_rows(self._table(), items)
+        if failures:
+            raise RuntimeError(f"BigQuery insert errors: {len(failures)} row(s): {failures[:10]}")
+
+    def flush(self) -> List[Dict[str, Any]]:
+        return self._buffer.flush() if self._buffer is not None else []
+
+    def close(self) -> List[Dict[str, Any]]:
+        return self._buffer.close() if self._buffer is not None else []
@@ -1,18 +1,42 @@
 from __future__ import annotations
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 from sinks.base import Sink
 from sinks.registry import register_sink
 
 @register_sink("cache_set")
 class CacheSetSink(Sink):
+    """
+    Keeps the read-through entity cache (a "cache" source) in step with writes:
+    every write bumps the generation of the entity and of every entity joining its
+    table (stale list pages, counts and rows become unreachable), then created/updated
+    rows are written back for get_one when the entity reads a single table.
+    cfg: {"kind": "cache_set", "source": "cache_main", "ttl_s": 30, "populate": true}
+    """
     kind = "cache_set"
 
+    def _cache(self):
+        cache_source = self.manager.get_source(self.cfg["source"])  # "cache_main"
+        return cache_source.client
+
+    def _ttl(self) -> float:
+        return float(self.cfg.get("ttl_s", 30))
+
+    def _write(self, entity: str, action: str, rows: List[Dict[str, Any]]) -> None:
+        cache = self._cache()
+        cache.invalidate(entity, action)
+        if self.cfg.get("populate", True):
+            for row in rows:
+                cache.put_row(entity, row, self._ttl())
+
     def on_create(self, entity: str, row: Dict[str, Any]) -> None:
-        # plug redis/memcached later
-        return
+        self._write(entity, "create", [row])
 
     def on_update(self, entity: str, row: Dict[str, Any]) -> None:
-        return
+        self._write(entity, "update", [row])
 
     def on_delete(self, entity: str, id_value: Any) -> None:
-        return
+        self._write(entity, "delete", [])
+
+    def on_bulk(self, entity: str, action: str, *, rows: Optional[List[Dict[str, Any]]] = None, ids: Optional[List[Any]] = None) -> None:
+        # one generation bump for the whole batch
+        self._write(entity, action, [] if action == "delete" else rows or [])
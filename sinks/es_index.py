@@ -1,12 +1,34 @@
 from __future__ import annotations
-from typing import Any, Dict
+import json
+from typing import Any, Dict, List, Optional
 from sinks.base import Sink
+from sinks.batching import BatchBuffer
 from sinks.registry import register_sink
 
 @register_sink("es_index")
 class ElasticsearchIndexSink(Sink):
+    """
+    Per-document index/delete by default. With "batch": {max_actions, max_bytes,
+    max_age_s} operations are buffered per index and sent through the _bulk API;
+    per-item failures come back as {entity, id, action, status, error}.
+    "refresh" (false | true | "wait_for") is passed through in both modes.
+    """
     kind = "es_index"
 
+    def __init__(self, name: str, cfg: Dict[str, Any], manager):
+        super().__init__(name, cfg, manager)
+        self._buffer = None
+        batch = cfg.get("batch")
+        if batch:
+            self._buffer = BatchBuffer(
+                self._bulk,
+                lambda index, op, error: self._failure(index, op, None, error),
+                max_items=int(batch.get("max_actions", 500)),
+                max_bytes=int(batch.get("max_bytes", 5_000_000)),
+                max_age_s=float(batch.get("max_age_s", 1.0)),
+                name=f"es_index:{name}",
+            )
+
     def _client(self):
         source_name = self.cfg["source"]  # e.g. "search_main"
         es_source = self.manager.get_source(source_name)
@@ -23,17 +45,95 @@ class ElasticsearchIndexSink(Sink):
             return {k: row.get(k) for k in fields}
         return row
 
+    def _refresh_kwargs(self) -> Dict[str, Any]:
+        refresh = self.cfg.get("refresh")
+        return {} if refresh is None else {"refresh": refresh}
+
+    def _bulk(self, index: str, ops: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        operations: List[Dict[str, Any]] = []
+        for op in ops:
+            meta = {"_index": index, "_id": op["id"]}
+            if op["action"] == "delete":
+                operations.append({"delete": meta})
+            else:
+                operations.append({"index": meta})
+                operations.append(op["doc"])
+
+        failures: List[Dict[str, Any]] = []
+        try:
+            res = self._client().bulk(operations=operations, **self._refresh_kwargs())
+        except Exception as e:
+            # whole request failed: every op in it is undelivered
+            failures = [self._failure(index, op, None, str(e)) for op in ops]
+        else:
+            if res.get("errors"):
+                # response items are in request order: map them back to the originating rows
+                for op, item in zip(ops, res.get("items", [])):
+                    (action, result), = item.items()
+                    status = result.get("status", 0)
+                    if status < 300 or (action == "delete" and status == 404):
+                        continue
+                    failures.append(self._failure(index, op, status, result.get("error")))
+        return failures
+
+    def _failure(self, index: str, op: Dict[str, Any], status, error) -> Dict[str, Any]:
+        return {
+            "sink": self.name,
+            "entity": op["entity"],
+            "id": op["id"],
+            "action": op["action"],
+            "index": index,
+            "status": status,
+            "error": error,
+        }
+
+
+    def _enqueue(self, entity: str, op: Dict[str, Any]) -> None:
+        op["entity"] = entity
+        nbytes = len(json.dumps(op.get("doc"), default=str)) if "doc" in op else 64
+        failures = self._buffer.add(self._index_name(entity), op, nbytes)
+        mine = [f for f in failures if f["entity"] == entity and f["id"] == op["id"]]
+        self._buffer.defer([f for f in failures if f not in mine])
+        if mine:
+            raise RuntimeError(f"Elasticsearch bulk failure: {mine}")
+
     def on_create(self, entity: str, row: Dict[str, Any]) -> None:
-        es = self._client()
         idx = self._index_name(entity)
         doc_id_key = self.cfg.get("id_key", "id")
-        es.index(index=idx, id=str(row[doc_id_key]), document=self._doc(entity, row))
+        if self._buffer is not None:
+            self._enqueue(entity, {"action": "index", "id": str(row[doc_id_key]), "doc": self._doc(entity, row)})
+            return
+        es = self._client()
+        es.index(index=idx, id=str(row[doc_id_key]), document=self._doc(entity, row), **self._refresh_kwargs())
 
     def on_update(self, entity: str, row: Dict[str, Any]) -> None:
         # same as create => upsert
         self.on_create(entity, row)
 
     def on_delete(self, entity: str, id_value: Any) -> None:
+        if self._buffer is not None:
+            self._enqueue(entity, {"action": "delete", "id": str(id_value)})
+            return
         es = self._client()
         idx = self._index_name(entity)
-        es.delete(index=idx, id=str(id_value), ignore=[404])
+        es.delete(index=idx, id=str(id_value), ignore=[404], **self._refresh_kwargs())
+
+    def on_bulk(self, entity: str, action: str, *, rows: Optional[List[Dict[str, Any]]] = None, ids: Optional[List[Any]] = None) -> None:
+        # bulk endpoint: the batch goes straight to _bulk (in max_actions chunks), buffer or not
+        doc_id_key = self.cfg.get("id_key", "id")
+        if action == "delete":
+            ops = [{"entity": entity, "action": "delete", "id": str(i)} for i in ids or []]
+        else:
+            ops = [{"entity": entity, "action": "index", "id": str(r[doc_id_key]), "doc": self._doc(entity, r)} for r in rows or []]
+        chunk = int((self.cfg.get("batch") or {}).get("max_actions", 500))
+        failures: List[Dict[str, Any]] = []
+        for n in range(0, len(ops), chunk):
+            failures.extend(self._bulk(self._index_name(entity), ops[n:n + chunk]))
+        if failures:
+            raise RuntimeError(f"Elasticsearch bulk failure: {len(failures)} item(s): {failures[:10]}")
+
+    def flush(self) -> List[Dict[str, Any]]:
+        return self._buffer.flush() if self._buffer is not None else []
+
+    def close(self) -> List[Dict[str, Any]]:
+        return self._buffer.close() if self._buffer is not None else []
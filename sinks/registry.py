@@ -1,10 +1,21 @@
-from typing import Dict, Type
+from typing import Type
 from sinks.base import Sink
+from sources.plugins import LazyRegistry
 
-SINK_REGISTRY: Dict[str, Type[Sink]] = {}
+# sink modules are imported the first time a post_write config builds that kind
+SINK_REGISTRY: LazyRegistry[Type[Sink]] = LazyRegistry(
+    "sink",
+    {
+        "es_index": "sinks.es_index",
+        "s3_put_json": "sinks.s3_put_json",
+        "bq_append": "sinks.bq_append",
+        "cache_set": "sinks.cache_set",
+    },
+    entry_point_group="studio.sinks",
+)
 
 def register_sink(kind: str):
     def decorator(cls: Type[Sink]):
-        SINK_REGISTRY[kind] = cls
+        SINK_REGISTRY.register(kind, cls)
         return cls
     return decorator
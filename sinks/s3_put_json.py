@@ -1,13 +1,68 @@
 from __future__ import annotations
+import gzip
+import io
 import json
-from typing import Any, Dict
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, List
 from sinks.base import Sink
+from sinks.batching import BatchBuffer
 from sinks.registry import register_sink
 
+_EXT = {"gzip": ".ndjson.gz", "zstd": ".ndjson.zst", "none": ".ndjson"}
+_CONTENT_ENCODING = {"gzip": "gzip", "zstd": "zstd"}
+
 @register_sink("s3_put_json")
 class S3PutJsonSink(Sink):
+    """
+    One put_object per row (key_pattern) by default.
+
+    With "batch": {...} rows are appended to rolling NDJSON part files grouped by
+    entity + time partition ("partition", default "{entity}/dt={date}/hr={hour}"),
+    compressed ("compression": gzip | zstd | none), rolled over by max_rows /
+    max_bytes (uncompressed) / max_age_s and uploaded by a bounded pool of
+    "upload_workers" (multipart above "multipart_threshold" bytes). Each row gets
+    "_op" and "_ts"; deletes are written as {"_op": "delete", id_key: ...} tombstones.
+    Every part is recorded in a per-writer manifest under "<partition>/_manifest/"
+    so readers can find the parts without listing the partition.
+    """
     kind = "s3_put_json"
 
+    def __init__(self, name: str, cfg: Dict[str, Any], manager):
+        super().__init__(name, cfg, manager)
+        self._buffer = None
+        batch = cfg.get("batch")
+        if batch:
+            self.batch_cfg = batch
+            self.compression = batch.get("compression", "gzip")
+            if self.compression not in _EXT:
+                raise ValueError(f"{name}: unknown compression {self.compression}")
+            self.writer_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+            workers = int(batch.get("upload_workers", 4))
+            self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"s3-{name}")
+            # bounded: at most 2x workers parts compressed/in flight, writers wait beyond that
+            self._slots = threading.BoundedSemaphore(workers * 2)
+            self._inflight: List[Future] = []
+            self._inflight_lock = threading.Lock()
+            self._seq = 0
+            # partition -> parts written by this process (most recent partitions only)
+            self._manifests: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+            self._manifest_lock = threading.Lock()
+            self._buffer = BatchBuffer(
+                self._roll,
+                self._failure,
+                max_items=int(batch.get("max_rows", 50000)),
+                max_bytes=int(batch.get("max_bytes", 64 * 1024 * 1024)),
+                max_age_s=float(batch.get("max_age_s", 60)),
+                name=f"s3_put_json:{name}",
+            )
+
     def _client(self):
         s3_source = self.manager.get_source(self.cfg["source"])  # "files"
         return s3_source.client
@@ -20,7 +75,112 @@ class S3PutJsonSink(Sink):
         id_key = self.cfg.get("id_key", "id")
         return pattern.format(entity=entity, id=row.get(id_key))
 
+    # ---- batch mode ----
+
+    def _partition(self, entity: str, now: datetime) -> str:
+        pattern = self.batch_cfg.get("partition", "{entity}/dt={date}/hr={hour}")
+        return pattern.format(entity=entity, date=now.strftime("%Y-%m-%d"), hour=now.strftime("%H"))
+
+    def _append(self, entity: str, op: str, record: Dict[str, Any]) -> None:
+        now = datetime.now(timezone.utc)
+        record = {**record, "_op": op, "_ts": now.isoformat()}
+        line = json.dumps(record, default=str, separators=(",", ":")).encode("utf-8")
+        row_id = str(record.get(self.cfg.get("id_key", "id")))
+        # uploads report failures asynchronously (via defer), so add() itself returns none
+        self._buffer.add(self._partition(entity, now), (entity, row_id, line), len(line) + 1)
+
+    def _compress(self, body: bytes) -> bytes:
+        if self.compression == "gzip":
+            return gzip.compress(body, compresslevel=int(self.batch_cfg.get("level", 6)))
+        if self.compression == "zstd":
+            try:
+                import zstandard
+            except ImportError:
+                raise RuntimeError("compression=zstd requires the 'zstandard' package")
+            return zstandard.ZstdCompressor(level=int(self.batch_cfg.get("level", 3))).compress(body)
+        return body
+
+    def _roll(self, partition: str, items: List[Any]) -> List[Dict[str, Any]]:
+        # called by BatchBuffer with one full/aged partition: hand it to the upload pool
+        with self._manifest_lock:
+            self._seq += 1
+            seq = self._seq
+        prefix = self.batch_cfg.get("prefix", "")
+        part_key = f"{prefix}{partition}/part-{int(time.time())}-{self.writer_id}-{seq:06d}{_EXT[self.compression]}"
+
+        self._slots.acquire()
+        try:
+            fut = self._pool.submit(self._upload, partition, part_key, items)
+        except Exception:
+            self._slots.release()
+            raise
+        with self._inflight_lock:
+            self._inflight = [f for f in self._inflight if not f.done()]
+            self._inflight.append(fut)
+        return []
+
+    def _failure(self, key: str, item: Any, error: str) -> Dict[str, Any]:
+        entity, row_id, _ = item
+        return {"sink": self.name, "entity": entity, "id": row_id, "key": key, "error": error}
+
+    def _upload(self, partition: str, part_key: str, items: List[Any]) -> None:
+        try:
+            body = self._compress(b"\n".join(line for _, _, line in items) + b"\n")
+            self._put(part_key, body)
+            self._record_part(partition, {"key": part_key, "rows": len(items), "bytes": len(body)})
+        except Exception as e:
+            self._buffer.defer([self._failure(part_key, item, str(e)) for item in items])
+        finally:
+            self._slots.release()
+
+    def _put(self, key: str, body: bytes) -> None:
+        from boto3.s3.transfer import TransferConfig
+
+        extra = {"ContentType": "application/x-ndjson"}
+        if self.compression in _CONTENT_ENCODING:
+            extra["ContentEncoding"] = _CONTENT_ENCODING[self.compression]
+        config = TransferConfig(
+            multipart_threshold=int(self.batch_cfg.get("multipart_threshold", 16 * 1024 * 1024)),
+            multipart_chunksize=int(self.batch_cfg.get("multipart_chunksize", 16 * 1024 * 1024)),
+        )
+        self._client().upload_fileobj(io.BytesIO(body), self._bucket(), key, ExtraArgs=extra, Config=config)
+
+    def _record_part(self, partition: str, part: Dict[str, Any]) -> None:
+        # manifest is rewritten under the lock so concurrent uploads can't drop parts
+        with self._manifest_lock:
+            parts = self._manifests.setdefault(partition, [])
+            self._manifests.move_to_end(partition)
+            while len(self._manifests) > int(self.batch_cfg.get("manifest_partitions", 256)):
+                self._manifests.popitem(last=False)
+            parts.append({**part, "written_at": datetime.now(timezone.utc).isoformat()})
+            if not self.batch_cfg.get("manifest", True):
+                return
+            prefix = self.batch_cfg.get("prefix", "")
+            manifest = {
+                "partition": partition,
+                "writer": self.writer_id,
+                "compression": self.compression,
+                "parts": parts,
+            }
+            self._client().put_object(
+                Bucket=self._bucket(),
+                Key=f"{prefix}{partition}/_manifest/{self.writer_id}.json",
+                Body=json.dumps(manifest).encode("utf-8"),
+                ContentType="application/json",
+            )
+
+    def _wait_uploads(self) -> None:
+        with self._inflight_lock:
+            pending, self._inflight = self._inflight, []
+        for fut in pending:
+            fut.result()
+
+    # ---- Sink ----
+
     def on_create(self, entity: str, row: Dict[str, Any]) -> None:
+        if self._buffer is not None:
+            self._append(entity, "create", row)
+            return
         s3 = self._client()
         s3.put_object(
             Bucket=self._bucket(),
@@ -30,8 +190,29 @@ class S3PutJsonSink(Sink):
         )
 
     def on_update(self, entity: str, row: Dict[str, Any]) -> None:
+        if self._buffer is not None:
+            self._append(entity, "update", row)
+            return
         self.on_create(entity, row)
 
     def on_delete(self, entity: str, id_value: Any) -> None:
+        if self._buffer is not None:
+            self._append(entity, "delete", {self.cfg.get("id_key", "id"): id_value})
+            return
         # optional: delete object if you want
         pass
+
+    def flush(self) -> List[Dict[str, Any]]:
+        if self._buffer is None:
+            return []
+        failures = self._buffer.flush()
+        self._wait_uploads()
+        return failures + self._buffer.flush()
+
+    def close(self) -> List[Dict[str, Any]]:
+        if self._buffer is None:
+            return []
+        failures = self._buffer.close()
+        self._wait_uploads()
+        self._pool.shutdown(wait=True)
+        return failures + self._buffer.flush()
@@ -1,6 +1,7 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
 from typing import Any, Dict
+from anyio import to_thread
 
 class BaseSource(ABC):
     kind: str
@@ -18,5 +19,12 @@ class BaseSource(ABC):
     def close(self) -> None:
         pass
 
+    # async variants for the event loop; blocking SDKs are offloaded to a worker thread
+    async def ahealth(self) -> Dict[str, Any]:
+        return await to_thread.run_sync(self.health)
+
+    async def aclose(self) -> None:
+        await to_thread.run_sync(self.close)
+
     def get_handle(self) -> Any:
         raise NotImplementedError
@@ -0,0 +1,42 @@
+from typing import Any, Dict
+from sources.base import BaseSource
+from sources.registry import register_source
+from sources.crud.entity_cache import EntityCache, LocalTier, build_shared_tier
+
+@register_source("cache")
+class CacheSource(BaseSource):
+    """
+    Read-through entity cache (routing.cache_source). cfg:
+      max_entries / max_bytes  local LRU bounds
+      gen_ttl_s                how long a generation read from the shared tier is trusted
+      shared                   optional {"kind": "memory" | "redis", "url": ..., "ttl_s": ...}
+    """
+    kind = "cache"
+
+    def connect(self) -> None:
+        shared_cfg = self.cfg.get("shared") or {}
+        self.client = EntityCache(
+            local=LocalTier(
+                max_entries=int(self.cfg.get("max_entries", 10000)),
+                max_bytes=int(self.cfg.get("max_bytes", 64 * 1024 * 1024)),
+            ),
+            shared=build_shared_tier(shared_cfg),
+            prefix=self.cfg.get("prefix", "studio:"),
+            shared_ttl_s=shared_cfg.get("ttl_s"),
+            gen_ttl_s=float(self.cfg.get("gen_ttl_s", 1.0)),
+        )
+
+    def get_handle(self):
+        return self.client
+
+    def health(self) -> Dict[str, Any]:
+        try:
+            if self.client.shared is not None:
+                self.client.shared.ping()
+            return {"ok": True, "kind": self.kind, "name": self.name, "stats": self.client.stats()}
+        except Exception as e:
+            return {"ok": False, "kind": self.kind, "name": self.name, "error": str(e)}
+
+    def close(self) -> None:
+        if getattr(self, "client", None):
+            self.client.close()
@@ -1,8 +1,13 @@
 import os
-from typing import Any, Dict
+from pathlib import Path
+from typing import Any, Dict, Optional
 from sqlalchemy import create_engine, MetaData
+from sqlalchemy.ext.asyncio import create_async_engine
 from sources.base import BaseSource
 from sources.registry import register_source
+from sources.schema_cache import reflect_metadata
+
+ROOT = Path(__file__).resolve().parents[2]
 
 @register_source("postgres")
 class PostgresSource(BaseSource):
@@ -40,10 +45,27 @@ class PostgresSource(BaseSource):
         connect_cfg = self.cfg.get("connect", {})
         self.engine = create_engine(url, **connect_cfg)
 
-        # reflect metadata if you want out-of-box
+        # async mode: psycopg (v3) serves both; create_async_engine picks its async dialect
+        self.async_engine = None
+        if self.cfg.get("async", False):
+            self.async_engine = create_async_engine(url, **connect_cfg)
+
+        # reflect: true (whole schema) | "targeted" (only reflect_tables, filled in from the
+        # entity config by app.config) | false
+        reflect = self.cfg.get("reflect", True)
         self.meta = MetaData()
-        if self.cfg.get("reflect", True):
-            self.meta.reflect(bind=self.engine)
+        if reflect:
+            only = sorted(self.cfg.get("reflect_tables") or []) if reflect == "targeted" else None
+            self.meta = reflect_metadata(self.engine, only=only, cache_path=self._schema_cache_path(reflect))
+
+    def _schema_cache_path(self, reflect) -> Optional[str]:
+        # reflect_cache: true | false | "path"; on by default for targeted reflection
+        cache = self.cfg.get("reflect_cache", reflect == "targeted")
+        if not cache:
+            return None
+        if isinstance(cache, str):
+            return cache
+        return str(ROOT / ".cache" / "schema" / f"{self.name}.pickle")
 
     def get_handle(self):
         return self.engine
@@ -56,6 +78,21 @@ class PostgresSource(BaseSource):
         except Exception as e:
             return {"ok": False, "kind": self.kind, "name": self.name, "error": str(e)}
 
+    async def ahealth(self) -> Dict[str, Any]:
+        if getattr(self, "async_engine", None) is None:
+            return await super().ahealth()
+        try:
+            async with self.async_engine.connect() as c:
+                await c.exec_driver_sql("select 1")
+            return {"ok": True, "kind": self.kind, "name": self.name}
+        except Exception as e:
+            return {"ok": False, "kind": self.kind, "name": self.name, "error": str(e)}
+
     def close(self) -> None:
         if getattr(self, "engine", None):
             self.engine.dispose()
+
+    async def aclose(self) -> None:
+        if getattr(self, "async_engine", None) is not None:
+            await self.async_engine.dispose()
+        await super().aclose()
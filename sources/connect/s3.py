@@ -30,7 +30,11 @@ class S3Source(BaseSource):
 
     def health(self) -> Dict[str, Any]:
         try:
-            self.client.list_buckets()
+            # one bucket HEAD is much cheaper than listing every bucket in the account
+            if self.cfg.get("health_bucket"):
+                self.client.head_bucket(Bucket=self.cfg["health_bucket"])
+            else:
+                self.client.list_buckets()
             return {"ok": True, "kind": self.kind, "name": self.name}
         except Exception as e:
             return {"ok": False, "kind": self.kind, "name": self.name, "error": str(e)}
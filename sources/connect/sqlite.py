@@ -0,0 +1,56 @@
+from typing import Any, Dict
+from sqlalchemy import create_engine, MetaData
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+from sources.base import BaseSource
+from sources.registry import register_source
+from sources.schema_cache import reflect_metadata
+
+# Local stand-in for a postgres source (bench/, local experiments):
+#   {"kind": "sqlite", "path": "bench.db" | ":memory:", "reflect": true | "targeted" | false,
+#    "async": false (needs aiosqlite), "connect": {...create_engine kwargs}}
+# ":memory:" shares one connection (StaticPool) so every checkout sees the same data.
+
+@register_source("sqlite")
+class SqliteSource(BaseSource):
+    kind = "sqlite"
+
+    def connect(self) -> None:
+        path = self.cfg.get("path", ":memory:")
+        connect_cfg = dict(self.cfg.get("connect", {}))
+        if path == ":memory:":
+            connect_cfg.setdefault("poolclass", StaticPool)
+        # the sync backend runs on the threadpool
+        connect_cfg.setdefault("connect_args", {"check_same_thread": False})
+
+        self.engine = create_engine(f"sqlite:///{path}", **connect_cfg)
+
+        self.async_engine = None
+        if self.cfg.get("async", False):
+            self.async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", **connect_cfg)
+
+        reflect = self.cfg.get("reflect", True)
+        self.meta = MetaData()
+        if reflect:
+            only = sorted(self.cfg.get("reflect_tables") or []) if reflect == "targeted" else None
+            self.meta = reflect_metadata(self.engine, only=only)
+
+    def get_handle(self):
+        return self.engine
+
+    def health(self) -> Dict[str, Any]:
+        try:
+            with self.engine.connect() as c:
+                c.exec_driver_sql("select 1")
+            return {"ok": True, "kind": self.kind, "name": self.name}
+        except Exception as e:
+            return {"ok": False, "kind": self.kind, "name": self.name, "error": str(e)}
+
+    def close(self) -> None:
+        if getattr(self, "engine", None):
+            self.engine.dispose()
+
+    async def aclose(self) -> None:
+        if getattr(self, "async_engine", None) is not None:
+            await self.async_engine.dispose()
+        await super().aclose()
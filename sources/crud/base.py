@@ -16,5 +16,22 @@ class CrudBackend(ABC):
     def delete(self, entity: str, id_value: Any) -> Dict[str, Any]: ...
 
     @abstractmethod
-    def list(self, entity: str, *, page: int, size: int, q: Optional[str]=None, filters: Optional[Dict[str, Any]]=None) -> Dict[str, Any]:
-        """return { items: [...], total: N }"""
+    def list(self, entity: str, *, page: int, size: int, q: Optional[str]=None, filters: Optional[Dict[str, Any]]=None, cursor: Optional[str]=None, total: Optional[str]=None) -> Dict[str, Any]:
+        """return { items: [...], total: N } (+ next_cursor when cursor is given)"""
+
+class AsyncCrudBackend(ABC):
+    # same contract as CrudBackend, awaited from async handlers
+    @abstractmethod
+    async def create(self, entity: str, data: Dict[str, Any]) -> Dict[str, Any]: ...
+
+    @abstractmethod
+    async def get_one(self, entity: str, id_value: Any) -> Optional[Dict[str, Any]]: ...
+
+    @abstractmethod
+    async def update(self, entity: str, id_value: Any, data: Dict[str, Any]) -> Dict[str, Any]: ...
+
+    @abstractmethod
+    async def delete(self, entity: str, id_value: Any) -> Dict[str, Any]: ...
+
+    @abstractmethod
+    async def list(self, entity: str, *, page: int, size: int, q: Optional[str]=None, filters: Optional[Dict[str, Any]]=None, cursor: Optional[str]=None, total: Optional[str]=None) -> Dict[str, Any]: ...
@@ -0,0 +1,43 @@
+from __future__ import annotations
+import json
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+# Memoized exact counts for total="cached".
+# Keyed by (entity, fingerprint of q/filters); entries expire after their TTL and are
+# dropped per entity when a write touches one of the tables the entity reads.
+
+def count_fingerprint(q: Optional[str], filters: Optional[Dict[str, Any]]) -> str:
+    return json.dumps([q or "", sorted((filters or {}).items())], default=str, separators=(",", ":"))
+
+class CountCache:
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: Dict[Tuple[str, str], Tuple[float, int]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, entity: str, fingerprint: str) -> Optional[int]:
+        key = (entity, fingerprint)
+        with self._lock:
+            hit = self._entries.get(key)
+            if hit is None:
+                return None
+            expires_at, value = hit
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            return value
+
+    def set(self, entity: str, fingerprint: str, value: int, ttl_s: float) -> None:
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                # drop the oldest insert
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[(entity, fingerprint)] = (time.monotonic() + ttl_s, value)
+
+    def invalidate(self, entities: Iterable[str]) -> None:
+        names = set(entities)
+        with self._lock:
+            for key in [k for k in self._entries if k[0] in names]:
+                del self._entries[key]
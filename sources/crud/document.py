@@ -1,5 +1,20 @@
 from __future__ import annotations
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Union
+
+from sources.crud.sql_filters import split_key
+
+def _filter_term(key: str, value: Any) -> Dict[str, Any]:
+    field, op = split_key(key)
+    if op == "in":
+        return {"terms": {field: list(value)}}
+    if op in ("gte", "gt", "lte", "lt"):
+        return {"range": {field: {op: value}}}
+    if op == "prefix":
+        return {"prefix": {field: value}}
+    if op == "isnull":
+        exists = {"exists": {"field": field}}
+        return {"bool": {"must_not": [exists]}} if value else exists
+    return {"term": {field: value}}
 
 class DocumentCrud:
     def __init__(self, es_client):
@@ -11,15 +26,30 @@ class DocumentCrud:
     def delete(self, index: str, id_value: Any) -> Dict[str, Any]:
         return self.es.delete(index=index, id=str(id_value), ignore=[404])
 
-    def search(self, index: str, *, q: str, page: int, size: int, filters: Optional[Dict[str, Any]]=None) -> Dict[str, Any]:
+    def search(
+        self,
+        index: str,
+        *,
+        q: str,
+        page: int,
+        size: int,
+        filters: Optional[Dict[str, Any]]=None,
+        fields: Optional[List[str]]=None,
+        source: Union[bool, List[str]]=True,
+        track_total_hits: Union[bool, int]=True,
+    ) -> Dict[str, Any]:
+        """
+        Relevance-ordered page. Returns {items (_source), ids (_id), total};
+        total is None when track_total_hits is False.
+        """
         filters = filters or {}
 
         must = []
         if q:
-            must.append({"multi_match": {"query": q, "fields": ["*"]}})
+            must.append({"multi_match": {"query": q, "fields": fields or ["*"]}})
 
-        # simple term filters
-        filter_terms = [{"term": {k: v}} for k, v in filters.items()]
+        # sql_filters keys: field (term) or field__op
+        filter_terms = [_filter_term(k, v) for k, v in filters.items()]
 
         body = {
             "query": {
@@ -29,11 +59,14 @@ class DocumentCrud:
                 }
             },
             "from": (page - 1) * size,
-            "size": size
+            "size": size,
+            "_source": source,
+            "track_total_hits": track_total_hits,
         }
 
         res = self.es.search(index=index, body=body)
         hits = res.get("hits", {})
         total = hits.get("total", {}).get("value", 0) if isinstance(hits.get("total"), dict) else hits.get("total", 0)
         items = [h.get("_source", {}) for h in hits.get("hits", [])]
-        return {"items": items, "total": int(total)}
+        ids = [h.get("_id") for h in hits.get("hits", [])]
+        return {"items": items, "ids": ids, "total": None if track_total_hits is False else int(total or 0)}
@@ -0,0 +1,352 @@
+from __future__ import annotations
+import hashlib
+import json
+import logging
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+
+log = logging.getLogger(__name__)
+
+# Read-through cache for SqlRowCrud.get_one / list (entities with read.cache).
+#
+# Two tiers: a bounded in-process LRU+TTL tier, and an optional shared tier (redis, or
+# the in-memory stand-in "memory" for tests/single process). Values are stored
+# pickled, so cached rows can't be mutated by callers and their size is known.
+#
+# Invalidation is by generation: every key embeds the entity's generation number, and a
+# write bumps the generation of every entity that reads the written table (an entity
+# joining vendors is bumped by a vendors write). Old entries become unreachable and age
+# out through TTL/LRU. A reader captures the generation before it queries, so a row read
+# concurrently with a write is stored under the old generation and never served.
+# A read routed to a lagging replica can still return the pre-write row after the bump,
+# so SqlRowCrud keeps replica-sourced entries no longer than the router's max_lag_s.
+# With a shared tier the generations live there too (memoized locally for gen_ttl_s),
+# so a write in one process (e.g. the outbox worker) reaches every API process.
+
+def list_fingerprint(params: Dict[str, Any]) -> str:
+    # normalized list parameters: empty q/filters collapse, key order doesn't matter
+    norm = {k: v for k, v in params.items() if v not in (None, "", {}, [])}
+    raw = json.dumps(norm, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+class LocalTier:
+    """
+    In-process LRU with per-entry TTL, bounded by entry count and stored bytes.
+    """
+
+    def __init__(self, max_entries: int = 10000, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            hit = self._entries.get(key)
+            if hit is None:
+                return None
+            expires_at, blob = hit
+            if expires_at < time.monotonic():
+                self._drop(key)
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return blob
+
+    def set(self, key: str, blob: bytes, ttl_s: float) -> None:
+        if len(blob) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + ttl_s, blob)
+            self._bytes += len(blob)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+
+    def _drop(self, key: str) -> None:
+        # caller holds self._lock
+        _, blob = self._entries.pop(key)
+        self._bytes -= len(blob)
+
+    def size(self) -> Tuple[int, int]:
+        with self._lock:
+            return len(self._entries), self._bytes
+
+class MemoryTier:
+    """
+    Shared-tier stand-in: same interface as RedisTier, process-local. Lets tests and
+    single-process deployments exercise the two-tier path without a redis server.
+    """
+    remote = False
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[Optional[float], Any]] = {}
+        self._lock = threading.Lock()
+
+    def _live(self, key: str) -> Any:
+        # caller holds self._lock
+        hit = self._data.get(key)
+        if hit is None:
+            return None
+        expires_at, value = hit
+        if expires_at is not None and expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            return self._live(key)
+
+    def set(self, key: str, blob: bytes, ttl_s: float) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl_s, blob)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def get_int(self, key: str) -> int:
+        with self._lock:
+            return int(self._live(key) or 0)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            n = int(self._live(key) or 0) + 1
+            self._data[key] = (None, n)
+            return n
+
+    def ping(self) -> bool:
+        return True
+
+    def close(self) -> None:
+        pass
+
+class RedisTier:
+    remote = True
+
+    def __init__(self, url: str, *, socket_timeout: float = 0.25):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("shared cache kind=redis requires the 'redis' package")
+        self.client = redis.Redis.from_url(url, socket_timeout=socket_timeout, socket_connect_timeout=socket_timeout)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(key)
+
+    def set(self, key: str, blob: bytes, ttl_s: float) -> None:
+        self.client.set(key, blob, px=max(1, int(ttl_s * 1000)))
+
+    def delete(self, key: str) -> None:
+        self.client.delete(key)
+
+    def get_int(self, key: str) -> int:
+        return int(self.client.get(key) or 0)
+
+    def incr(self, key: str) -> int:
+        return int(self.client.incr(key))
+
+    def ping(self) -> bool:
+        return bool(self.client.ping())
+
+    def close(self) -> None:
+        self.client.close()
+
+def build_shared_tier(cfg: Optional[Dict[str, Any]]):
+    if not cfg:
+        return None
+    kind = cfg.get("kind", "memory")
+    if kind == "memory":
+        return MemoryTier()
+    if kind == "redis":
+        return RedisTier(cfg["url"], socket_timeout=float(cfg.get("socket_timeout", 0.25)))
+    raise ValueError(f"Unknown shared cache kind: {kind}")
+
+class EntityCache:
+    def __init__(
+        self,
+        *,
+        local: LocalTier,
+        shared=None,
+        prefix: str = "studio:",
+        shared_ttl_s: Optional[float] = None,
+        gen_ttl_s: float = 1.0,
+    ):
+        self.local = local
+        self.shared = shared
+        self.prefix = prefix
+        self.shared_ttl_s = shared_ttl_s  # default: the entity's TTL
+        self.gen_ttl_s = gen_ttl_s
+
+        self._gens: Dict[str, Tuple[float, int]] = {}
+        self._lock = threading.Lock()
+        self._readers: Dict[str, Set[str]] = {}    # table -> entities reading it
+        self._tables: Dict[str, str] = {}          # entity -> base table
+        self._projections: Dict[str, Tuple[str, Dict[str, str]]] = {}  # entity -> (pk key, {field key: base column})
+        self._stats = {"hits_local": 0, "hits_shared": 0, "misses": 0, "sets": 0, "invalidations": 0, "errors": 0}
+
+    @property
+    def remote(self) -> bool:
+        # true when a lookup may block on the network (async callers offload it)
+        return bool(getattr(self.shared, "remote", False))
+
+    def configure(self, plans: Dict[str, Any]) -> None:
+        """
+        plans: entity -> engine.query_planner.EntityPlan. Records which tables each
+        entity reads (for invalidation) and, for single-table entities, how a written
+        row maps onto the get_one shape (so writes can populate the cache).
+        """
+        readers: Dict[str, Set[str]] = {}
+        tables: Dict[str, str] = {}
+        projections: Dict[str, Tuple[str, Dict[str, str]]] = {}
+        for name, plan in plans.items():
+            for t in plan.tables:
+                readers.setdefault(t, set()).add(name)
+            if plan.spec.table:
+                tables[name] = plan.spec.table
+            if not plan.custom and all(getattr(c, "table", None) is plan.table for c in plan.columns.values()):
+                projections[name] = (plan.pk_key, {k: c.name for k, c in plan.columns.items()})
+        with self._lock:
+            self._readers, self._tables, self._projections = readers, tables, projections
+
+    # ---- keys ----
+
+    def _count(self, stat: str) -> None:
+        with self._lock:
+            self._stats[stat] += 1
+
+    def gen(self, entity: str) -> int:
+        now = time.monotonic()
+        with self._lock:
+            hit = self._gens.get(entity)
+            if hit is not None and (self.shared is None or hit[0] > now):
+                return hit[1]
+        if self.shared is None:
+            return 0
+        try:
+            n = self.shared.get_int(f"{self.prefix}gen:{entity}")
+        except Exception as e:
+            # shared tier down: use a throwaway generation so nothing cached is served
+            log.warning("cache generation lookup failed for %s: %s", entity, e)
+            self._count("errors")
+            return -int(time.time() * 1000)
+        with self._lock:
+            self._gens[entity] = (now + self.gen_ttl_s, n)
+        return n
+
+    def get_key(self, entity: str, id_value: Any) -> str:
+        return f"{self.prefix}{entity}:g{self.gen(entity)}:one:{id_value}"
+
+    def list_key(self, entity: str, params: Dict[str, Any]) -> str:
+        return f"{self.prefix}{entity}:g{self.gen(entity)}:list:{list_fingerprint(params)}"
+
+    # ---- read / write ----
+
+    def get(self, key: str, ttl_s: Optional[float] = None) -> Optional[Any]:
+        # ttl_s: how long a shared-tier hit may live in the local tier
+        blob = self.local.get(key)
+        if blob is not None:
+            self._count("hits_local")
+            return pickle.loads(blob)
+        if self.shared is not None:
+            try:
+                blob = self.shared.get(key)
+            except Exception as e:
+                log.warning("shared cache get failed: %s", e)
+                self._count("errors")
+                blob = None
+            if blob is not None:
+                self._count("hits_shared")
+                # re-warm the local tier (keys are per generation, so this can't outlive a write)
+                self.local.set(key, blob, ttl_s or self.gen_ttl_s)
+                return pickle.loads(blob)
+        self._count("misses")
+        return None
+
+    def set(self, key: str, value: Any, ttl_s: float) -> None:
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        self.local.set(key, blob, ttl_s)
+        if self.shared is not None:
+            try:
+                self.shared.set(key, blob, self.shared_ttl_s or ttl_s)
+            except Exception as e:
+                log.warning("shared cache set failed: %s", e)
+                self._count("errors")
+        self._count("sets")
+
+    def invalidate(self, entity: str, action: str = "") -> None:
+        # PostWritePipeline listener signature; bumps entity + every entity joining its table
+        table = self._tables.get(entity)
+        names = set(self._readers.get(table, ())) if table else set()
+        names.add(entity)
+        for name in names:
+            self._bump(name)
+        self._count("invalidations")
+
+    def _bump(self, entity: str) -> None:
+        if self.shared is None:
+            with self._lock:
+                _, n = self._gens.get(entity, (0.0, 0))
+                self._gens[entity] = (0.0, n + 1)
+            return
+        try:
+            n = self.shared.incr(f"{self.prefix}gen:{entity}")
+        except Exception as e:
+            log.warning("cache invalidation failed for %s: %s", entity, e)
+            self._count("errors")
+            with self._lock:
+                self._gens.pop(entity, None)
+            return
+        with self._lock:
+            self._gens[entity] = (time.monotonic() + self.gen_ttl_s, n)
+
+    def put_row(self, entity: str, row: Dict[str, Any], ttl_s: float) -> bool:
+        """
+        Populates get_one for a written row when the entity reads a single table
+        (the row then has the exact get_one shape). Returns False when it can't.
+        """
+        hit = self._projections.get(entity)
+        if hit is None:
+            return False
+        pk_key, proj = hit
+        if pk_key not in proj or any(col not in row for col in proj.values()):
+            return False
+        id_value = row[proj[pk_key]]
+        if id_value is None:
+            return False
+        self.set(self.get_key(entity, id_value), {k: row[col] for k, col in proj.items()}, ttl_s)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        entries, nbytes = self.local.size()
+        with self._lock:
+            out: Dict[str, Any] = dict(self._stats)
+        hits = out["hits_local"] + out["hits_shared"]
+        out.update({
+            "hits": hits,
+            "hit_ratio": round(hits / (hits + out["misses"]), 4) if hits + out["misses"] else None,
+            "evictions": self.local.evictions,
+            "expirations": self.local.expirations,
+            "local_entries": entries,
+            "local_bytes": nbytes,
+            "shared": type(self.shared).__name__ if self.shared is not None else None,
+        })
+        return out
+
+    def close(self) -> None:
+        if self.shared is not None:
+            self.shared.close()
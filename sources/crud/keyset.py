@@ -0,0 +1,52 @@
+from __future__ import annotations
+import base64
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, List, Sequence
+from uuid import UUID
+
+# Opaque keyset cursors: urlsafe base64 of a JSON list of the last row's (sort_key, pk).
+# Values keep their type so the seek predicate binds the same type as the column.
+
+def _enc(v: Any) -> Any:
+    if isinstance(v, Decimal):
+        return {"$d": str(v)}
+    if isinstance(v, datetime):
+        return {"$dt": v.isoformat()}
+    if isinstance(v, date):
+        return {"$date": v.isoformat()}
+    if isinstance(v, time):
+        return {"$t": v.isoformat()}
+    if isinstance(v, UUID):
+        return {"$u": str(v)}
+    return v
+
+def _dec(v: Any) -> Any:
+    if isinstance(v, dict) and len(v) == 1:
+        (tag, raw), = v.items()
+        if tag == "$d":
+            return Decimal(raw)
+        if tag == "$dt":
+            return datetime.fromisoformat(raw)
+        if tag == "$date":
+            return date.fromisoformat(raw)
+        if tag == "$t":
+            return time.fromisoformat(raw)
+        if tag == "$u":
+            return UUID(raw)
+    return v
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps([_enc(v) for v in values], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+def decode_cursor(token: str) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw)
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+    return [_dec(v) for v in values]
@@ -0,0 +1,94 @@
+from __future__ import annotations
+import uuid
+from typing import Any, Dict, List, Sequence
+from sqlalchemy import Table, BigInteger, Column, MetaData, insert, select, update, delete, values, column, cast, any_, bindparam
+from sqlalchemy.dialects.postgresql import ARRAY
+
+# Set-based statements for SqlRowCrud's bulk ops. Each helper runs one statement for
+# a homogeneous group of rows (same keys) on the caller's connection/transaction.
+
+def is_psycopg_pg(conn) -> bool:
+    # COPY needs the raw (sync) psycopg 3 connection; async engines use multi-row INSERT
+    d = conn.dialect
+    return d.name == "postgresql" and d.driver == "psycopg" and not d.is_async
+
+def row_columns(base: Table) -> List[Any]:
+    # what writes return: generated columns (e.g. search_tsv) are derived, not entity data
+    return [c for c in base.c if c.computed is None]
+
+def insert_many(conn, base: Table, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # multi-row INSERT ... RETURNING ("insertmanyvalues"), rows back in parameter order
+    if not rows[0]:
+        # no writable keys: DEFAULT VALUES one by one
+        return [dict(conn.execute(insert(base).returning(*row_columns(base))).mappings().one()) for _ in rows]
+    stmt = insert(base).returning(*row_columns(base), sort_by_parameter_order=True)
+    return [dict(r) for r in conn.execute(stmt, rows).mappings().all()]
+
+def copy_insert(conn, base: Table, keys: Sequence[str], rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    COPY into an ON COMMIT DROP temp table, then INSERT ... SELECT ... RETURNING.
+    postgres + psycopg (v3) only; rows come back in input order via an ordinal column.
+    """
+    tmp_name = f"_bulk_{uuid.uuid4().hex[:12]}"
+    tmp = Table(
+        tmp_name, MetaData(),
+        Column("_ord", BigInteger),
+        *[Column(k, base.c[k].type) for k in keys],
+        prefixes=["TEMPORARY"],
+        postgresql_on_commit="DROP",
+    )
+    tmp.create(conn)
+
+    prep = conn.dialect.identifier_preparer
+    col_list = ", ".join(prep.quote(c) for c in ["_ord", *keys])
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        with cursor.copy(f"COPY {prep.quote(tmp_name)} ({col_list}) FROM STDIN") as cp:
+            for i, row in enumerate(rows):
+                cp.write_row([i, *[row[k] for k in keys]])
+    finally:
+        cursor.close()
+
+    # insertion follows the ORDER BY, and RETURNING follows insertion
+    stmt = (
+        insert(base)
+        .from_select(list(keys), select(*[tmp.c[k] for k in keys]).order_by(tmp.c._ord))
+        .returning(*row_columns(base))
+    )
+    return [dict(r) for r in conn.execute(stmt).mappings().all()]
+
+def update_from_values(conn, base: Table, pk: str, keys: Sequence[str], rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    postgres: UPDATE base SET k = v.k FROM (VALUES ...) AS v(pk, k...) WHERE base.pk = v.pk RETURNING base.*
+    other dialects: one UPDATE ... RETURNING per row.
+    """
+    if conn.dialect.name != "postgresql":
+        out = []
+        for row in rows:
+            stmt = update(base).where(base.c[pk] == row[pk]).values({k: row[k] for k in keys}).returning(*row_columns(base))
+            r = conn.execute(stmt).mappings().first()
+            if r:
+                out.append(dict(r))
+        return out
+
+    # VALUES columns are untyped on the wire: cast them to the target column types
+    v = values(*[column(c) for c in [pk, *keys]], name="v").data([tuple(row[c] for c in [pk, *keys]) for row in rows])
+    stmt = (
+        update(base)
+        .where(base.c[pk] == cast(v.c[pk], base.c[pk].type))
+        .values({k: cast(v.c[k], base.c[k].type) for k in keys})
+        .returning(*row_columns(base))
+    )
+    return [dict(r) for r in conn.execute(stmt).mappings().all()]
+
+def delete_many(conn, base: Table, pk: str, ids: List[Any]) -> List[Any]:
+    # postgres: pk = ANY(:ids) keeps one SQL text for every batch size
+    pk_col = base.c[pk]
+    if conn.dialect.name == "postgresql":
+        cond = pk_col == any_(bindparam("ids", type_=ARRAY(pk_col.type)))
+        params = {"ids": ids}
+    else:
+        cond = pk_col.in_(bindparam("ids", expanding=True))
+        params = {"ids": ids}
+    res = conn.execute(delete(base).where(cond).returning(pk_col), params)
+    return [r[0] for r in res.all()]
@@ -1,182 +1,756 @@
 from __future__ import annotations
-from typing import Any, Dict, Optional, List, Tuple
-from sqlalchemy import Table, select, insert, update, delete, func, or_
+import contextvars
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import select, insert, update, delete, func, tuple_, text, any_, bindparam
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.sql import Select
 
 from sources.crud.base import CrudBackend
 from entities.spec import EntitySpec
+from engine.query_planner import EntityPlan, compile_entity_plans
+from sources.crud.keyset import encode_cursor, decode_cursor
+from sources.crud.count_cache import CountCache, count_fingerprint
+from sources.crud import sql_bulk, sql_filters, sql_search
 from sources.queries.registry import QUERY_REGISTRY
+from engine.metrics import METRICS
+
+TOTAL_MODES = ("exact", "estimated", "cached", "none")
+LIST_STRATEGIES = ("serial", "window", "cte", "concurrent")
+COUNT_WORKERS = 8
+PROJECTION_CACHE_SIZE = 1024
+# extra columns the window/cte strategies add to the page query (stripped from the rows)
+_TOTAL_COL = "_list_total"
+_RANK_COL = "_list_rank"
+_PK_COL = "_list_pk"
 
 class SqlRowCrud(CrudBackend):
-    def __init__(self, engine, meta, entity_specs: Dict[str, EntitySpec]):
+    def __init__(self, engine, meta, entity_specs: Dict[str, EntitySpec], plans: Optional[Dict[str, EntityPlan]] = None, outbox=None, cache=None, read_router=None, search_clients=None, default_search_source: Optional[str] = None):
         self.engine = engine
         self.meta = meta
         self.entity_specs = entity_specs
+        self.outbox = outbox  # engine.outbox.Outbox, for post_write.mode == "outbox"
+        # compiled once; reused by every request
+        self.plans = plans if plans is not None else compile_entity_plans(entity_specs, meta)
+        self.count_cache = CountCache()
+        # sources.crud.entity_cache.EntityCache: read-through get_one/list for read.cache entities
+        self.cache = cache
+        if cache is not None:
+            cache.configure(self.plans)
+        # sources.routing.ReadRouter: get_one/list/export on replicas, writes on self.engine
+        self.read_router = read_router
+        # read.search_mode == "es": source name -> DocumentCrud (routing.search_source by default)
+        self.search_clients = search_clients or {}
+        self.default_search_source = default_search_source
+        # read.list_strategy == "concurrent": count queries run here, created on first use
+        self._count_executor: Optional[ThreadPoolExecutor] = None
+        self._count_lock = threading.Lock()
+        # (entity, fields, used keys) -> (select, count) from EntityPlan.projection: one
+        # statement per shape, so SQLAlchemy's compiled cache keeps hitting
+        self._projections: "OrderedDict[Tuple[Any, ...], Tuple[Select, Select]]" = OrderedDict()
+        self._projection_lock = threading.Lock()
 
     def _spec(self, entity: str) -> EntitySpec:
         if entity not in self.entity_specs:
             raise ValueError(f"Unknown entity: {entity}")
         return self.entity_specs[entity]
 
-    def _table(self, table_name: str) -> Table:
-        return Table(table_name, self.meta)
-
-    def _parse_col(self, token: str):
-        # token = "alias_or_table.col"
-        left, col = token.split(".", 1)
-        # meta reflects tables by real table names, not aliases
-        # For alias, we create alias() from base Table in query builder
-        return left, col
-
-    def _build_select_default(self, spec: EntitySpec, *, q: Optional[str], filters: Optional[Dict[str, Any]]) -> Tuple[Select, Select]:
-        base = self._table(spec.table)
-        from_clause = base
-
-        # build aliases
-        alias_map = {spec.table: base}
-        for j in spec.joins:
-            jt = self._table(j.table).alias(j.alias)
-            alias_map[j.alias] = jt
-            # join condition
-            l_tbl, l_col = self._parse_col(j.on_left)
-            r_tbl, r_col = self._parse_col(j.on_right)
-            left_expr = (alias_map.get(l_tbl) or self._table(l_tbl)).c[l_col]
-            right_expr = (alias_map.get(r_tbl) or self._table(r_tbl)).c[r_col]
-
-            if j.type == "left":
-                from_clause = from_clause.outerjoin(jt, left_expr == right_expr)
-            else:
-                from_clause = from_clause.join(jt, left_expr == right_expr)
-
-        # select columns
-        cols = []
-        for out_key, src in spec.fields.items():
-            tbl, col = self._parse_col(src)
-            t = alias_map.get(tbl) or self._table(tbl)
-            cols.append(t.c[col].label(out_key))
-
-        stmt = select(*cols).select_from(from_clause)
-        count_stmt = select(func.count()).select_from(from_clause)
-
+    def _read_engine(self):
+        if self.read_router is not None:
+            engine = self.read_router.pick()
+            if engine is not None:
+                return engine
+        return self.engine
+
+    def _replica_ttl(self, ttl_s: float, from_replica: bool) -> Optional[float]:
+        # A replica read may predate the write that bumped the cache generation, and would
+        # then be stored under the new one: keep it no longer than the router's lag budget
+        # (replicas further behind are evicted), and don't cache it when there is none.
+        if not from_replica:
+            return ttl_s
+        lag = self.read_router.max_lag_s if self.read_router is not None else None
+        return min(ttl_s, lag) if lag else None
+
+    def _plan(self, entity: str) -> EntityPlan:
+        if entity not in self.plans:
+            raise ValueError(f"Unknown entity: {entity}")
+        return self.plans[entity]
+
+    def _parse_filters(self, plan: EntityPlan, filters: Optional[Dict[str, Any]], dialect: str = "") -> Optional[sql_filters.FilterSet]:
+        return sql_filters.parse_filters(plan.columns, filters, dialect, ignore_unknown=plan.spec.unknown_filters == "ignore")
+
+    def _projection(self, plan: EntityPlan, fields: Tuple[str, ...], used: Any = ()) -> Tuple[Select, Select]:
+        key = (plan.spec.name, tuple(fields), frozenset(used))
+        with self._projection_lock:
+            hit = self._projections.get(key)
+            if hit is not None:
+                self._projections.move_to_end(key)
+                return hit
+        out = plan.projection(fields, used)
+        with self._projection_lock:
+            out = self._projections.setdefault(key, out)
+            while len(self._projections) > PROJECTION_CACHE_SIZE:
+                self._projections.popitem(last=False)
+        return out
+
+    def _fields(self, plan: EntityPlan, fields: Optional[List[str]]) -> Optional[Tuple[str, ...]]:
+        # fields= projection: read field keys, in request order
+        if fields is None:
+            return None
+        fields = tuple(dict.fromkeys(fields))
+        unknown = [k for k in fields if k not in plan.columns]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        if not fields:
+            raise ValueError("fields must name at least one field")
+        return fields
+
+    def _build_select_default(self, plan: EntityPlan, *, q: Optional[str], filters: Optional[Dict[str, Any]], fields: Optional[Tuple[str, ...]] = None) -> Tuple[Select, Select]:
         where_clauses = []
-        filters = filters or {}
-        # filters only on configured fields keys (safe)
-        for k, v in filters.items():
-            if k in spec.fields:
-                tbl, col = self._parse_col(spec.fields[k])
-                t = alias_map.get(tbl) or self._table(tbl)
-                where_clauses.append(t.c[col] == v)
-
-        # q search across configured search_keys
-        if q and spec.search_keys:
-            like = f"%{q}%"
-            ors = []
-            for key in spec.search_keys:
-                if key in spec.fields:
-                    tbl, col = self._parse_col(spec.fields[key])
-                    t = alias_map.get(tbl) or self._table(tbl)
-                    ors.append(t.c[col].ilike(like))
-            if ors:
-                where_clauses.append(or_(*ors))
-
-        for w in where_clauses:
-            stmt = stmt.where(w)
-            count_stmt = count_stmt.where(w)
+        used: List[str] = []
+        # filters only on configured fields keys (safe), typed and bound (see sql_filters)
+        dialect = self.engine.dialect.name
+        filters = self._parse_filters(plan, filters, dialect)
+        for clause, k in sql_filters.filter_clauses(plan.columns, filters, dialect):
+            where_clauses.append(clause)
+            used.append(k)
+
+        # q search across configured search_keys (read.search_mode, see sql_search)
+        if q and plan.search_columns:
+            where, _ = sql_search.search_clause(plan, q, self.engine.dialect.name)
+            where_clauses.append(where)
+            used.extend(k for k in plan.spec.search_keys if k in plan.columns)
+
+        # only the joins the projection, filters and search read (the count: filters and search)
+        stmt, count_stmt = self._projection(plan, fields or tuple(plan.columns), used)
+
+        if where_clauses:
+            stmt = stmt.where(*where_clauses)
+            count_stmt = count_stmt.where(*where_clauses)
 
         return stmt, count_stmt
 
-    def create(self, entity: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    def _build_select_custom(self, plan: EntityPlan, *, q: Optional[str], filters: Optional[Dict[str, Any]], fields: Optional[Tuple[str, ...]] = None) -> Tuple[Select, Select]:
+        filters = self._parse_filters(plan, filters, self.engine.dialect.name)
+        if not q and not filters:
+            # precompiled: subquery + count over it
+            if fields:
+                return self._projection(plan, fields)
+            return plan.list_stmt, plan.count_stmt
+
+        # builders get the typed FilterSet; filters.clauses(columns) compiles it
+        builder = QUERY_REGISTRY[plan.spec.custom_query_id]
+        subq = builder(self.meta, filters, q, None).subquery()
+        stmt = select(*[subq.c[k] for k in fields]) if fields else select(subq)
+        return stmt, select(func.count()).select_from(subq)
+
+    def _keyset_keys(self, plan: EntityPlan) -> Tuple[str, ...]:
+        return (plan.cursor_key,) if plan.cursor_key == plan.pk_key else (plan.cursor_key, plan.pk_key)
+
+    def _keyset(self, plan: EntityPlan, stmt: Select, cursor: str, columns: Optional[Any] = None) -> Tuple[Select, Tuple[str, ...]]:
+        # ORDER BY (sort_key, pk) and seek past the cursor row instead of OFFSET.
+        # Rows with a NULL sort key never satisfy the seek; use a NOT NULL cursor_key.
+        keys = self._keyset_keys(plan)
+        if columns is not None:
+            cols = [columns[k] for k in keys]
+        elif plan.custom:
+            cols = [stmt.selected_columns[k] for k in keys]
+        else:
+            cols = [plan.columns[k] for k in keys]
+
+        if cursor:
+            values = decode_cursor(cursor)
+            if len(values) != len(cols):
+                raise ValueError("Invalid cursor")
+            if len(cols) == 1:
+                stmt = stmt.where(cols[0] > values[0])
+            else:
+                stmt = stmt.where(tuple_(*cols) > tuple_(*values))
+
+        return stmt.order_by(*cols), keys
+
+    def _total_mode(self, plan: EntityPlan, total: Optional[str], cursor: Optional[str] = None) -> str:
+        mode = total or (plan.spec.cursor_total_mode if cursor is not None else plan.spec.total_mode)
+        if mode not in TOTAL_MODES:
+            raise ValueError(f"Unknown total mode: {mode}")
+        return mode
+
+    def _estimate(self, conn, plan: EntityPlan, stmt: Select, filtered: bool) -> Optional[int]:
+        # planner estimates are postgres-only; other dialects fall back to an exact count
+        if conn.dialect.name != "postgresql":
+            return None
+
+        # unfiltered + only LEFT joins: the row count is the base table's reltuples
+        # (-1 until the table has been analyzed)
+        if not filtered and not plan.custom and all(j.type == "left" for j in plan.spec.joins):
+            n = conn.execute(
+                text("select reltuples::bigint from pg_class where oid = to_regclass(:t)"),
+                {"t": plan.table.fullname},
+            ).scalar()
+            if n is not None and n >= 0:
+                return int(n)
+
+        compiled = stmt.compile(dialect=conn.dialect, compile_kwargs={"render_postcompile": True})
+        res = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled.string}", compiled.params).scalar()
+        if isinstance(res, str):
+            res = json.loads(res)
+        return int(res[0]["Plan"]["Plan Rows"])
+
+    def _total(self, conn, plan: EntityPlan, mode: str, stmt: Select, count_stmt: Select, *, q: Optional[str], filters: Optional[Dict[str, Any]]) -> Optional[int]:
+        if mode == "none":
+            return None
+
+        if mode == "estimated":
+            est = self._estimate(conn, plan, stmt, filtered=bool(q or filters))
+            if est is not None:
+                return est
+            return int(conn.execute(count_stmt).scalar_one())
+
+        if mode == "cached":
+            fp = count_fingerprint(q, filters)
+            total = self.count_cache.get(plan.spec.name, fp)
+            if total is None:
+                total = int(conn.execute(count_stmt).scalar_one())
+                self.count_cache.set(plan.spec.name, fp, total, plan.spec.total_ttl_s)
+            return total
+
+        return int(conn.execute(count_stmt).scalar_one())
+
+    def invalidate_counts(self, entity: str, action: str = "") -> None:
+        # PostWritePipeline listener: a write to entity's table stales every entity reading it
+        spec = self.entity_specs.get(entity)
+        if not spec or not spec.table:
+            return
+        self.count_cache.invalidate(name for name, p in self.plans.items() if spec.table in p.tables)
+
+    def _cache_key(self, entity: str, *, id_value: Any = None, params: Optional[Dict[str, Any]] = None) -> Optional[Tuple[str, float]]:
+        # (key, ttl) when the entity reads through self.cache, else None
+        if self.cache is None:
+            return None
+        spec = self._spec(entity)
+        if spec.cache_ttl_s is None:
+            return None
+        if params is None:
+            return self.cache.get_key(entity, id_value), spec.cache_ttl_s
+        params = dict(params, total=self._total_mode(self._plan(entity), params.get("total"), params.get("cursor")))
+        if params.get("cursor") is not None:
+            params.pop("page", None)
+        return self.cache.list_key(entity, params), spec.cache_ttl_s
+
+    # ---- search source (read.search_mode == "es") ----
+    # q goes to the index the entity's es_index sink maintains; the page of matching ids
+    # is then hydrated from SQL in one pk = ANY(:ids) query, or taken from _source when
+    # the sink indexes every read field. Keyset (cursor) pages keep the SQL path.
+
+    def _source_hydratable(self, plan: EntityPlan) -> bool:
+        # the es_index sink indexes the written base-table row ({column name: value}):
+        # _source only has a read field that is a base column under its own name and in
+        # the sink's fields (joined/expression fields would come back null)
+        indexed = plan.spec.search_indexed_fields
+        if not indexed:
+            return False
+        return all(
+            k in indexed and getattr(c, "table", None) is plan.table and c.name == k
+            for k, c in plan.columns.items()
+        )
+
+    def _search_route(self, plan: EntityPlan, q: Optional[str], cursor: Optional[str]) -> bool:
+        return bool(q) and plan.spec.search_mode == "es" and cursor is None and not plan.custom
+
+    def _es_search(self, plan: EntityPlan, *, page: int, size: int, q: str, filters: Optional[Dict[str, Any]], mode: str) -> Dict[str, Any]:
+        spec = plan.spec
+        source = spec.search_source or self.default_search_source
+        client = self.search_clients.get(source) if source else None
+        if client is None:
+            raise ValueError(f"search_mode=es needs a search source for entity: {spec.name}")
+
+        hydrate = spec.search_hydrate
+        if hydrate == "auto":
+            hydrate = "source" if self._source_hydratable(plan) else "sql"
+
+        # exact: real count; none: no count (size+1 probe); estimated/cached: ES's capped count
+        track = {"exact": True, "none": False}.get(mode, 10000)
+        res = client.search(
+            spec.search_index or f"{spec.name}_index",
+            q=q,
+            page=page,
+            size=size + 1 if mode == "none" else size,
+            filters=self._parse_filters(plan, filters),
+            fields=spec.search_keys or None,
+            source=list(plan.columns) if hydrate == "source" else False,
+            track_total_hits=track,
+        )
+        res["hydrate"] = hydrate
+        if hydrate == "source":
+            res["items"] = [{k: doc.get(k) for k in plan.columns} for doc in res["items"]]
+        return res
+
+    def _hydrate(self, conn, plan: EntityPlan, ids: List[Any]) -> List[Dict[str, Any]]:
+        # one query for the page, returned in relevance order (ids missing from SQL are skipped)
+        if not ids:
+            return []
+        pk_col = plan.columns[plan.pk_key]
+        if conn.dialect.name == "postgresql":
+            cond = pk_col == any_(bindparam("ids", type_=ARRAY(pk_col.type)))
+        else:
+            cond = pk_col.in_(bindparam("ids", expanding=True))
+        rows = conn.execute(plan.select_stmt.where(cond), {"ids": list(ids)}).mappings().all()
+        with METRICS.stage("rows_to_dict"):
+            by_id = {str(r[plan.pk_key]): dict(r) for r in rows}
+        return [by_id[i] for i in map(str, ids) if i in by_id]
+
+    def _es_page(self, plan: EntityPlan, mode: str, size: int, res: Dict[str, Any], columnar: bool = False, fields: Optional[Tuple[str, ...]] = None) -> Dict[str, Any]:
+        items = res["items"]
+        out: Dict[str, Any] = {"items": items, "total": res["total"]}
+        labels = list(fields or plan.columns)
+        if columnar:
+            items = out["items"] = [tuple(r.get(k) for k in labels) for r in items]
+            out["columns"] = labels
+        elif fields:
+            items = out["items"] = [{k: r.get(k) for k in labels} for r in items]
+        if mode != "exact":
+            out["total_mode"] = mode
+        if mode == "none":
+            out["has_more"] = len(res["ids"]) > size
+            del items[size:]
+        return out
+
+    # ---- connection-level operations ----
+    # Each op runs on a caller-provided connection so the same logic serves the sync
+    # engine here and AsyncSqlRowCrud (via AsyncConnection.run_sync).
+
+    def _writable(self, entity: str) -> EntitySpec:
         spec = self._spec(entity)
         if spec.write_mode != "default":
             raise ValueError(f"Write disabled or custom for entity: {entity}")
+        if self.read_router is not None:
+            # every write op starts here: pin this client's next reads to the primary
+            self.read_router.note_write()
+        return spec
+
+    def _enqueue(self, conn, spec: EntitySpec, action: str, *, row: Optional[Dict[str, Any]] = None, id_value: Any = None) -> None:
+        # same transaction as the write: the sink event commits (or not) with it
+        if self.outbox is not None and spec.post_write_mode == "outbox":
+            self.outbox.enqueue(conn, spec.name, action, row=row, id_value=id_value, pk=spec.pk)
+
+    def _create(self, conn, entity: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        spec = self._writable(entity)
+        base = self._plan(entity).table
+        payload = {k: v for k, v in data.items() if k in spec.allowed_write_keys}
+        stmt = insert(base).values(**payload).returning(*sql_bulk.row_columns(base))
+
+        row = dict(conn.execute(stmt).mappings().first())
+        self._enqueue(conn, spec, "create", row=row)
+        return row
 
-        base = self._table(spec.table)
+    def _get_one(self, conn, entity: str, id_value: Any) -> Optional[Dict[str, Any]]:
+        plan = self._plan(entity)
+        row = conn.execute(plan.get_one_stmt, {"id_value": id_value}).mappings().first()
+        with METRICS.stage("rows_to_dict"):
+            return dict(row) if row else None
+
+    def _update(self, conn, entity: str, id_value: Any, data: Dict[str, Any]) -> Dict[str, Any]:
+        spec = self._writable(entity)
+        base = self._plan(entity).table
         payload = {k: v for k, v in data.items() if k in spec.allowed_write_keys}
-        stmt = insert(base).values(**payload).returning(base)
+        stmt = update(base).where(base.c[spec.pk] == id_value).values(**payload).returning(*sql_bulk.row_columns(base))
 
-        with self.engine.begin() as conn:
-            row = conn.execute(stmt).mappings().first()
-        return dict(row)
+        row = conn.execute(stmt).mappings().first()
+        if not row:
+            raise ValueError(f"{entity} not found id={id_value}")
+        row = dict(row)
+        self._enqueue(conn, spec, "update", row=row)
+        return row
 
-    def get_one(self, entity: str, id_value: Any) -> Optional[Dict[str, Any]]:
-        spec = self._spec(entity)
+    def _delete(self, conn, entity: str, id_value: Any) -> Dict[str, Any]:
+        spec = self._writable(entity)
+        base = self._plan(entity).table
+        stmt = delete(base).where(base.c[spec.pk] == id_value)
 
-        # custom query read
-        if spec.custom_query_id:
-            builder = QUERY_REGISTRY.get(spec.custom_query_id)
-            if not builder:
-                raise ValueError(f"Unknown custom_query_id: {spec.custom_query_id}")
-            stmt = builder(self.meta, None, None, None)
-            # we expect "id" in selected columns
-            stmt = stmt.where(stmt.selected_columns["id"] == id_value)  # type: ignore
-            with self.engine.connect() as conn:
-                row = conn.execute(stmt).mappings().first()
-            return dict(row) if row else None
+        res = conn.execute(stmt)
+        if res.rowcount:
+            self._enqueue(conn, spec, "delete", id_value=id_value)
+        return {"ok": True, "deleted": res.rowcount}
 
-        # default: build from fields/joins and filter by id key if present
-        if spec.pk not in spec.fields and "id" in spec.fields:
-            pk_key = "id"
+    # ---- bulk operations ----
+    # One set-based statement per group of items sharing the same keys, inside a
+    # savepoint. If the statement fails the group is retried row by row (one savepoint
+    # each) so the response can say which items failed; the rest still commit.
+    # Results are per item, in request order: {index, ok, row | id | error}.
+
+    def _apply_group(self, conn, indexes: List[int], run_all: Callable[[], List[Dict[str, Any]]], run_one: Callable[[int], Dict[str, Any]], results: List[Any]) -> None:
+        try:
+            with conn.begin_nested():
+                out = run_all()
+        except Exception:
+            out = None
+        if out is not None:
+            for i, r in zip(indexes, out):
+                results[i] = r
+            return
+        for i in indexes:
+            try:
+                with conn.begin_nested():
+                    results[i] = run_one(i)
+            except Exception as e:
+                results[i] = {"index": i, "ok": False, "error": str(e)}
+
+    def _bulk_result(self, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        ok = sum(1 for r in results if r["ok"])
+        return {"items": results, "succeeded": ok, "failed": len(results) - ok}
+
+    def _bulk_create(self, conn, entity: str, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        spec = self._writable(entity)
+        base = self._plan(entity).table
+        results: List[Any] = [None] * len(items)
+        payloads: Dict[int, Dict[str, Any]] = {}
+        groups: Dict[Tuple[str, ...], List[int]] = {}
+        for i, data in enumerate(items):
+            if not isinstance(data, dict):
+                results[i] = {"index": i, "ok": False, "error": "item must be an object"}
+                continue
+            payloads[i] = {k: v for k, v in data.items() if k in spec.allowed_write_keys}
+            groups.setdefault(tuple(sorted(payloads[i])), []).append(i)
+
+        for keys, indexes in groups.items():
+            rows = [payloads[i] for i in indexes]
+
+            def run_all(keys=keys, indexes=indexes, rows=rows):
+                if keys and len(rows) >= spec.copy_threshold and sql_bulk.is_psycopg_pg(conn):
+                    out = sql_bulk.copy_insert(conn, base, keys, rows)
+                else:
+                    out = sql_bulk.insert_many(conn, base, rows)
+                return [{"index": i, "ok": True, "row": r} for i, r in zip(indexes, out)]
+
+            def run_one(i):
+                row = dict(conn.execute(insert(base).values(**payloads[i]).returning(*sql_bulk.row_columns(base))).mappings().one())
+                return {"index": i, "ok": True, "row": row}
+
+            self._apply_group(conn, indexes, run_all, run_one, results)
+
+        if self.outbox is not None and spec.post_write_mode == "outbox":
+            self.outbox.enqueue_many(conn, spec.name, "create", rows=[r["row"] for r in results if r["ok"]], pk=spec.pk)
+        return self._bulk_result(results)
+
+    def _bulk_update(self, conn, entity: str, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        # each item carries its pk plus the fields to set
+        spec = self._writable(entity)
+        base = self._plan(entity).table
+        pk = spec.pk
+        results: List[Any] = [None] * len(items)
+        payloads: Dict[int, Dict[str, Any]] = {}
+        groups: Dict[Tuple[str, ...], List[int]] = {}
+        seen = set()
+        for i, data in enumerate(items):
+            if not isinstance(data, dict) or data.get(pk) is None:
+                results[i] = {"index": i, "ok": False, "error": f"item must be an object with '{pk}'"}
+                continue
+            if str(data[pk]) in seen:
+                results[i] = {"index": i, "ok": False, "error": f"duplicate {pk} in batch: {data[pk]}"}
+                continue
+            seen.add(str(data[pk]))
+            payload = {k: v for k, v in data.items() if k in spec.allowed_write_keys and k != pk}
+            if not payload:
+                results[i] = {"index": i, "ok": False, "error": "no writable fields"}
+                continue
+            payloads[i] = {pk: data[pk], **payload}
+            groups.setdefault(tuple(sorted(payload)), []).append(i)
+
+        def found(i: int, row: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+            if row is None:
+                return {"index": i, "ok": False, "error": f"{entity} not found id={payloads[i][pk]}"}
+            return {"index": i, "ok": True, "row": row}
+
+        for keys, indexes in groups.items():
+            def run_all(keys=keys, indexes=indexes):
+                out = sql_bulk.update_from_values(conn, base, pk, keys, [payloads[i] for i in indexes])
+                by_id = {str(r[pk]): r for r in out}
+                return [found(i, by_id.get(str(payloads[i][pk]))) for i in indexes]
+
+            def run_one(i, keys=keys):
+                stmt = update(base).where(base.c[pk] == payloads[i][pk]).values({k: payloads[i][k] for k in keys}).returning(*sql_bulk.row_columns(base))
+                row = conn.execute(stmt).mappings().first()
+                return found(i, dict(row) if row else None)
+
+            self._apply_group(conn, indexes, run_all, run_one, results)
+
+        if self.outbox is not None and spec.post_write_mode == "outbox":
+            self.outbox.enqueue_many(conn, spec.name, "update", rows=[r["row"] for r in results if r["ok"]], pk=pk)
+        return self._bulk_result(results)
+
+    def _bulk_delete(self, conn, entity: str, ids: List[Any]) -> Dict[str, Any]:
+        spec = self._writable(entity)
+        base = self._plan(entity).table
+        results: List[Any] = [None] * len(ids)
+        indexes = list(range(len(ids)))
+
+        def gone(i: int, deleted: bool) -> Dict[str, Any]:
+            if not deleted:
+                return {"index": i, "ok": False, "id": ids[i], "error": f"{entity} not found id={ids[i]}"}
+            return {"index": i, "ok": True, "id": ids[i]}
+
+        def run_all():
+            deleted = {str(v) for v in sql_bulk.delete_many(conn, base, spec.pk, ids)}
+            return [gone(i, str(ids[i]) in deleted) for i in indexes]
+
+        def run_one(i):
+            res = conn.execute(delete(base).where(base.c[spec.pk] == ids[i]))
+            return gone(i, bool(res.rowcount))
+
+        if ids:
+            self._apply_group(conn, indexes, run_all, run_one, results)
+
+        if self.outbox is not None and spec.post_write_mode == "outbox":
+            self.outbox.enqueue_many(conn, spec.name, "delete", ids=[r["id"] for r in results if r["ok"]])
+        return self._bulk_result(results)
+
+    def _list_strategy(self, plan: EntityPlan, mode: str) -> str:
+        # strategies only change how an exact total is fetched
+        strategy = plan.spec.list_strategy
+        if strategy not in LIST_STRATEGIES:
+            raise ValueError(f"Unknown list strategy: {strategy}")
+        return strategy if mode == "exact" else "serial"
+
+    def _count_stmt(self, plan: EntityPlan, *, q: Optional[str], filters: Optional[Dict[str, Any]]) -> Select:
+        build = self._build_select_custom if plan.custom else self._build_select_default
+        return build(plan, q=q, filters=filters)[1]
+
+    def _count_pool(self) -> ThreadPoolExecutor:
+        if self._count_executor is None:
+            with self._count_lock:
+                if self._count_executor is None:
+                    self._count_executor = ThreadPoolExecutor(max_workers=COUNT_WORKERS, thread_name_prefix="list-count")
+        return self._count_executor
+
+    def _count_on(self, engine, count_stmt: Select) -> int:
+        with engine.connect() as conn:
+            return int(conn.execute(count_stmt).scalar_one())
+
+    def _list(self, conn, entity: str, *, page: int, size: int, q: Optional[str]=None, filters: Optional[Dict[str, Any]]=None, cursor: Optional[str]=None, total: Optional[str]=None, columnar: bool = False, fields: Optional[List[str]] = None, run_count: bool = True) -> Dict[str, Any]:
+        """
+        One page on conn. read.list_strategy picks how an exact total comes with it:
+          serial     count, then the page (two statements)
+          window     count(*) OVER () on the page query (one statement; keyset pages: serial)
+          cte        WITH list_base AS MATERIALIZED (filtered query): the page and
+                     (SELECT count(*) FROM list_base) in one statement, so the filtered
+                     query (e.g. a custom GROUP BY) is evaluated once
+          concurrent count on a second pooled connection while the page runs: list()
+                     passes run_count=False and fills in total itself
+        A single-statement page that comes back empty past the first page still needs
+        the count query (no row carries the total).
+        """
+        plan = self._plan(entity)
+        mode = self._total_mode(plan, total, cursor)
+        strategy = self._list_strategy(plan, mode)
+        dialect = conn.dialect.name
+        fields = self._fields(plan, fields)
+        if fields and cursor is not None:
+            # next_cursor is read off the last row: keyset pages always carry their sort keys
+            fields += tuple(k for k in self._keyset_keys(plan) if k not in fields)
+
+        if plan.custom:
+            stmt, count_stmt = self._build_select_custom(plan, q=q, filters=filters, fields=fields)
+        else:
+            stmt, count_stmt = self._build_select_default(plan, q=q, filters=filters, fields=fields)
+        filtered_stmt = stmt
+
+        rank, columns = None, None
+        if cursor is None and q and not plan.custom and plan.search_columns:
+            _, rank = sql_search.search_clause(plan, q, dialect)
+
+        if strategy == "window" and cursor is not None:
+            strategy = "serial"
+        if strategy == "window":
+            stmt = stmt.add_columns(func.count().over().label(_TOTAL_COL))
+        elif strategy == "cte":
+            stmt, columns, rank = self._cte_page(plan, stmt, rank, dialect)
+
+        # size+1 tells us has_more without a count
+        probe = cursor is not None or mode == "none"
+        keys: Tuple[str, ...] = ()
+        if cursor is not None:
+            stmt, keys = self._keyset(plan, stmt, cursor, columns)
         else:
-            pk_key = spec.pk
+            if rank is not None:
+                # best matches first; pk breaks ties so OFFSET pages stay stable
+                pk_col = columns[_PK_COL] if strategy == "cte" else plan.columns[plan.pk_key]
+                stmt = stmt.order_by(rank.desc(), pk_col)
+            stmt = stmt.offset((page - 1) * size)
+        stmt = stmt.limit(size + 1 if probe else size)
+
+        n = None
+        if strategy == "serial" and run_count:
+            n = self._total(conn, plan, mode, filtered_stmt, count_stmt, q=q, filters=filters)
+        result = conn.execute(stmt)
+        labels = tuple(result.keys())
+        rows = result.all()
+        if strategy in ("window", "cte"):
+            # the total rides on every row as the last column
+            labels = labels[:-1]
+            if rows:
+                n = int(rows[0][-1])
+                rows = [r[:-1] for r in rows]
+            elif cursor or (cursor is None and page > 1):
+                n = int(conn.execute(count_stmt).scalar_one())
+            else:
+                n = 0
+        if columnar:
+            # columns/arrow responses: the driver's tuples as they are
+            items: List[Any] = [tuple(r) for r in rows]
+        else:
+            # plain tuples zipped with the labels: no RowMapping per row
+            with METRICS.stage("rows_to_dict"):
+                items = [dict(zip(labels, r)) for r in rows]
+
+        out: Dict[str, Any] = {"items": items, "total": n}
+        if columnar:
+            out["columns"] = list(labels)
+        if mode != "exact":
+            out["total_mode"] = mode
+        if probe:
+            has_more = len(items) > size
+            del items[size:]
+            if mode == "none":
+                out["has_more"] = has_more
+            if cursor is not None:
+                out["next_cursor"] = None
+                if has_more:
+                    last = dict(zip(labels, items[-1])) if columnar else items[-1]
+                    out["next_cursor"] = encode_cursor([last[k] for k in keys])
+        return out
+
+    def _cte_page(self, plan: EntityPlan, stmt: Select, rank: Any, dialect: str) -> Tuple[Select, Any, Any]:
+        # (page select over the CTE + total column, the CTE's columns, rank over the CTE)
+        hidden = []
+        if rank is not None:
+            # the ORDER BY can only reach the CTE's columns: carry rank and pk through it
+            hidden = [rank.label(_RANK_COL), plan.columns[plan.pk_key].label(_PK_COL)]
+        cte = stmt.add_columns(*hidden).cte("list_base")
+        if dialect in ("postgresql", "sqlite"):
+            # postgres 12+ would otherwise inline a CTE referenced twice as two scans
+            cte = cte.prefix_with("MATERIALIZED")
+        total = select(func.count()).select_from(cte).scalar_subquery()
+        out_cols = [c for c in cte.c if c.key not in (_RANK_COL, _PK_COL)]
+        page = select(*out_cols, total.label(_TOTAL_COL))
+        return page, cte.c, cte.c[_RANK_COL] if rank is not None else None
+
+    def column_types(self, entity: str, *, q: Optional[str] = None, filters: Optional[Dict[str, Any]] = None, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        # SQLAlchemy type per output key (typed columnar encodings, e.g. the arrow schema)
+        return {k: c.type for k, c in self._export_stmt(entity, q=q, filters=filters, fields=fields).selected_columns.items()}
+
+    def _export_stmt(self, entity: str, *, q: Optional[str] = None, filters: Optional[Dict[str, Any]] = None, fields: Optional[List[str]] = None) -> Select:
+        # list() without count/order/limit: same fields, joins, q, filters and custom queries
+        plan = self._plan(entity)
+        fields = self._fields(plan, fields)
+        if plan.custom:
+            stmt, _ = self._build_select_custom(plan, q=q, filters=filters, fields=fields)
+        else:
+            stmt, _ = self._build_select_default(plan, q=q, filters=filters, fields=fields)
+        return stmt
 
-        stmt, _ = self._build_select_default(spec, q=None, filters={pk_key: id_value})
-        with self.engine.connect() as conn:
-            row = conn.execute(stmt).mappings().first()
-        return dict(row) if row else None
+    # ---- CrudBackend ----
 
-    def update(self, entity: str, id_value: Any, data: Dict[str, Any]) -> Dict[str, Any]:
-        spec = self._spec(entity)
-        if spec.write_mode != "default":
-            raise ValueError(f"Write disabled or custom for entity: {entity}")
+    def create(self, entity: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        with self.engine.begin() as conn:
+            return self._create(conn, entity, data)
 
-        base = self._table(spec.table)
-        payload = {k: v for k, v in data.items() if k in spec.allowed_write_keys}
-        stmt = update(base).where(base.c[spec.pk] == id_value).values(**payload).returning(base)
+    def get_one(self, entity: str, id_value: Any) -> Optional[Dict[str, Any]]:
+        ck = self._cache_key(entity, id_value=id_value)
+        if ck:
+            hit = self.cache.get(*ck)
+            if hit is not None:
+                return hit
+        engine = self._read_engine()
+        with engine.connect() as conn:
+            row = self._get_one(conn, entity, id_value)
+        ttl_s = self._replica_ttl(ck[1], engine is not self.engine) if ck else None
+        if ttl_s and row is not None:
+            self.cache.set(ck[0], row, ttl_s)
+        return row
 
+    def update(self, entity: str, id_value: Any, data: Dict[str, Any]) -> Dict[str, Any]:
         with self.engine.begin() as conn:
-            row = conn.execute(stmt).mappings().first()
-
-        if not row:
-            raise ValueError(f"{entity} not found id={id_value}")
-        return dict(row)
+            return self._update(conn, entity, id_value, data)
 
     def delete(self, entity: str, id_value: Any) -> Dict[str, Any]:
-        spec = self._spec(entity)
-        if spec.write_mode != "default":
-            raise ValueError(f"Write disabled or custom for entity: {entity}")
-
-        base = self._table(spec.table)
-        stmt = delete(base).where(base.c[spec.pk] == id_value)
-
         with self.engine.begin() as conn:
-            res = conn.execute(stmt)
+            return self._delete(conn, entity, id_value)
 
-        return {"ok": True, "deleted": res.rowcount}
+    def bulk_create(self, entity: str, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        with self.engine.begin() as conn:
+            return self._bulk_create(conn, entity, items)
 
-    def list(self, entity: str, *, page: int, size: int, q: Optional[str]=None, filters: Optional[Dict[str, Any]]=None) -> Dict[str, Any]:
-        spec = self._spec(entity)
+    def bulk_update(self, entity: str, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        with self.engine.begin() as conn:
+            return self._bulk_update(conn, entity, items)
 
-        # custom query list
-        if spec.custom_query_id:
-            builder = QUERY_REGISTRY.get(spec.custom_query_id)
-            if not builder:
-                raise ValueError(f"Unknown custom_query_id: {spec.custom_query_id}")
-            stmt = builder(self.meta, filters, q, None)
-            # count: wrap as subquery
-            subq = stmt.subquery()
-            count_stmt = select(func.count()).select_from(subq)
-            stmt = select(subq).offset((page - 1) * size).limit(size)
-
-            with self.engine.connect() as conn:
-                total = conn.execute(count_stmt).scalar_one()
-                items = [dict(r) for r in conn.execute(stmt).mappings().all()]
-            return {"items": items, "total": int(total)}
-
-        stmt, count_stmt = self._build_select_default(spec, q=q, filters=filters)
-        stmt = stmt.offset((page - 1) * size).limit(size)
-
-        with self.engine.connect() as conn:
-            total = conn.execute(count_stmt).scalar_one()
-            items = [dict(r) for r in conn.execute(stmt).mappings().all()]
-
-        return {"items": items, "total": int(total)}
+    def bulk_delete(self, entity: str, ids: List[Any]) -> Dict[str, Any]:
+        with self.engine.begin() as conn:
+            return self._bulk_delete(conn, entity, ids)
+
+    def export(self, entity: str, *, q: Optional[str] = None, filters: Optional[Dict[str, Any]] = None, batch_size: int = 2000, fields: Optional[List[str]] = None) -> Iterator[Tuple[List[str], List[Any]]]:
+        """
+        Streams (keys, rows) batches off a server-side cursor (stream_results/yield_per),
+        so memory stays at one batch whatever the table size. The connection is held
+        until the generator is exhausted or closed. Yields at least once (for headers).
+        """
+        stmt = self._export_stmt(entity, q=q, filters=filters, fields=fields)
+        with self._read_engine().connect() as conn:
+            result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(stmt)
+            keys = list(result.keys())
+            empty = True
+            for rows in result.partitions():
+                empty = False
+                yield keys, rows
+            if empty:
+                yield keys, []
+
+    def list(self, entity: str, *, page: int, size: int, q: Optional[str]=None, filters: Optional[Dict[str, Any]]=None, cursor: Optional[str]=None, total: Optional[str]=None, columnar: bool = False, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Offset pagination by default. Passing cursor ("" for the first page) switches
+        to keyset pagination: page is ignored and the response carries next_cursor.
+
+        total overrides the entity's read.total mode (exact | estimated | cached | none);
+        keyset pages default to read.cursor_total ("none": no count per page).
+        Non-exact modes report total_mode; "none" returns total=None plus has_more.
+
+        columnar=True returns items as row tuples plus "columns" (their labels).
+
+        fields restricts the projection to those read fields; joins nothing reads are
+        dropped from the select and the count (see EntityPlan.projection).
+        """
+        ck = self._cache_key(entity, params={"page": page, "size": size, "q": q, "filters": filters, "cursor": cursor, "total": total, "columnar": columnar, "fields": fields})
+        if ck:
+            hit = self.cache.get(*ck)
+            if hit is not None:
+                return hit
+        plan = self._plan(entity)
+        engine = self.engine
+        if self._search_route(plan, q, cursor):
+            mode = self._total_mode(plan, total)
+            res = self._es_search(plan, page=page, size=size, q=q, filters=filters, mode=mode)
+            if res["hydrate"] == "sql":
+                engine = self._read_engine()
+                with engine.connect() as conn:
+                    res["items"] = self._hydrate(conn, plan, res["ids"])
+            out = self._es_page(plan, mode, size, res, columnar, self._fields(plan, fields))
+        elif self._list_strategy(plan, self._total_mode(plan, total, cursor)) == "concurrent":
+            # count on a second pooled connection (worker thread) while the page runs here;
+            # the worker runs in this request's context (CURRENT_ENTITY labels its metrics)
+            engine = self._read_engine()
+            count_stmt = self._count_stmt(plan, q=q, filters=filters)
+            pending = self._count_pool().submit(contextvars.copy_context().run, self._count_on, engine, count_stmt)
+            with engine.connect() as conn:
+                out = self._list(conn, entity, page=page, size=size, q=q, filters=filters, cursor=cursor, total=total, columnar=columnar, fields=fields, run_count=False)
+            out["total"] = pending.result()
+        else:
+            engine = self._read_engine()
+            with engine.connect() as conn:
+                out = self._list(conn, entity, page=page, size=size, q=q, filters=filters, cursor=cursor, total=total, columnar=columnar, fields=fields)
+        ttl_s = self._replica_ttl(ck[1], engine is not self.engine) if ck else None
+        if ttl_s:
+            self.cache.set(ck[0], out, ttl_s)
+        return out
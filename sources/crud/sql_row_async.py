@@ -0,0 +1,141 @@
+from __future__ import annotations
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from anyio import to_thread
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from sources.crud.base import AsyncCrudBackend
+from sources.crud.sql_row import SqlRowCrud
+from entities.spec import EntitySpec
+from engine.query_planner import EntityPlan
+
+class AsyncSqlRowCrud(AsyncCrudBackend):
+    """
+    SqlRowCrud on an AsyncEngine. Query building/row shaping is shared with the sync
+    backend: each op runs through AsyncConnection.run_sync, which drives the async
+    driver from a greenlet instead of a thread.
+    """
+
+    def __init__(self, engine: AsyncEngine, meta, entity_specs: Dict[str, EntitySpec], plans: Optional[Dict[str, EntityPlan]] = None, outbox=None, cache=None, read_router=None, search_clients=None, default_search_source: Optional[str] = None):
+        self.engine = engine
+        self.meta = meta
+        self.entity_specs = entity_specs
+        self.core = SqlRowCrud(engine=engine.sync_engine, meta=meta, entity_specs=entity_specs, plans=plans, outbox=outbox, cache=cache, read_router=read_router,
+            search_clients=search_clients, default_search_source=default_search_source,
+        )
+        self.plans = self.core.plans
+        self.cache = cache
+        self.read_router = read_router
+
+    def _read_engine(self) -> AsyncEngine:
+        if self.read_router is not None:
+            engine = self.read_router.pick(async_=True)
+            if engine is not None:
+                return engine
+        return self.engine
+
+    async def _cache_call(self, fn, *args):
+        # a shared (redis) tier does network I/O: keep it off the event loop
+        if self.cache.remote:
+            return await to_thread.run_sync(fn, *args)
+        return fn(*args)
+
+    def invalidate_counts(self, entity: str, action: str = "") -> None:
+        self.core.invalidate_counts(entity, action)
+
+    async def create(self, entity: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        async with self.engine.begin() as conn:
+            return await conn.run_sync(self.core._create, entity, data)
+
+    async def get_one(self, entity: str, id_value: Any) -> Optional[Dict[str, Any]]:
+        ck = None
+        if self.cache is not None:
+            ck = await self._cache_call(lambda: self.core._cache_key(entity, id_value=id_value))
+        if ck:
+            hit = await self._cache_call(self.cache.get, *ck)
+            if hit is not None:
+                return hit
+        engine = self._read_engine()
+        async with engine.connect() as conn:
+            row = await conn.run_sync(self.core._get_one, entity, id_value)
+        ttl_s = self.core._replica_ttl(ck[1], engine is not self.engine) if ck else None
+        if ttl_s and row is not None:
+            await self._cache_call(self.cache.set, ck[0], row, ttl_s)
+        return row
+
+    async def update(self, entity: str, id_value: Any, data: Dict[str, Any]) -> Dict[str, Any]:
+        async with self.engine.begin() as conn:
+            return await conn.run_sync(self.core._update, entity, id_value, data)
+
+    async def delete(self, entity: str, id_value: Any) -> Dict[str, Any]:
+        async with self.engine.begin() as conn:
+            return await conn.run_sync(self.core._delete, entity, id_value)
+
+    async def bulk_create(self, entity: str, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        async with self.engine.begin() as conn:
+            return await conn.run_sync(self.core._bulk_create, entity, items)
+
+    async def bulk_update(self, entity: str, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        async with self.engine.begin() as conn:
+            return await conn.run_sync(self.core._bulk_update, entity, items)
+
+    async def bulk_delete(self, entity: str, ids: List[Any]) -> Dict[str, Any]:
+        async with self.engine.begin() as conn:
+            return await conn.run_sync(self.core._bulk_delete, entity, ids)
+
+    async def export(self, entity: str, *, q: Optional[str] = None, filters: Optional[Dict[str, Any]] = None, batch_size: int = 2000, fields: Optional[List[str]] = None) -> AsyncIterator[Tuple[List[str], List[Any]]]:
+        # AsyncConnection.stream() is the async driver's server-side cursor
+        stmt = self.core._export_stmt(entity, q=q, filters=filters, fields=fields)
+        async with self._read_engine().connect() as conn:
+            result = await conn.stream(stmt.execution_options(yield_per=batch_size))
+            keys = list(result.keys())
+            empty = True
+            async for rows in result.partitions():
+                empty = False
+                yield keys, rows
+            if empty:
+                yield keys, []
+
+    async def list(self, entity: str, *, page: int, size: int, q: Optional[str]=None, filters: Optional[Dict[str, Any]]=None, cursor: Optional[str]=None, total: Optional[str]=None, columnar: bool = False, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        ck = None
+        if self.cache is not None:
+            params = {"page": page, "size": size, "q": q, "filters": filters, "cursor": cursor, "total": total, "columnar": columnar, "fields": fields}
+            ck = await self._cache_call(lambda: self.core._cache_key(entity, params=params))
+        if ck:
+            hit = await self._cache_call(self.cache.get, *ck)
+            if hit is not None:
+                return hit
+        plan = self.core._plan(entity)
+        engine = self.engine
+        if self.core._search_route(plan, q, cursor):
+            # the ES client is blocking: search on a worker thread, hydrate on the async engine
+            mode = self.core._total_mode(plan, total)
+            res = await to_thread.run_sync(lambda: self.core._es_search(plan, page=page, size=size, q=q, filters=filters, mode=mode))
+            if res["hydrate"] == "sql":
+                engine = self._read_engine()
+                async with engine.connect() as conn:
+                    res["items"] = await conn.run_sync(self.core._hydrate, plan, res["ids"])
+            out = self.core._es_page(plan, mode, size, res, columnar, self.core._fields(plan, fields))
+        elif self.core._list_strategy(plan, self.core._total_mode(plan, total, cursor)) == "concurrent":
+            # count and page on two pooled connections at once
+            engine = self._read_engine()
+            count_stmt = self.core._count_stmt(plan, q=q, filters=filters)
+
+            async def count() -> int:
+                async with engine.connect() as conn:
+                    return int((await conn.execute(count_stmt)).scalar_one())
+
+            async def page_() -> Dict[str, Any]:
+                async with engine.connect() as conn:
+                    return await conn.run_sync(self.core._list, entity, page=page, size=size, q=q, filters=filters, cursor=cursor, total=total, columnar=columnar, fields=fields, run_count=False)
+
+            out, out_total = await asyncio.gather(page_(), count())
+            out["total"] = out_total
+        else:
+            engine = self._read_engine()
+            async with engine.connect() as conn:
+                out = await conn.run_sync(self.core._list, entity, page=page, size=size, q=q, filters=filters, cursor=cursor, total=total, columnar=columnar, fields=fields)
+        ttl_s = self.core._replica_ttl(ck[1], engine is not self.engine) if ck else None
+        if ttl_s:
+            await self._cache_call(self.cache.set, ck[0], out, ttl_s)
+        return out
@@ -0,0 +1,84 @@
+from __future__ import annotations
+import re
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import Text, cast, func, literal_column, or_
+from sqlalchemy.sql import ColumnElement
+
+# SQL search modes for q (read.search_mode; "es" is handled by SqlRowCrud itself):
+#   ilike    - ILIKE '%q%' over search_keys; any dialect, no index can serve it
+#   trgm     - pg_trgm: the same ILIKE '%q%' substring match (served by GIN
+#              (col gin_trgm_ops) indexes), ranked by similarity(); no fuzzy matching
+#   tsvector - full text: tsvector @@ websearch_to_tsquery(config, q), ranked by ts_rank();
+#              per table, the generated search_tsv column when it exists, else the same
+#              to_tsvector() expression the expression GIN index is built on
+# Off postgres every mode falls back to ilike.
+#
+# ilike is the default. trgm and tsvector are opt-in per entity and need their DDL on
+# the database first: run `python infra/search_ddl.py --apply` (pg_trgm extension, GIN
+# indexes, search_tsv columns) before setting read.search_mode, or every q= search
+# fails on the missing operators/functions.
+
+SQL_SEARCH_MODES = ("ilike", "trgm", "tsvector")
+TSV_COLUMN = "search_tsv"
+
+_CONFIG_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_.]*$")
+
+
+def check_config(config: str) -> str:
+    # rendered inline (an expression index only matches constants, not bind params)
+    if not _CONFIG_RE.match(config):
+        raise ValueError(f"Invalid text search config: {config}")
+    return config
+
+
+def tsvector_sql(cols: List[str], config: str) -> str:
+    # DDL twin of tsvector_expr(); the two must stay token-for-token identical
+    doc = " || ' ' || ".join(f"coalesce(({c})::text, '')" for c in cols)
+    return f"to_tsvector('{check_config(config)}'::regconfig, {doc})"
+
+
+def tsvector_expr(cols: List[Any], config: str) -> ColumnElement:
+    doc = None
+    for c in cols:
+        part = func.coalesce(cast(c, Text), literal_column("''"))
+        doc = part if doc is None else doc.op("||")(literal_column("' '")).op("||")(part)
+    return func.to_tsvector(literal_column(f"'{check_config(config)}'::regconfig"), doc)
+
+
+def _by_table(cols: Tuple[Any, ...]) -> Dict[Any, List[Any]]:
+    # search columns grouped by the table/alias they come from, in search_keys order
+    groups: Dict[Any, List[Any]] = {}
+    for c in cols:
+        groups.setdefault(c.table, []).append(c)
+    return groups
+
+
+def search_clause(plan, q: str, dialect: str) -> Tuple[ColumnElement, Optional[ColumnElement]]:
+    """
+    (WHERE clause, rank) for q over plan.search_columns; rank is None for ilike
+    (the list keeps its natural order) and higher is better otherwise.
+    """
+    cols = plan.search_columns
+    mode = plan.spec.search_mode
+    like = f"%{q}%"
+    if dialect != "postgresql" or mode not in ("trgm", "tsvector"):
+        return or_(*[c.ilike(like) for c in cols]), None
+
+    if mode == "trgm":
+        # same rows as ilike; the trigram index only makes the substring match cheap
+        where = or_(*[c.ilike(like) for c in cols])
+        # LEFT-joined columns may be NULL; greatest() skips NULLs
+        rank = func.greatest(*[func.similarity(c, q) for c in cols])
+        return where, rank
+
+    query = func.websearch_to_tsquery(literal_column(f"'{check_config(plan.spec.search_config)}'::regconfig"), q)
+    matches = []
+    ranks = []
+    for table, group in _by_table(cols).items():
+        vec = table.c[TSV_COLUMN] if TSV_COLUMN in table.c else tsvector_expr(group, plan.spec.search_config)
+        matches.append(vec.op("@@")(query))
+        ranks.append(func.coalesce(func.ts_rank(vec, query), 0))
+    rank = ranks[0]
+    for r in ranks[1:]:
+        rank = rank + r
+    return or_(*matches), rank
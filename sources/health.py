@@ -0,0 +1,125 @@
+from __future__ import annotations
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional
+
+log = logging.getLogger(__name__)
+
+# Cached, deadline-bounded source health for SourceManager.
+# Every source is probed concurrently on a small pool; a probe that misses the deadline
+# is reported as failed (its thread is left to finish, and that source is not probed
+# again until it does, so a hung backend can't pile up threads). A daemon thread
+# refreshes the snapshot every interval_s; readers get the cached snapshot while it is
+# younger than ttl_s, so /health/sources never waits on a backend.
+
+class HealthMonitor:
+    def __init__(
+        self,
+        sources: Callable[[], Dict[str, Any]],
+        *,
+        ttl_s: float = 30.0,
+        interval_s: float = 10.0,
+        timeout_s: float = 5.0,
+        max_workers: int = 8,
+    ):
+        self._sources = sources
+        self.ttl_s = ttl_s
+        self.interval_s = interval_s
+        self.timeout_s = timeout_s
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="health")
+        self._inflight: Dict[str, Future] = {}
+        self._snapshot: Dict[str, Any] = {}
+        self._taken_at = 0.0
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _probe(self, src) -> Dict[str, Any]:
+        t0 = time.perf_counter()
+        try:
+            res = dict(src.health())
+        except Exception as e:
+            res = {"ok": False, "kind": getattr(src, "kind", None), "name": src.name, "error": str(e)}
+        res["latency_ms"] = round((time.perf_counter() - t0) * 1000, 2)
+        return res
+
+    def refresh(self) -> Dict[str, Any]:
+        """
+        Probes every source concurrently; returns once all answered or the deadline passed.
+        """
+        with self._refresh_lock:
+            sources = self._sources()
+            started = time.perf_counter()
+            futures: Dict[str, Future] = {}
+            results: Dict[str, Any] = {}
+            for name, src in sources.items():
+                prev = self._inflight.get(name)
+                if prev is not None and not prev.done():
+                    results[name] = {
+                        "ok": False, "kind": getattr(src, "kind", None), "name": name,
+                        "error": "previous probe still running",
+                    }
+                    continue
+                futures[name] = self._inflight[name] = self._pool.submit(self._probe, src)
+
+            # per-source "health_timeout_s" overrides the default; each waits up to its own deadline
+            limits = {name: float(sources[name].cfg.get("health_timeout_s", self.timeout_s)) for name in futures}
+            for name in sorted(futures, key=limits.get):
+                wait([futures[name]], timeout=max(0.0, limits[name] - (time.perf_counter() - started)))
+            for name, fut in futures.items():
+                src = sources[name]
+                per_source = limits[name]
+                if fut.done():
+                    res = fut.result()
+                    if res["latency_ms"] > per_source * 1000:
+                        res = {**res, "ok": False, "error": f"probe exceeded {per_source}s"}
+                    results[name] = res
+                else:
+                    results[name] = {
+                        "ok": False, "kind": getattr(src, "kind", None), "name": name,
+                        "error": f"timeout after {per_source}s",
+                        "latency_ms": round((time.perf_counter() - started) * 1000, 2),
+                    }
+
+            checked_at = datetime.now(timezone.utc).isoformat()
+            for res in results.values():
+                res["checked_at"] = checked_at
+            snapshot = {name: results[name] for name in sources}
+            with self._lock:
+                self._snapshot = snapshot
+                self._taken_at = time.monotonic()
+            return snapshot
+
+    def cached(self) -> Optional[Dict[str, Any]]:
+        # the snapshot while it is fresh, else None
+        with self._lock:
+            if self._snapshot and time.monotonic() - self._taken_at < self.ttl_s:
+                return self._snapshot
+        return None
+
+    def get(self) -> Dict[str, Any]:
+        return self.cached() or self.refresh()
+
+    def start(self) -> None:
+        if self._thread is not None or self.interval_s <= 0:
+            return
+        self._thread = threading.Thread(target=self._run, name="health-monitor", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception:
+                log.exception("health refresh failed")
+            self._stop.wait(self.interval_s)
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+        self._pool.shutdown(wait=False, cancel_futures=True)
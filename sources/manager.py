@@ -1,20 +1,31 @@
 import json
-from typing import Any, Dict
-
-# register built-in sources (side-effect registration)
-import sources.connect.postgres  # noqa: F401
-import sources.connect.elasticsearch  # noqa: F401
-import sources.connect.s3  # noqa: F401
-import sources.connect.bigquery  # noqa: F401
-import sources.connect.firebase  # noqa: F401
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from anyio import to_thread
+from typing import Any, Callable, Dict, List, Optional
 
+# connectors load lazily: only the kinds configured below get imported
 from sources.registry import SOURCE_REGISTRY
+from sources.health import HealthMonitor
+
+log = logging.getLogger(__name__)
 
 
 class SourceManager:
     def __init__(self, config: Dict[str, Any]):
         self.config = config
         self.sources: Dict[str, Any] = {}
+        # run before sources close, e.g. flushing buffered sinks that still need them
+        self._close_hooks: List[Callable[[], Any]] = []
+        # health: {"ttl_s": 30, "interval_s": 10, "timeout_s": 5} (interval_s 0 = no background refresh)
+        health_cfg = config.get("health", {})
+        self.health_monitor = HealthMonitor(
+            lambda: self.sources,
+            ttl_s=float(health_cfg.get("ttl_s", 30)),
+            interval_s=float(health_cfg.get("interval_s", 10)),
+            timeout_s=float(health_cfg.get("timeout_s", 5)),
+        )
 
     @classmethod
     def from_file(cls, path: str) -> "SourceManager":
@@ -26,15 +37,73 @@ class SourceManager:
         return cls(config)
 
     def init_all(self) -> None:
+        """
+        Connects every enabled source concurrently, each bounded by its "init_timeout_s"
+        (default config["init_timeout_s"], 30s). Sources with "required": false that fail
+        are logged and left out; any other failure raises after all sources settled.
+        """
+        pending: Dict[str, Any] = {}
         for name, cfg in self.config.get("sources", {}).items():
             if not cfg.get("enabled", True):
                 continue
             kind = cfg["kind"]
             if kind not in SOURCE_REGISTRY:
                 raise ValueError(f"Unknown source kind: {kind}")
-            src = SOURCE_REGISTRY[kind](name=name, cfg=cfg)
-            src.connect()
-            self.sources[name] = src
+            # plugin imports stay on this thread; only connect() runs in parallel
+            pending[name] = SOURCE_REGISTRY[kind](name=name, cfg=cfg)
+
+        default_timeout = float(self.config.get("init_timeout_s", 30))
+        limits = {name: float(src.cfg.get("init_timeout_s", default_timeout)) for name, src in pending.items()}
+        pool = ThreadPoolExecutor(max_workers=max(1, len(pending)), thread_name_prefix="source-init")
+        try:
+            started = time.monotonic()
+            futures = {name: pool.submit(self._connect, src) for name, src in pending.items()}
+            # each source waits only up to its own deadline
+            for name in sorted(futures, key=limits.get):
+                wait([futures[name]], timeout=max(0.0, started + limits[name] - time.monotonic()))
+        finally:
+            # a connect() past its deadline keeps its thread; don't block startup on it
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        errors: Dict[str, str] = {}
+        for name, fut in futures.items():
+            src = pending[name]
+            err: Optional[str] = None
+            if not fut.done():
+                err = f"connect timed out after {limits[name]}s"
+            elif fut.exception() is not None:
+                err = str(fut.exception())
+            elif fut.result() > limits[name]:
+                err = f"connect took {fut.result():.1f}s (limit {limits[name]}s)"
+            if err is None:
+                self.sources[name] = src
+            elif src.cfg.get("required", True):
+                errors[name] = err
+            else:
+                log.warning("optional source %s unavailable: %s", name, err)
+        if errors:
+            raise RuntimeError(f"Source init failed: {errors}")
+
+        self.health_monitor.start()
+        loaded = SOURCE_REGISTRY.import_report()
+        log.info("source plugins: %s imported in %sms total", [e["kind"] for e in loaded], round(sum(e["ms"] for e in loaded), 1))
+
+    @staticmethod
+    def _connect(src) -> float:
+        t0 = time.perf_counter()
+        src.connect()
+        elapsed = time.perf_counter() - t0
+        log.info("source %s (%s) connected in %.0fms", src.name, src.kind, elapsed * 1000)
+        return elapsed
+
+    def plugin_report(self) -> Dict[str, Any]:
+        # import cost per connector/sink module actually loaded by this process
+        from sinks.registry import SINK_REGISTRY
+        return {
+            "sources": SOURCE_REGISTRY.import_report(),
+            "sinks": SINK_REGISTRY.import_report(),
+            "available": {"sources": SOURCE_REGISTRY.kinds(), "sinks": SINK_REGISTRY.kinds()},
+        }
 
     def get_source(self, name: str):
         return self.sources[name]
@@ -47,9 +116,44 @@ class SourceManager:
         key = self.config["routing"].get("search_source")
         return self.sources[key] if key else None
 
+    def cache(self):
+        key = self.config["routing"].get("cache_source")
+        return self.sources[key] if key else None
+
     def health(self) -> Dict[str, Any]:
-        return {k: v.health() for k, v in self.sources.items()}
+        """
+        {name: {ok, kind, name, latency_ms, checked_at, ...}} from the cached snapshot
+        (refreshed in the background); probes synchronously only when it is stale.
+        """
+        return self.health_monitor.get()
+
+    async def ahealth(self) -> Dict[str, Any]:
+        cached = self.health_monitor.cached()
+        if cached is not None:
+            return cached
+        return await to_thread.run_sync(self.health_monitor.refresh)
+
+    def add_close_hook(self, fn: Callable[[], Any]) -> None:
+        self._close_hooks.append(fn)
+
+    def _run_close_hooks(self) -> None:
+        hooks, self._close_hooks = self._close_hooks, []
+        for fn in hooks:
+            try:
+                res = fn()
+                if res:
+                    log.warning("close hook %s reported: %s", getattr(fn, "__qualname__", fn), res)
+            except Exception:
+                log.exception("close hook failed")
 
     def close(self) -> None:
+        self.health_monitor.stop()
+        self._run_close_hooks()
         for s in self.sources.values():
             s.close()
+
+    async def aclose(self) -> None:
+        self.health_monitor.stop()
+        await to_thread.run_sync(self._run_close_hooks)
+        for s in self.sources.values():
+            await s.aclose()
@@ -0,0 +1,99 @@
+from __future__ import annotations
+import importlib
+import logging
+import sys
+import threading
+import time
+from importlib.metadata import entry_points
+from typing import Any, Dict, Generic, Iterator, List, Optional, TypeVar
+
+log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Kind -> class registry that imports a plugin module only when its kind is first
+# looked up. Built-in kinds map to module paths; third-party plugins can be installed
+# as entry points (group e.g. "studio.sources", name = kind, value = "module:Class").
+# Importing a plugin module runs its @register_* decorator, which calls register().
+# Every import is timed so startup can report what each plugin cost.
+
+class LazyRegistry(Generic[T]):
+    def __init__(self, name: str, builtins: Dict[str, str], *, entry_point_group: Optional[str] = None):
+        self.name = name
+        self.entry_point_group = entry_point_group
+        self._paths: Dict[str, str] = dict(builtins)
+        self._classes: Dict[str, T] = {}
+        self._entry_points: Optional[Dict[str, Any]] = None
+        self._report: List[Dict[str, Any]] = []
+        self._lock = threading.RLock()
+
+    def register(self, kind: str, cls: T) -> T:
+        self._classes[kind] = cls
+        return cls
+
+    def add(self, kind: str, module_path: str) -> None:
+        # extra lazy kinds from app code (module imported on first use)
+        self._paths[kind] = module_path
+
+    def _eps(self) -> Dict[str, Any]:
+        if self._entry_points is None:
+            eps = entry_points(group=self.entry_point_group) if self.entry_point_group else []
+            self._entry_points = {ep.name: ep for ep in eps}
+        return self._entry_points
+
+    def _load(self, kind: str) -> None:
+        # caller holds self._lock
+        path = self._paths.get(kind)
+        ep = None if path else self._eps().get(kind)
+        if path is None and ep is None:
+            return
+
+        before = len(sys.modules)
+        t0 = time.perf_counter()
+        entry: Dict[str, Any] = {"registry": self.name, "kind": kind, "module": path or ep.value}
+        try:
+            if path is not None:
+                importlib.import_module(path)
+            else:
+                self.register(kind, ep.load())
+        except Exception as e:
+            entry["error"] = str(e)
+            raise
+        finally:
+            entry["ms"] = round((time.perf_counter() - t0) * 1000, 1)
+            entry["new_modules"] = len(sys.modules) - before
+            self._report.append(entry)
+            log.info("loaded %s plugin %s from %s in %sms (%s new modules)", self.name, kind, entry["module"], entry["ms"], entry["new_modules"])
+
+    def __getitem__(self, kind: str) -> T:
+        cls = self._classes.get(kind)
+        if cls is not None:
+            return cls
+        with self._lock:
+            if kind not in self._classes:
+                self._load(kind)
+            if kind not in self._classes:
+                raise KeyError(f"Unknown {self.name} kind: {kind}")
+            return self._classes[kind]
+
+    def get(self, kind: str, default: Optional[T] = None) -> Optional[T]:
+        try:
+            return self[kind]
+        except KeyError:
+            return default
+
+    def __contains__(self, kind: object) -> bool:
+        # known without importing anything
+        return kind in self._classes or kind in self._paths or (isinstance(kind, str) and kind in self._eps())
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.kinds())
+
+    def kinds(self) -> List[str]:
+        return sorted(set(self._classes) | set(self._paths) | set(self._eps()))
+
+    def loaded(self) -> List[str]:
+        return sorted(self._classes)
+
+    def import_report(self) -> List[Dict[str, Any]]:
+        return list(self._report)
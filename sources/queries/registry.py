@@ -1,9 +1,13 @@
-from typing import Any, Callable, Dict
+from typing import Any, Callable, Dict, List, Optional
 
 QUERY_REGISTRY: Dict[str, Callable[..., Any]] = {}
+# query_id -> tables the builder reads (needed by reflect="targeted")
+QUERY_TABLES: Dict[str, List[str]] = {}
 
-def register_query(query_id: str):
+def register_query(query_id: str, tables: Optional[List[str]] = None):
     def deco(fn):
         QUERY_REGISTRY[query_id] = fn
+        if tables is not None:
+            QUERY_TABLES[query_id] = list(tables)
         return fn
     return deco
@@ -1,7 +1,7 @@
 from sqlalchemy import Table, select, func
 from sources.queries.registry import register_query
 
-@register_query("po_with_totals_v1")
+@register_query("po_with_totals_v1", tables=["purchase_orders", "purchase_order_items"])
 def build_po_with_totals(meta, filters: dict | None, q: str | None, sort: list | None):
     po = Table("purchase_orders", meta)
     items = Table("purchase_order_items", meta)
@@ -13,4 +13,8 @@ def build_po_with_totals(meta, filters: dict | None, q: str | None, sort: list |
         .select_from(po.outerjoin(items, items.c.purchase_order_id == po.c.id))
         .group_by(po.c.id, po.c.po_number, po.c.status)
     )
+    if filters:
+        # sources.crud.sql_filters.FilterSet: row filters in WHERE, the aggregate in HAVING
+        stmt = stmt.where(*filters.clauses({"id": po.c.id, "po_number": po.c.po_number, "status": po.c.status}))
+        stmt = stmt.having(*filters.clauses({"items_total": total}))
     return stmt
@@ -1,10 +1,24 @@
-from typing import Dict, Type
+from typing import Type
 from sources.base import BaseSource
+from sources.plugins import LazyRegistry
 
-SOURCE_REGISTRY: Dict[str, Type[BaseSource]] = {}
+# connector modules are imported only when a configured source uses their kind
+SOURCE_REGISTRY: LazyRegistry[Type[BaseSource]] = LazyRegistry(
+    "source",
+    {
+        "postgres": "sources.connect.postgres",
+        "elasticsearch": "sources.connect.elasticsearch",
+        "s3": "sources.connect.s3",
+        "bigquery": "sources.connect.bigquery",
+        "firebase": "sources.connect.firebase",
+        "cache": "sources.connect.cache",
+        "sqlite": "sources.connect.sqlite",
+    },
+    entry_point_group="studio.sources",
+)
 
 def register_source(kind: str):
     def decorator(cls: Type[BaseSource]):
-        SOURCE_REGISTRY[kind] = cls
+        SOURCE_REGISTRY.register(kind, cls)
         return cls
     return decorator
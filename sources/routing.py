@@ -0,0 +1,169 @@
+from __future__ import annotations
+import itertools
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+from sqlalchemy import text
+
+log = logging.getLogger(__name__)
+
+# Read-replica routing for SqlRowCrud reads (get_one / list / export).
+#
+# ROUTING = {
+#     "active_source": "db_main",                 # primary: every write, and reads when pinned
+#     "read_replicas": ["db_replica_1", ...],     # postgres sources (reflect: false)
+#     "read_policy": "round_robin",               # | "least_connections" (pool checkouts)
+#     "read_your_writes_s": 5,                    # pin a client's reads to the primary after it writes
+#     "max_replica_lag_s": 10,                    # evict replicas further behind than this
+#     "lag_check_interval_s": 5,
+# }
+#
+# Read-your-writes: app.main's middleware puts a mutable session dict in READ_SESSION
+# for every request (from the client's cookie/header); note_write() extends its
+# "primary_until" and the middleware hands the deadline back to the client.
+
+READ_SESSION: ContextVar[Optional[Dict[str, Any]]] = ContextVar("read_session", default=None)
+
+_PG_LAG = text("""
+    select case
+        when not pg_is_in_recovery() then 0
+        when pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() then 0
+        else coalesce(extract(epoch from now() - pg_last_xact_replay_timestamp()), 0)
+    end
+""")
+
+class ReadRouter:
+    def __init__(
+        self,
+        replicas: List[Any],
+        *,
+        policy: str = "round_robin",
+        read_your_writes_s: float = 0.0,
+        max_lag_s: Optional[float] = None,
+        lag_check_interval_s: float = 5.0,
+    ):
+        if policy not in ("round_robin", "least_connections"):
+            raise ValueError(f"Unknown read_policy: {policy}")
+        self.replicas = replicas  # sources with .engine (and .async_engine in async mode)
+        self.policy = policy
+        self.read_your_writes_s = read_your_writes_s
+        self.max_lag_s = max_lag_s
+        self.lag_check_interval_s = lag_check_interval_s
+
+        self._rr = itertools.count()
+        self._evicted: Dict[str, str] = {}   # replica name -> reason
+        self._lag: Dict[str, Optional[float]] = {r.name: None for r in replicas}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_manager(cls, mgr) -> Optional["ReadRouter"]:
+        routing = mgr.config.get("routing", {})
+        names = routing.get("read_replicas") or []
+        if not names:
+            return None
+        max_lag = routing.get("max_replica_lag_s")
+        router = cls(
+            [mgr.get_source(n) for n in names],
+            policy=routing.get("read_policy", "round_robin"),
+            read_your_writes_s=float(routing.get("read_your_writes_s", 0)),
+            max_lag_s=float(max_lag) if max_lag is not None else None,
+            lag_check_interval_s=float(routing.get("lag_check_interval_s", 5)),
+        )
+        router.start()
+        if hasattr(mgr, "add_close_hook"):
+            mgr.add_close_hook(router.stop)
+        return router
+
+    # ---- routing ----
+
+    @staticmethod
+    def _engine(src, async_: bool):
+        return getattr(src, "async_engine", None) if async_ else src.engine
+
+    def pick(self, *, async_: bool = False):
+        """
+        Engine for a read, or None when it must go to the primary (pinned session,
+        or no healthy replica).
+        """
+        session = READ_SESSION.get()
+        if session is not None and session.get("primary_until", 0) > time.time():
+            return None
+
+        with self._lock:
+            healthy = [r for r in self.replicas if r.name not in self._evicted]
+        engines = [e for e in (self._engine(r, async_) for r in healthy) if e is not None]
+        if not engines:
+            return None
+        if self.policy == "least_connections":
+            return min(engines, key=lambda e: (e.sync_engine if async_ else e).pool.checkedout())
+        return engines[next(self._rr) % len(engines)]
+
+    def note_write(self) -> None:
+        # called by SqlRowCrud on every write: this client's next reads go to the primary
+        session = READ_SESSION.get()
+        if session is not None and self.read_your_writes_s > 0:
+            session["primary_until"] = max(session.get("primary_until", 0), time.time() + self.read_your_writes_s)
+            session["wrote"] = True
+
+    # ---- lag monitoring ----
+
+    def check_lag(self) -> Dict[str, Optional[float]]:
+        for src in self.replicas:
+            reason = None
+            lag: Optional[float] = None
+            try:
+                with src.engine.connect() as conn:
+                    if conn.dialect.name == "postgresql":
+                        lag = float(conn.execute(_PG_LAG).scalar() or 0)
+                    else:
+                        conn.exec_driver_sql("select 1")
+                        lag = 0.0
+                if self.max_lag_s is not None and lag > self.max_lag_s:
+                    reason = f"lag {lag:.1f}s > {self.max_lag_s}s"
+            except Exception as e:
+                reason = f"unreachable: {e}"
+            with self._lock:
+                self._lag[src.name] = lag
+                was = self._evicted.get(src.name)
+                if reason:
+                    self._evicted[src.name] = reason
+                else:
+                    self._evicted.pop(src.name, None)
+            if reason and not was:
+                log.warning("read replica %s evicted: %s", src.name, reason)
+            elif was and not reason:
+                log.info("read replica %s back in rotation", src.name)
+        return dict(self._lag)
+
+    def start(self) -> None:
+        if self._thread is not None or not self.replicas or self.lag_check_interval_s <= 0:
+            return
+        self._thread = threading.Thread(target=self._run, name="replica-lag", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.check_lag()
+            except Exception:
+                log.exception("replica lag check failed")
+            self._stop.wait(self.lag_check_interval_s)
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "policy": self.policy,
+                "replicas": {
+                    r.name: {"lag_s": self._lag.get(r.name), "evicted": self._evicted.get(r.name)}
+                    for r in self.replicas
+                },
+            }
@@ -0,0 +1,117 @@
+from __future__ import annotations
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+from typing import List, Optional, Sequence
+import sqlalchemy
+from sqlalchemy import MetaData, text
+
+log = logging.getLogger(__name__)
+
+# Reflected MetaData cached on local disk, keyed by a schema fingerprint.
+# The fingerprint is one catalog query (columns, types, constraints, indexes of the
+# reflected tables), so a warm start costs a single round trip instead of a full
+# reflection, and any DDL on those tables changes it and forces a re-reflect.
+# The file is written by this process for its own use (pickle): keep it in a
+# directory only the app can write to.
+
+_PG_FINGERPRINT = text("""
+    select c.relname, a.attnum, a.attname, format_type(a.atttypid, a.atttypmod), a.attnotnull,
+           coalesce(pg_get_expr(d.adbin, d.adrelid), '')
+    from pg_attribute a
+    join pg_class c on c.oid = a.attrelid
+    join pg_namespace n on n.oid = c.relnamespace
+    left join pg_attrdef d on d.adrelid = a.attrelid and d.adnum = a.attnum
+    where n.nspname = current_schema()
+      and c.relkind in ('r', 'p', 'v', 'm', 'f')
+      and a.attnum > 0 and not a.attisdropped
+      and (:all_tables or c.relname = any(:tables))
+    union all
+    select c.relname, 0, con.conname, pg_get_constraintdef(con.oid), false, ''
+    from pg_constraint con
+    join pg_class c on c.oid = con.conrelid
+    join pg_namespace n on n.oid = c.relnamespace
+    where n.nspname = current_schema()
+      and (:all_tables or c.relname = any(:tables))
+    union all
+    select i.tablename, -1, i.indexname, i.indexdef, false, ''
+    from pg_indexes i
+    where i.schemaname = current_schema()
+      and (:all_tables or i.tablename = any(:tables))
+    order by 1, 2, 3
+""")
+
+def schema_fingerprint(conn, tables: Optional[Sequence[str]]) -> Optional[str]:
+    """
+    Hash of the catalog entries for `tables` (all tables when None). None when the
+    dialect has no cheap catalog query; callers then reflect without caching.
+    """
+    h = hashlib.sha256()
+    h.update(f"sa={sqlalchemy.__version__};dialect={conn.dialect.name};tables={sorted(tables or [])}".encode())
+
+    if conn.dialect.name == "postgresql":
+        rows = conn.execute(_PG_FINGERPRINT, {"all_tables": tables is None, "tables": list(tables or [])}).all()
+    elif conn.dialect.name == "sqlite":
+        rows = conn.exec_driver_sql("select type, name, tbl_name, coalesce(sql, '') from sqlite_master order by 1, 2").all()
+        if tables is not None:
+            wanted = set(tables)
+            rows = [r for r in rows if r[2] in wanted]
+    else:
+        return None
+
+    for r in rows:
+        h.update(repr(tuple(r)).encode("utf-8"))
+    return h.hexdigest()
+
+def _load(path: str, fingerprint: str) -> Optional[MetaData]:
+    try:
+        with open(path, "rb") as f:
+            cached = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        log.warning("ignoring unreadable schema cache %s: %s", path, e)
+        return None
+    if not isinstance(cached, dict) or cached.get("fingerprint") != fingerprint:
+        return None
+    return cached["meta"]
+
+def _store(path: str, fingerprint: str, meta: MetaData) -> None:
+    # write-then-rename: concurrent workers never read a half-written file
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".schema-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump({"fingerprint": fingerprint, "meta": meta}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except Exception:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+def reflect_metadata(engine, *, only: Optional[List[str]] = None, cache_path: Optional[str] = None) -> MetaData:
+    """
+    Reflects `only` those tables (all when None), through the disk cache when cache_path is set.
+    """
+    fingerprint = None
+    if cache_path:
+        with engine.connect() as conn:
+            fingerprint = schema_fingerprint(conn, only)
+        if fingerprint:
+            meta = _load(cache_path, fingerprint)
+            if meta is not None:
+                log.info("schema cache hit: %s (%s tables)", cache_path, len(meta.tables))
+                return meta
+
+    meta = MetaData()
+    meta.reflect(bind=engine, only=only)
+
+    if cache_path and fingerprint:
+        try:
+            _store(cache_path, fingerprint, meta)
+        except Exception as e:
+            log.warning("could not write schema cache %s: %s", cache_path, e)
+    return meta
@@ -0,0 +1,190 @@
+from __future__ import annotations
+import copy
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional
+
+import pytest
+from sqlalchemy import MetaData, create_engine, insert
+from sqlalchemy.pool import StaticPool
+
+from bench.fixtures import bench_metadata
+from entities.spec import parse_entity_spec
+from sources.crud.sql_row import SqlRowCrud
+import sources.queries.sample_po_with_totals  # noqa: F401  (registers po_with_totals_v1)
+
+# Behavior tests run against an in-memory sqlite database with the bench schema
+# (vendors / purchase_orders / purchase_order_items) and a small, fixed data set.
+
+ORDERS = 30
+VENDORS = 5
+
+ENTITIES: Dict[str, Dict[str, Any]] = {
+    "purchase_order": {
+        "storage": {"source": "db_main", "crud": "sql_row", "table": "purchase_orders", "pk": "id"},
+        "read": {
+            "joins": [{"type": "left", "table": "vendors", "alias": "v", "on": ["purchase_orders.vendor_id", "v.id"]}],
+            "fields": {
+                "id": "purchase_orders.id",
+                "po_number": "purchase_orders.po_number",
+                "status": "purchase_orders.status",
+                "vendor_name": "v.name",
+                "total_amount": "purchase_orders.total_amount",
+            },
+            "search": ["po_number", "vendor_name"],
+        },
+        "write": {"mode": "default", "allowed": ["po_number", "vendor_id", "status", "total_amount"]},
+    },
+    "po_with_totals": {
+        "storage": {"source": "db_main", "crud": "sql_row", "table": "purchase_orders", "pk": "id"},
+        "read": {"custom_query_id": "po_with_totals_v1", "list_strategy": "cte"},
+        "write": {"mode": "disabled", "allowed": []},
+    },
+}
+
+
+def order_row(i: int) -> Dict[str, Any]:
+    return {
+        "id": i,
+        "po_number": f"PO-{i:04d}",
+        "vendor_id": None if i % 10 == 0 else i % VENDORS + 1,
+        "status": "open" if i % 2 else "closed",
+        "total_amount": Decimal(i * 10),
+    }
+
+
+@pytest.fixture
+def engine():
+    eng = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    meta = bench_metadata()
+    meta.create_all(eng)
+    with eng.begin() as conn:
+        conn.execute(insert(meta.tables["vendors"]), [{"id": i, "name": f"vendor{i}"} for i in range(1, VENDORS + 1)])
+        conn.execute(insert(meta.tables["purchase_orders"]), [order_row(i) for i in range(1, ORDERS + 1)])
+        conn.execute(insert(meta.tables["purchase_order_items"]), [
+            {"id": i, "purchase_order_id": i, "qty": 2, "price": Decimal(3)} for i in range(1, ORDERS + 1)
+        ])
+    yield eng
+    eng.dispose()
+
+
+@pytest.fixture
+def entities_cfg() -> Dict[str, Dict[str, Any]]:
+    return copy.deepcopy(ENTITIES)
+
+
+@pytest.fixture
+def make_crud(engine) -> Callable[..., SqlRowCrud]:
+    """
+    make_crud(entities=None, *, post_write=None, outbox=None, entity_cache=None,
+    read_router=None, **read_overrides) -> SqlRowCrud over the test database; read
+    overrides (and post_write, when given) are merged into the config of entities
+    (default: all of them).
+    """
+    def make(entities=None, *, post_write=None, outbox=None, entity_cache=None, read_router=None, **read) -> SqlRowCrud:
+        meta = MetaData()
+        meta.reflect(bind=engine)
+        cfg = copy.deepcopy(ENTITIES)
+        for name, entity_cfg in cfg.items():
+            if entities is None or name in entities:
+                entity_cfg["read"].update(read)
+                if post_write is not None:
+                    entity_cfg["post_write"] = copy.deepcopy(post_write)
+        specs = {name: parse_entity_spec(name, c) for name, c in cfg.items()}
+        return SqlRowCrud(engine, meta, specs, outbox=outbox, cache=entity_cache, read_router=read_router)
+
+    return make
+
+
+@pytest.fixture
+def crud(make_crud) -> SqlRowCrud:
+    return make_crud()
+
+
+# ---- sink stand-ins ----
+
+class StubES:
+    """
+    The slice of the elasticsearch client the es_index sink uses. fail: raise on every
+    call; item_errors: {doc id: status} reported per item by bulk().
+    """
+
+    def __init__(self):
+        self.docs: Dict[Any, Any] = {}
+        self.calls: List[Any] = []
+        self.bulk_sizes: List[int] = []
+        self.fail: Optional[str] = None
+        self.item_errors: Dict[str, int] = {}
+
+    def _check(self):
+        if self.fail:
+            raise RuntimeError(self.fail)
+
+    def index(self, index, id, document, **kw):
+        self._check()
+        self.calls.append(("index", index, id))
+        self.docs[(index, id)] = document
+
+    def delete(self, index, id, ignore=None, **kw):
+        self._check()
+        self.calls.append(("delete", index, id))
+        self.docs.pop((index, id), None)
+
+    def bulk(self, operations, **kw):
+        self._check()
+        items, n, i = [], 0, 0
+        while i < len(operations):
+            (action, meta), = operations[i].items()
+            n += 1
+            status = self.item_errors.get(meta["_id"])
+            if status is None:
+                if action == "delete":
+                    self.docs.pop((meta["_index"], meta["_id"]), None)
+                else:
+                    self.docs[(meta["_index"], meta["_id"])] = operations[i + 1]
+                status = 200
+            items.append({action: {"_id": meta["_id"], "status": status, **({"error": {"type": "mapper_parsing_exception"}} if status >= 300 else {})}})
+            i += 1 if action == "delete" else 2
+        self.bulk_sizes.append(n)
+        self.calls.append(("bulk", n))
+        return {"errors": any(next(iter(it.values()))["status"] >= 300 for it in items), "items": items}
+
+
+class StubManager:
+    # SourceManager.get_source(name).client for sinks; close hooks run on close()
+    def __init__(self, **clients):
+        self.sources = {name: SimpleNamespace(name=name, client=c) for name, c in clients.items()}
+        self.config = {"routing": {"active_source": "db_main"}}
+        self._hooks: List[Callable[[], Any]] = []
+
+    def get_source(self, name):
+        return self.sources[name]
+
+    def add_close_hook(self, fn):
+        self._hooks.append(fn)
+
+    def close(self):
+        for fn in self._hooks:
+            fn()
+
+    async def aclose(self):
+        self.close()
+
+
+@pytest.fixture
+def stub_es() -> StubES:
+    return StubES()
+
+
+@pytest.fixture
+def make_manager():
+    # closed after the test, so buffered sinks stop their flusher threads
+    managers: List[StubManager] = []
+
+    def make(**clients) -> StubManager:
+        managers.append(StubManager(**clients))
+        return managers[-1]
+
+    yield make
+    for m in managers:
+        m.close()
@@ -0,0 +1,115 @@
+from __future__ import annotations
+import threading
+import time
+
+import pytest
+
+from sinks.batching import BatchBuffer
+
+
+class Recorder:
+    # flush_fn: records batches; fail_ids -> per-item failures, raise_with -> raises
+    def __init__(self):
+        self.batches = []
+        self.fail_ids = set()
+        self.raise_with = None
+        self.lock = threading.Lock()
+
+    def __call__(self, key, items):
+        if self.raise_with:
+            raise RuntimeError(self.raise_with)
+        with self.lock:
+            self.batches.append((key, list(items)))
+        return [failure(key, it, "rejected") for it in items if it[1] in self.fail_ids]
+
+
+def failure(key, item, error):
+    return {"key": key, "entity": item[0], "id": item[1], "error": error}
+
+
+def buffer(rec, **kw):
+    kw.setdefault("max_age_s", 0)
+    return BatchBuffer(rec, failure, **kw)
+
+
+def wait_for(cond, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not cond():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_flushes_a_key_at_max_items():
+    rec = Recorder()
+    buf = buffer(rec, max_items=3)
+    assert buf.add("a", ("po", "1")) == []
+    assert buf.add("b", ("po", "2")) == []
+    assert buf.add("a", ("po", "3")) == []
+    assert rec.batches == []
+    rec.fail_ids = {"4"}
+    # this add fills "a": the writer's thread flushes it and gets its failures back
+    assert buf.add("a", ("po", "4")) == [failure("a", ("po", "4"), "rejected")]
+    assert rec.batches == [("a", [("po", "1"), ("po", "3"), ("po", "4")])]
+    assert buf.pending() == 1
+
+
+def test_flushes_at_max_bytes():
+    rec = Recorder()
+    buf = buffer(rec, max_items=100, max_bytes=10)
+    buf.add("a", ("po", "1"), 6)
+    assert rec.batches == []
+    buf.add("a", ("po", "2"), 6)
+    assert [len(items) for _, items in rec.batches] == [2]
+
+
+def test_background_flush_at_max_age():
+    rec = Recorder()
+    buf = buffer(rec, max_items=100, max_age_s=0.05)
+    try:
+        buf.add("a", ("po", "1"))
+        buf.add("a", ("po", "2"))
+        wait_for(lambda: rec.batches)
+        assert rec.batches == [("a", [("po", "1"), ("po", "2")])]
+        assert buf.pending() == 0
+    finally:
+        buf.close()
+
+
+def test_background_failures_are_returned_by_the_next_flush():
+    rec = Recorder()
+    rec.fail_ids = {"2"}
+    buf = buffer(rec, max_items=100, max_age_s=0.05)
+    try:
+        buf.add("a", ("po", "1"))
+        buf.add("a", ("po", "2"))
+        wait_for(lambda: rec.batches)
+        assert buf.flush() == [failure("a", ("po", "2"), "rejected")]
+        assert buf.flush() == []
+    finally:
+        buf.close()
+
+
+def test_a_raising_flush_fails_every_item():
+    rec = Recorder()
+    rec.raise_with = "down"
+    buf = buffer(rec, max_items=2)
+    buf.add("a", ("po", "1"))
+    assert buf.add("a", ("po", "2")) == [failure("a", ("po", "1"), "down"), failure("a", ("po", "2"), "down")]
+
+
+def test_deferred_failures_come_back_from_flush():
+    buf = buffer(Recorder())
+    buf.defer([{"entity": "po", "id": "9", "error": "x"}])
+    assert buf.flush() == [{"entity": "po", "id": "9", "error": "x"}]
+
+
+def test_close_drains_every_key():
+    rec = Recorder()
+    buf = buffer(rec, max_items=100, max_age_s=60)
+    buf.add("a", ("po", "1"))
+    buf.add("b", ("po", "2"))
+    assert buf.close() == []
+    assert sorted(rec.batches) == [("a", [("po", "1")]), ("b", [("po", "2")])]
+    assert buf.pending() == 0
+    with pytest.raises(RuntimeError, match="closed"):
+        buf.add("a", ("po", "3"))
@@ -0,0 +1,104 @@
+from __future__ import annotations
+import json
+from decimal import Decimal
+
+import pytest
+
+from sinks.bq_append import BigQueryAppendSink
+
+TABLE = "analytics.purchase_orders"
+
+
+class StubBigQuery:
+    # insert_rows_json reports rows whose id is in fail_ids (or raises fail); load jobs
+    # record their NDJSON
+    def __init__(self):
+        self.inserts = []
+        self.loads = []
+        self.fail_ids = set()
+        self.fail = None
+
+    def insert_rows_json(self, table, rows):
+        if self.fail:
+            raise RuntimeError(self.fail)
+        self.inserts.append((table, list(rows)))
+        return [{"index": i, "errors": [{"reason": "invalid"}]} for i, r in enumerate(rows) if r.get("id") in self.fail_ids]
+
+    def load_table_from_file(self, fileobj, table, job_config=None):
+        self.loads.append((table, [json.loads(line) for line in fileobj.read().decode("utf-8").splitlines()]))
+        return type("Job", (), {"result": lambda self: None})()
+
+
+@pytest.fixture
+def bq():
+    return StubBigQuery()
+
+
+@pytest.fixture
+def make_sink(make_manager, bq):
+    def make(**cfg):
+        manager = make_manager(analytics=bq)
+        sink = BigQueryAppendSink("po_bq", {"kind": "bq_append", "source": "analytics", "table": TABLE, **cfg}, manager)
+        manager.add_close_hook(sink.close)
+        return sink
+
+    return make
+
+
+def row(i):
+    return {"id": i, "status": "open", "total_amount": Decimal("1.50")}
+
+
+def test_unbatched_insert_per_row(make_sink, bq):
+    sink = make_sink()
+    sink.on_create("purchase_order", {"id": 1})
+    sink.on_update("purchase_order", {"id": 1})
+    assert [len(rows) for _, rows in bq.inserts] == [1, 1]
+    bq.fail_ids = {2}
+    with pytest.raises(RuntimeError, match="BigQuery insert errors"):
+        sink.on_create("purchase_order", {"id": 2})
+
+
+def test_batched_rows_stream_at_max_rows(make_sink, bq):
+    sink = make_sink(batch={"max_rows": 3, "max_age_s": 0})
+    for i in range(1, 8):
+        sink.on_create("purchase_order", row(i))
+    assert [len(rows) for _, rows in bq.inserts] == [3, 3]
+    # rows are JSON-encoded before buffering
+    assert bq.inserts[0][1][0] == {"id": 1, "status": "open", "total_amount": "1.50"}
+    assert sink.close() == []
+    assert [len(rows) for _, rows in bq.inserts] == [3, 3, 1]
+
+
+def test_row_errors_map_back_to_their_rows(make_sink, bq):
+    sink = make_sink(batch={"max_rows": 3, "max_age_s": 0})
+    bq.fail_ids = {1, 3}
+    sink.on_create("purchase_order", row(1))
+    sink.on_create("purchase_order", row(2))
+    with pytest.raises(RuntimeError, match="BigQuery insert errors"):
+        sink.on_create("purchase_order", row(3))
+    (late,) = sink.flush()
+    assert (late["sink"], late["entity"], late["id"]) == ("po_bq", "purchase_order", "1")
+
+
+def test_a_failed_insert_fails_every_row(make_sink, bq):
+    sink = make_sink(batch={"max_rows": 10, "max_age_s": 0})
+    sink.on_create("purchase_order", row(1))
+    sink.on_create("purchase_order", row(2))
+    bq.fail = "quota exceeded"
+    assert [(f["id"], f["error"]) for f in sink.flush()] == [("1", "quota exceeded"), ("2", "quota exceeded")]
+
+
+def test_bulk_switches_to_a_load_job(make_sink, bq):
+    sink = make_sink(load_job_rows=4)
+    sink.on_bulk("purchase_order", "create", rows=[row(i) for i in range(1, 4)])
+    sink.on_bulk("purchase_order", "create", rows=[row(i) for i in range(1, 6)])
+    assert [len(rows) for _, rows in bq.inserts] == [3]
+    assert [(t, len(rows)) for t, rows in bq.loads] == [(TABLE, 5)]
+    sink.on_bulk("purchase_order", "delete", ids=[1, 2])
+    assert len(bq.inserts) == 1 and len(bq.loads) == 1
+
+
+def test_unreachable_batch_load_job_rows_is_rejected(make_sink):
+    with pytest.raises(ValueError, match="never reach it"):
+        make_sink(batch={"max_rows": 500, "load_job_rows": 5000})
@@ -0,0 +1,62 @@
+from __future__ import annotations
+from decimal import Decimal
+
+
+def test_bulk_create_maps_results_to_input_order(crud):
+    res = crud.bulk_create("purchase_order", [
+        {"po_number": "PO-9001", "status": "open", "vendor_id": 1},
+        "not an object",
+        {"po_number": "PO-9002", "status": "draft", "total_amount": Decimal("12.50"), "ignored": 1},
+    ])
+    assert (res["succeeded"], res["failed"]) == (2, 1)
+    assert [r["index"] for r in res["items"]] == [0, 1, 2]
+    assert [r["ok"] for r in res["items"]] == [True, False, True]
+    assert res["items"][1]["error"] == "item must be an object"
+    assert res["items"][0]["row"]["po_number"] == "PO-9001"
+    assert res["items"][2]["row"]["total_amount"] == Decimal("12.50")
+    assert "ignored" not in res["items"][2]["row"]
+    assert crud.get_one("purchase_order", res["items"][2]["row"]["id"])["status"] == "draft"
+
+
+def test_bulk_create_isolates_a_failing_row(crud):
+    # PO-0001 already exists (unique po_number): only that row fails, the rest of its group commits
+    res = crud.bulk_create("purchase_order", [
+        {"po_number": "PO-9101", "status": "open"},
+        {"po_number": "PO-0001", "status": "open"},
+        {"po_number": "PO-9102", "status": "open"},
+    ])
+    assert [r["ok"] for r in res["items"]] == [True, False, True]
+    assert (res["succeeded"], res["failed"]) == (2, 1)
+    assert crud.list("purchase_order", page=1, size=5, filters={"po_number__prefix": "PO-91"})["total"] == 2
+
+
+def test_bulk_update(crud):
+    res = crud.bulk_update("purchase_order", [
+        {"id": 1, "status": "approved"},
+        {"id": 999, "status": "approved"},
+        {"id": 1, "status": "closed"},
+        {"status": "closed"},
+        {"id": 2, "nope": 1},
+        {"id": 3, "total_amount": Decimal("1.25")},
+    ])
+    ok = [r["ok"] for r in res["items"]]
+    assert ok == [True, False, False, False, False, True]
+    errors = [r.get("error") for r in res["items"]]
+    assert errors[1] == "purchase_order not found id=999"
+    assert errors[2].startswith("duplicate id")
+    assert errors[3] == "item must be an object with 'id'"
+    assert errors[4] == "no writable fields"
+    assert res["items"][0]["row"]["status"] == "approved"
+    assert crud.get_one("purchase_order", 3)["total_amount"] == Decimal("1.25")
+
+
+def test_bulk_delete(crud):
+    res = crud.bulk_delete("purchase_order", [1, 999, 2])
+    assert [(r["id"], r["ok"]) for r in res["items"]] == [(1, True), (999, False), (2, True)]
+    assert (res["succeeded"], res["failed"]) == (2, 1)
+    assert crud.get_one("purchase_order", 1) is None
+    assert crud.list("purchase_order", page=1, size=1)["total"] == 28
+
+
+def test_bulk_delete_empty(crud):
+    assert crud.bulk_delete("purchase_order", []) == {"items": [], "succeeded": 0, "failed": 0}
@@ -0,0 +1,190 @@
+from __future__ import annotations
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import update
+
+from bench.fixtures import bench_metadata
+from engine.post_write import PostWritePipeline
+from sinks.cache_set import CacheSetSink
+from sources.crud.entity_cache import EntityCache, LocalTier, MemoryTier
+
+CACHED = {"cache": {"ttl_s": 60}}
+PO = bench_metadata().tables["purchase_orders"]
+
+# purchase_order without the vendors join: written rows have the get_one shape
+SINGLE_TABLE = {
+    "joins": [],
+    "fields": {"id": "purchase_orders.id", "po_number": "purchase_orders.po_number", "status": "purchase_orders.status"},
+    "search": ["po_number"],
+}
+
+
+class DownTier:
+    # a shared tier whose server is unreachable
+    remote = True
+
+    def _down(self, *a, **kw):
+        raise ConnectionError("redis down")
+
+    get = set = delete = get_int = incr = _down
+
+    def close(self):
+        pass
+
+
+def make_cache(tier: str, shared=None, **kw) -> EntityCache:
+    if tier == "memory" and shared is None:
+        shared = MemoryTier()
+    return EntityCache(local=LocalTier(), shared=shared, **kw)
+
+
+@pytest.fixture(params=["local", "memory"])
+def tier(request) -> str:
+    # local: generations live in the process; memory: in the shared-tier stand-in
+    return request.param
+
+
+@pytest.fixture
+def cached(make_crud, tier):
+    """
+    (crud, cache, pipeline) for purchase_order reading through the cache; the pipeline
+    notifies the cache of writes, as app.main wires it.
+    """
+    cache = make_cache(tier)
+    crud = make_crud(entity_cache=cache, **CACHED)
+    return crud, cache, PostWritePipeline(None, {"purchase_order": {}}, listeners=[cache.invalidate])
+
+
+def write_behind(engine, id_value, **values):
+    # a write the cache hasn't been told about (yet)
+    with engine.begin() as conn:
+        conn.execute(update(PO).where(PO.c.id == id_value).values(**values))
+
+
+def test_get_one_reads_through(cached):
+    crud, cache, _ = cached
+    assert crud.get_one("purchase_order", 3)["po_number"] == "PO-0003"
+    assert crud.get_one("purchase_order", 3)["po_number"] == "PO-0003"
+    stats = cache.stats()
+    assert (stats["misses"], stats["hits"], stats["sets"]) == (1, 1, 1)
+
+
+def test_write_bumps_generation_and_read_misses_stale_entry(engine, cached):
+    crud, cache, pipeline = cached
+    crud.get_one("purchase_order", 3)
+    gen = cache.gen("purchase_order")
+    write_behind(engine, 3, status="void")
+    # not yet notified: the cached row is served
+    assert crud.get_one("purchase_order", 3)["status"] == "open"
+
+    pipeline.run("purchase_order", "update", row={"id": 3})
+    assert cache.gen("purchase_order") == gen + 1
+    assert crud.get_one("purchase_order", 3)["status"] == "void"
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_write_through_crud_invalidates_list_pages(cached):
+    crud, cache, pipeline = cached
+    before = crud.list("purchase_order", page=1, size=5, filters={"status": "open"})
+    assert crud.list("purchase_order", page=1, size=5, filters={"status": "open"}) == before
+
+    row = crud.update("purchase_order", 1, {"status": "closed"})
+    pipeline.run("purchase_order", "update", row=row)
+    after = crud.list("purchase_order", page=1, size=5, filters={"status": "open"})
+    assert 1 in [r["id"] for r in before["items"]]
+    assert 1 not in [r["id"] for r in after["items"]]
+
+
+def test_base_table_write_bumps_joining_entities(tier, make_crud):
+    cache = make_cache(tier)
+    make_crud(entity_cache=cache, **CACHED)
+    gens = {name: cache.gen(name) for name in ("purchase_order", "po_with_totals")}
+    cache.invalidate("purchase_order", "update")
+    # po_with_totals reads purchase_orders too
+    assert {name: cache.gen(name) for name in gens} == {name: g + 1 for name, g in gens.items()}
+
+
+def test_shared_generation_reaches_other_processes(engine, make_crud):
+    shared = MemoryTier()
+    writer = make_cache("memory", shared)
+    reader = make_cache("memory", shared, gen_ttl_s=0)
+    make_crud(entity_cache=writer, **CACHED)
+    crud = make_crud(entity_cache=reader, **CACHED)
+
+    assert crud.get_one("purchase_order", 4)["status"] == "closed"
+    write_behind(engine, 4, status="void")
+    writer.invalidate("purchase_order", "update")
+    assert crud.get_one("purchase_order", 4)["status"] == "void"
+
+
+def test_shared_tier_down_serves_nothing_cached(make_crud):
+    cache = make_cache("memory", DownTier())
+    crud = make_crud(entity_cache=cache, **CACHED)
+
+    for _ in range(2):
+        assert crud.get_one("purchase_order", 5)["po_number"] == "PO-0005"
+    # every lookup gets a throwaway generation, so the locally stored row is never hit
+    assert cache.gen("purchase_order") < 0
+    cache.invalidate("purchase_order", "update")
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (0, 2)
+    assert stats["errors"] > 0
+
+
+def test_cache_set_sink_populates_get_one(tier, make_crud, make_manager):
+    cache = make_cache(tier)
+    crud = make_crud(["purchase_order"], entity_cache=cache, **CACHED, **SINGLE_TABLE)
+    sink = CacheSetSink("po_cache", {"kind": "cache_set", "source": "cache_main", "ttl_s": 60}, make_manager(cache_main=cache))
+
+    row = crud.create("purchase_order", {"po_number": "PO-9001", "status": "open", "total_amount": Decimal(1)})
+    sink.on_create("purchase_order", {**row, "vendor_id": None, "total_amount": Decimal(1)})
+    assert crud.get_one("purchase_order", row["id"]) == {"id": row["id"], "po_number": "PO-9001", "status": "open"}
+    assert cache.stats()["misses"] == 0
+
+
+def test_cache_set_sink_skips_joined_entities(make_crud, make_manager):
+    cache = make_cache("local")
+    make_crud(entity_cache=cache, **CACHED)
+    sink = CacheSetSink("po_cache", {"kind": "cache_set", "source": "cache_main"}, make_manager(cache_main=cache))
+    gen = cache.gen("purchase_order")
+
+    sink.on_update("purchase_order", {"id": 3, "po_number": "PO-0003", "status": "open", "vendor_id": 4, "total_amount": 30})
+    # vendor_name comes from the join: no row to write back, only the bump
+    assert cache.gen("purchase_order") == gen + 1
+    assert cache.stats()["sets"] == 0
+
+
+# ---- LocalTier ----
+
+def test_local_tier_evicts_least_recently_used():
+    local = LocalTier(max_entries=2)
+    local.set("a", b"1", 60)
+    local.set("b", b"2", 60)
+    local.get("a")
+    local.set("c", b"3", 60)
+    assert (local.get("a"), local.get("b"), local.get("c")) == (b"1", None, b"3")
+    assert local.evictions == 1
+
+
+def test_local_tier_bounded_by_bytes():
+    local = LocalTier(max_bytes=10)
+    local.set("a", b"x" * 6, 60)
+    local.set("b", b"y" * 6, 60)
+    assert local.get("a") is None
+    assert local.size() == (1, 6)
+    # larger than the whole tier: not stored, nothing evicted for it
+    local.set("c", b"z" * 11, 60)
+    assert local.get("c") is None and local.get("b") == b"y" * 6
+
+
+def test_local_tier_entries_expire(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr("sources.crud.entity_cache.time.monotonic", lambda: clock[0])
+    local = LocalTier()
+    local.set("a", b"1", 5)
+    clock[0] += 4
+    assert local.get("a") == b"1"
+    clock[0] += 2
+    assert local.get("a") is None
+    assert (local.expirations, local.size()) == (1, (0, 0))
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import pytest
+
+from sinks.es_index import ElasticsearchIndexSink
+
+INDEX = "purchase_order_index"
+
+
+@pytest.fixture
+def make_sink(make_manager, stub_es):
+    def make(**cfg):
+        manager = make_manager(search_main=stub_es)
+        sink = ElasticsearchIndexSink("po_es", {"kind": "es_index", "source": "search_main", "index": INDEX, **cfg}, manager)
+        manager.add_close_hook(sink.close)
+        return sink
+
+    return make
+
+
+def row(i, **kw):
+    return {"id": i, "po_number": f"PO-{i:04d}", "status": "open", **kw}
+
+
+def test_unbatched_writes_go_one_by_one(make_sink, stub_es):
+    sink = make_sink(fields=["id", "status"])
+    sink.on_create("purchase_order", row(1))
+    sink.on_delete("purchase_order", 2)
+    assert stub_es.calls == [("index", INDEX, "1"), ("delete", INDEX, "2")]
+    assert stub_es.docs[(INDEX, "1")] == {"id": 1, "status": "open"}
+
+
+def test_batched_writes_go_through_bulk_at_max_actions(make_sink, stub_es):
+    sink = make_sink(batch={"max_actions": 3, "max_age_s": 0})
+    for i in range(1, 8):
+        sink.on_update("purchase_order", row(i))
+    assert stub_es.bulk_sizes == [3, 3]
+    assert sink.flush() == []
+    assert stub_es.bulk_sizes == [3, 3, 1]
+    assert len(stub_es.docs) == 7
+
+
+def test_own_item_failure_raises_others_are_deferred(make_sink, stub_es):
+    sink = make_sink(batch={"max_actions": 3, "max_age_s": 0})
+    stub_es.item_errors = {"1": 400, "3": 429}
+    sink.on_create("purchase_order", row(1))
+    sink.on_create("purchase_order", row(2))
+    # this write's own doc failed: the writer sees it
+    with pytest.raises(RuntimeError, match="Elasticsearch bulk failure"):
+        sink.on_create("purchase_order", row(3))
+    # the other row's failure is kept for flush(), with entity/id/status
+    (late,) = sink.flush()
+    assert (late["entity"], late["id"], late["status"], late["action"]) == ("purchase_order", "1", 400, "index")
+
+
+def test_a_failed_bulk_request_fails_every_item(make_sink, stub_es):
+    sink = make_sink(batch={"max_actions": 10, "max_age_s": 0})
+    sink.on_create("purchase_order", row(1))
+    sink.on_delete("purchase_order", 2)
+    stub_es.fail = "cluster unavailable"
+    failures = sink.flush()
+    assert [(f["entity"], f["id"], f["error"]) for f in failures] == [
+        ("purchase_order", "1", "cluster unavailable"),
+        ("purchase_order", "2", "cluster unavailable"),
+    ]
+
+
+def test_shutdown_drains_the_buffer(make_sink, stub_es):
+    sink = make_sink(batch={"max_actions": 100, "max_age_s": 60})
+    sink.on_create("purchase_order", row(1))
+    sink.on_create("purchase_order", row(2))
+    assert stub_es.bulk_sizes == []
+    assert sink.close() == []
+    assert stub_es.bulk_sizes == [2]
+
+
+def test_on_bulk_chunks_by_max_actions(make_sink, stub_es):
+    sink = make_sink(batch={"max_actions": 2, "max_age_s": 0})
+    sink.on_bulk("purchase_order", "create", rows=[row(i) for i in range(1, 6)])
+    assert stub_es.bulk_sizes == [2, 2, 1]
+    stub_es.item_errors = {"2": 404}
+    # deleting a missing doc is not a failure
+    sink.on_bulk("purchase_order", "delete", ids=[1, 2])
+    stub_es.item_errors = {"3": 400}
+    with pytest.raises(RuntimeError, match="1 item"):
+        sink.on_bulk("purchase_order", "update", rows=[row(3), row(4)])
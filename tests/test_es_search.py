@@ -0,0 +1,64 @@
+from __future__ import annotations
+import pytest
+from sqlalchemy import MetaData
+
+from entities.spec import parse_entity_spec
+from sources.crud.sql_row import SqlRowCrud
+
+SINK = {"kind": "es_index", "name": "po_es", "source": "search_main", "index": "purchase_order_index", "id_key": "id"}
+
+
+class StubSearch:
+    # DocumentCrud.search: hits carry what the es_index sink indexed (base-table columns)
+    def __init__(self, hits):
+        self.hits = hits
+        self.calls = []
+
+    def search(self, index, *, q, page, size, filters=None, fields=None, source=True, track_total_hits=True):
+        self.calls.append({"index": index, "q": q, "source": source})
+        hits = self.hits[(page - 1) * size:page * size]
+        items = [{k: h.get(k) for k in source} for h in hits] if source else [{} for _ in hits]
+        return {"items": items, "ids": [str(h["id"]) for h in hits], "total": len(self.hits)}
+
+
+@pytest.fixture
+def es_crud(engine, entities_cfg):
+    return lambda fields, indexed: _es_crud(engine, entities_cfg["purchase_order"], fields, indexed)
+
+
+def _es_crud(engine, cfg, fields, indexed):
+    cfg["read"].update(search_mode="es", fields={k: cfg["read"]["fields"][k] for k in fields})
+    cfg["post_write"] = {"sinks": [dict(SINK, fields=indexed)]}
+    meta = MetaData()
+    meta.reflect(bind=engine)
+    # what the sink wrote: the base-table row, projected to its fields
+    hits = [{"id": i, "po_number": f"PO-{i:04d}", "status": "open", "total_amount": i * 10} for i in (3, 1)]
+    client = StubSearch([{k: h.get(k) for k in indexed if k in h} for h in hits])
+    crud = SqlRowCrud(engine, meta, {"purchase_order": parse_entity_spec("purchase_order", cfg)}, search_clients={"search_main": client})
+    return crud, client
+
+
+def test_joined_field_hydrates_from_sql(es_crud):
+    # vendor_name reads v.name through the join: the indexed base row never has it
+    crud, client = es_crud(["id", "po_number", "vendor_name"], ["id", "po_number", "vendor_name"])
+    out = crud.list("purchase_order", page=1, size=10, q="PO")
+    assert client.calls[-1]["source"] is False
+    assert out["items"] == [
+        {"id": 3, "po_number": "PO-0003", "vendor_name": "vendor4"},
+        {"id": 1, "po_number": "PO-0001", "vendor_name": "vendor2"},
+    ]
+    assert out["total"] == 2
+
+
+def test_base_fields_in_the_sink_come_from_source(es_crud):
+    crud, client = es_crud(["id", "po_number", "status"], ["id", "po_number", "status"])
+    out = crud.list("purchase_order", page=1, size=10, q="PO")
+    assert client.calls[-1]["source"] == ["id", "po_number", "status"]
+    assert [r["id"] for r in out["items"]] == [3, 1]
+
+
+def test_fields_the_sink_does_not_index_hydrate_from_sql(es_crud):
+    crud, client = es_crud(["id", "po_number", "status"], ["id", "po_number"])
+    out = crud.list("purchase_order", page=1, size=10, q="PO")
+    assert client.calls[-1]["source"] is False
+    assert out["items"][0] == {"id": 3, "po_number": "PO-0003", "status": "open"}
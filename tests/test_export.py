@@ -0,0 +1,143 @@
+from __future__ import annotations
+import csv
+import io
+import json
+from decimal import Decimal
+
+import pyarrow as pa
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import MetaData, create_engine, insert, select
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+import app.main as main
+from bench.fixtures import bench_metadata
+from engine.post_write import PostWritePipeline
+from entities.spec import parse_entity_spec
+from sources.crud.sql_row_async import AsyncSqlRowCrud
+
+ROWS = 250  # the 30 fixture orders plus 220 more: several 100-row export batches
+PO_FIELDS = ["id", "po_number", "status", "vendor_name", "total_amount"]
+
+
+class _Manager:
+    config = {"routing": {"active_source": "db_main"}}
+    sources = {}
+
+    async def aclose(self):
+        pass
+
+
+@pytest.fixture
+def orders(engine):
+    po = bench_metadata().tables["purchase_orders"]
+    with engine.begin() as conn:
+        conn.execute(insert(po), [
+            {"id": i, "po_number": f"PO-{i:04d}", "vendor_id": i % 5 + 1, "status": "open" if i % 2 else "closed", "total_amount": Decimal(i)}
+            for i in range(31, ROWS + 1)
+        ])
+    return engine
+
+
+def async_crud(engine, entities_cfg, path):
+    # aiosqlite can't share the sync fixture's in-memory database: copy it to a file
+    url = f"sqlite:///{path}"
+    meta = bench_metadata()
+    copy = create_engine(url)
+    meta.create_all(copy)
+    with engine.connect() as src, copy.begin() as dst:
+        for table in meta.sorted_tables:
+            rows = [dict(r) for r in src.execute(select(table)).mappings()]
+            if rows:
+                dst.execute(insert(table), rows)
+    reflected = MetaData()
+    reflected.reflect(bind=copy)
+    copy.dispose()
+    specs = {name: parse_entity_spec(name, c) for name, c in entities_cfg.items()}
+    return AsyncSqlRowCrud(create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool), reflected, specs)
+
+
+@pytest.fixture(params=["sync", "async"])
+def client(request, orders, make_crud, entities_cfg, tmp_path, monkeypatch):
+    if request.param == "sync":
+        crud = make_crud()
+    else:
+        crud = async_crud(orders, entities_cfg, tmp_path / "export.db")
+    pipeline = PostWritePipeline(manager=_Manager(), entity_specs={}, listeners=[crud.invalidate_counts])
+    monkeypatch.setattr(main, "_runtime", (crud, pipeline))
+    with TestClient(main.app) as c:
+        yield c
+
+
+def export(client, query=""):
+    r = client.get(f"/api/purchase_order/export?{query}")
+    assert r.status_code == 200, r.text
+    return r
+
+
+def test_ndjson(client):
+    r = export(client)
+    assert r.headers["content-type"] == "application/x-ndjson"
+    assert r.headers["content-disposition"] == 'attachment; filename="purchase_order.ndjson"'
+    rows = [json.loads(line) for line in r.text.splitlines()]
+    assert len(rows) == ROWS
+    assert list(rows[0]) == PO_FIELDS
+    assert rows[2] == {"id": 3, "po_number": "PO-0003", "status": "open", "vendor_name": "vendor4", "total_amount": 30}
+
+
+def test_csv_header_once_across_batches(client):
+    r = export(client, "format=csv&batch_size=100")
+    assert r.headers["content-type"] == "text/csv; charset=utf-8"
+    assert r.headers["content-disposition"] == 'attachment; filename="purchase_order.csv"'
+    header, *rows = list(csv.reader(io.StringIO(r.text)))
+    assert header == PO_FIELDS
+    assert len(rows) == ROWS
+    # None -> empty cell, Decimal -> number
+    assert rows[9] == ["10", "PO-0010", "closed", "", "100.0"]
+
+
+def test_filters_search_and_fields_apply(client):
+    r = export(client, "format=csv&status=open&total_amount__gte=100&fields=id,status")
+    header, *rows = list(csv.reader(io.StringIO(r.text)))
+    assert header == ["id", "status"]
+    assert {s for _, s in rows} == {"open"}
+    assert len(rows) == len([i for i in range(1, ROWS + 1) if i % 2 and (i * 10 if i <= 30 else i) >= 100])
+
+    rows = [json.loads(line) for line in export(client, "q=vendor2&fields=id,vendor_name").text.splitlines()]
+    assert rows and {r["vendor_name"] for r in rows} == {"vendor2"}
+
+
+def test_columns_line_per_batch(client):
+    lines = [json.loads(line) for line in export(client, "format=columns&batch_size=100&fields=id").text.splitlines()]
+    assert [len(line["data"]["id"]) for line in lines] == [100, 100, 50]
+    assert {tuple(line["columns"]) for line in lines} == {("id",)}
+
+
+def test_arrow_record_batch_per_batch(client):
+    r = export(client, "format=arrow&batch_size=100&fields=id,po_number,total_amount")
+    assert r.headers["content-disposition"] == 'attachment; filename="purchase_order.arrows"'
+    reader = pa.ipc.open_stream(r.content)
+    assert reader.schema.names == ["id", "po_number", "total_amount"]
+    batches = list(reader)
+    assert [b.num_rows for b in batches] == [100, 100, 50]
+    table = pa.Table.from_batches(batches)
+    assert table.column("id").to_pylist() == list(range(1, ROWS + 1))
+
+
+def test_no_match_still_has_headers(client):
+    r = export(client, "format=csv&status=void&fields=id,po_number")
+    assert r.text == "id,po_number\n"
+    assert export(client, "status=void").text == ""
+
+
+def test_bad_input_is_a_400_before_streaming(client):
+    assert client.get("/api/purchase_order/export?nofield=1").status_code == 400
+    assert client.get("/api/purchase_order/export?fields=nofield").status_code == 400
+    assert client.get("/api/purchase_order/export?batch_size=10").status_code == 422
+
+
+def test_crud_export_streams_batches(orders, crud):
+    batches = list(crud.export("purchase_order", filters={"id__lte": "30"}, batch_size=7, fields=["id"]))
+    assert [len(rows) for _, rows in batches] == [7, 7, 7, 7, 2]
+    assert {tuple(keys) for keys, _ in batches} == {("id",)}
@@ -0,0 +1,95 @@
+from __future__ import annotations
+import uuid
+from datetime import date, datetime, time
+from decimal import Decimal
+
+import pytest
+
+from sources.crud.keyset import decode_cursor, encode_cursor
+
+
+def walk(crud, entity, size, **kw):
+    pages, cursor = [], ""
+    while cursor is not None:
+        out = crud.list(entity, page=1, size=size, cursor=cursor, **kw)
+        pages.append(out)
+        cursor = out["next_cursor"]
+    return pages
+
+
+def test_cursor_round_trip_keeps_types():
+    values = [Decimal("1.50"), datetime(2024, 1, 2, 3, 4, 5), date(2024, 1, 2), time(3, 4), uuid.UUID(int=7), "a", 3, None]
+    assert decode_cursor(encode_cursor(values)) == values
+    assert isinstance(decode_cursor(encode_cursor([Decimal("1.50")]))[0], Decimal)
+
+
+@pytest.mark.parametrize("token", ["not base64!", encode_cursor([1])[:-1] + "$", "eyJhIjoxfQ"])
+def test_invalid_cursor(token):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(token)
+
+
+def test_walks_every_row_once(crud):
+    pages = walk(crud, "purchase_order", 7)
+    seen = [r["id"] for p in pages for r in p["items"]]
+    assert seen == list(range(1, 31))
+    assert [len(p["items"]) for p in pages] == [7, 7, 7, 7, 2]
+    assert [p["has_more"] for p in pages] == [True] * 4 + [False]
+
+
+def test_keyset_pages_skip_the_count_by_default(crud):
+    out = crud.list("purchase_order", page=1, size=5, cursor="")
+    assert out["total"] is None
+    assert out["total_mode"] == "none"
+    exact = crud.list("purchase_order", page=1, size=5, cursor="", total="exact")
+    assert exact["total"] == 30
+    assert "has_more" not in exact
+    assert exact["next_cursor"] == out["next_cursor"]
+
+
+def test_cursor_total_config(make_crud):
+    crud = make_crud(cursor_total="exact")
+    assert crud.list("purchase_order", page=1, size=5, cursor="")["total"] == 30
+
+
+def test_keyset_with_filters(crud):
+    pages = walk(crud, "purchase_order", 4, filters={"status": "closed"})
+    assert [r["id"] for p in pages for r in p["items"]] == list(range(2, 31, 2))
+
+
+def test_cursor_key_ties_break_on_pk(make_crud):
+    crud = make_crud(entities=["purchase_order"], cursor_key="status")
+    pages = walk(crud, "purchase_order", 4)
+    assert [r["id"] for p in pages for r in p["items"]] == list(range(2, 31, 2)) + list(range(1, 31, 2))
+
+
+def test_keyset_fields_still_seek(crud):
+    # next_cursor is read off the sort keys, which fields= doesn't have to name
+    pages = walk(crud, "purchase_order", 8, fields=["status"])
+    assert sum(len(p["items"]) for p in pages) == 30
+
+
+def test_keyset_on_a_custom_query(crud):
+    pages = walk(crud, "po_with_totals", 9)
+    assert [r["id"] for p in pages for r in p["items"]] == list(range(1, 31))
+
+
+@pytest.mark.parametrize("strategy", ["serial", "window", "cte", "concurrent"])
+@pytest.mark.parametrize("columnar", [False, True])
+@pytest.mark.parametrize("query", [dict(filters={"status": "nope"}), dict(q="zzz")])
+def test_empty_keyset_page(make_crud, strategy, columnar, query):
+    crud = make_crud(entities=["purchase_order"], list_strategy=strategy)
+    for total in (None, "exact"):
+        out = crud.list("purchase_order", page=1, size=5, cursor="", total=total, columnar=columnar, **query)
+        assert out["items"] == []
+        assert out["next_cursor"] is None
+        assert out["total"] == (0 if total else None)
+
+
+def test_last_page_exactly_full(crud):
+    out = crud.list("purchase_order", page=1, size=30, cursor="")
+    assert len(out["items"]) == 30
+    assert out["next_cursor"] is None
+    # a cursor past the last row is an empty page, not an error
+    last = encode_cursor([30])
+    assert crud.list("purchase_order", page=1, size=5, cursor=last, columnar=True)["items"] == []
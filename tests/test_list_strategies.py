@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import pytest
+
+from sources.crud.sql_row import LIST_STRATEGIES
+
+CASES = [
+    dict(page=1, size=7),
+    dict(page=3, size=7),
+    dict(page=9, size=7),
+    dict(page=1, size=5, q="vendor2"),
+    dict(page=2, size=3, q="PO-001"),
+    dict(page=1, size=5, q="zzz"),
+    dict(page=2, size=4, filters={"status": "open"}, fields=["status"]),
+    dict(page=1, size=5, cursor=""),
+]
+
+
+@pytest.mark.parametrize("strategy", [s for s in LIST_STRATEGIES if s != "serial"])
+@pytest.mark.parametrize("entity", ["purchase_order", "po_with_totals"])
+def test_strategies_match_serial(make_crud, strategy, entity):
+    serial, other = make_crud(list_strategy="serial"), make_crud(list_strategy=strategy)
+    for case in CASES:
+        if entity == "po_with_totals" and "q" in case:
+            continue
+        assert other.list(entity, **case) == serial.list(entity, **case), case
+
+
+def test_empty_page_past_the_end_still_has_a_total(make_crud):
+    for strategy in LIST_STRATEGIES:
+        out = make_crud(list_strategy=strategy).list("purchase_order", page=50, size=10)
+        assert out == {"items": [], "total": 30}, strategy
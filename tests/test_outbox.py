@@ -0,0 +1,153 @@
+from __future__ import annotations
+import json
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import func, select
+
+from engine.outbox import Outbox, OutboxWorker
+from engine.post_write import PostWritePipeline
+
+INDEX = "purchase_order_index"
+
+
+def es_sink(name="po_es", source="search_main", **cfg):
+    return {"kind": "es_index", "name": name, "source": source, "index": INDEX, "id_key": "id", **cfg}
+
+
+POST = {"mode": "outbox", "sinks": [es_sink()]}
+
+
+@pytest.fixture
+def outbox(engine):
+    box = Outbox()
+    box.create_table(engine)
+    return box
+
+
+@pytest.fixture
+def setup(engine, outbox, make_crud, make_manager, stub_es):
+    """
+    setup(post_write=POST, **clients) -> (crud, worker); sinks reach stub clients by
+    source name (search_main: stub_es by default).
+    """
+    def make(post_write=POST, **clients):
+        crud = make_crud(["purchase_order"], post_write=post_write, outbox=outbox)
+        pipeline = PostWritePipeline(make_manager(**({"search_main": stub_es} | clients)), {"purchase_order": {"post_write": post_write}})
+        worker = OutboxWorker(engine, outbox, pipeline, backoff_base_s=0, max_attempts=3)
+        return crud, worker
+
+    return make
+
+
+def events(engine, outbox):
+    with engine.connect() as conn:
+        return [dict(r) for r in conn.execute(select(outbox.table).order_by(outbox.table.c.id)).mappings()]
+
+
+def test_event_commits_with_the_write(engine, outbox, setup):
+    crud, _ = setup()
+    row = crud.create("purchase_order", {"po_number": "PO-9001", "status": "open", "total_amount": Decimal("12.50")})
+    (ev,) = events(engine, outbox)
+    assert (ev["entity"], ev["action"], ev["id_value"], ev["status"]) == ("purchase_order", "create", str(row["id"]), "pending")
+    # encoded like the JSON responses: Decimal -> number
+    assert ev["row"]["total_amount"] == 12.5
+
+
+def test_event_is_in_the_write_transaction(engine, outbox, setup):
+    crud, _ = setup()
+    with pytest.raises(RuntimeError, match="abort"):
+        with engine.begin() as conn:
+            crud._update(conn, "purchase_order", 1, {"status": "approved"})
+            assert conn.execute(select(func.count()).select_from(outbox.table)).scalar_one() == 1
+            raise RuntimeError("abort")
+    assert events(engine, outbox) == []
+    assert crud.get_one("purchase_order", 1)["status"] == "open"
+
+
+def test_failed_write_leaves_no_event(engine, outbox, setup):
+    crud, _ = setup()
+    with pytest.raises(Exception):
+        crud.create("purchase_order", {"po_number": "PO-0001", "status": "open"})  # unique po_number
+    assert events(engine, outbox) == []
+
+
+def test_bulk_events_are_keyed_by_pk(engine, outbox, setup):
+    crud, _ = setup()
+    crud.bulk_delete("purchase_order", [1, 999, 2])
+    assert [(e["action"], e["id_value"]) for e in events(engine, outbox)] == [("delete", "1"), ("delete", "2")]
+
+
+def test_worker_delivers_and_deletes(engine, outbox, setup, stub_es):
+    crud, worker = setup()
+    row = crud.create("purchase_order", {"po_number": "PO-9001", "status": "open"})
+    crud.delete("purchase_order", 2)
+    assert stub_es.calls == []  # nothing inline
+    assert worker.run_once() == 2
+    assert stub_es.calls == [("index", INDEX, str(row["id"])), ("delete", INDEX, "2")]
+    assert stub_es.docs[(INDEX, str(row["id"]))]["po_number"] == "PO-9001"
+    assert events(engine, outbox) == []
+    assert worker.run_once() == 0
+
+
+def test_sink_failure_retries_then_dead_letters(engine, outbox, setup, stub_es):
+    crud, worker = setup()
+    crud.update("purchase_order", 1, {"status": "approved"})
+    stub_es.fail = "es down"
+    for attempt in (1, 2):
+        assert worker.run_once() == 1
+        (ev,) = events(engine, outbox)
+        assert (ev["status"], ev["attempts"]) == ("pending", attempt)
+        assert json.loads(ev["last_error"]) == [{"sink": "po_es", "error": "es down"}]
+    assert worker.run_once() == 1
+    (ev,) = events(engine, outbox)
+    assert (ev["status"], ev["attempts"]) == ("dead", 3)
+    # dead events are never claimed again
+    stub_es.fail = None
+    assert worker.run_once() == 0
+
+
+def test_retry_skips_sinks_already_delivered(engine, outbox, setup, stub_es):
+    other = type(stub_es)()
+    post = {"mode": "outbox", "sinks": [es_sink(), es_sink("po_es_2", "search_2")]}
+    crud, worker = setup(post, search_2=other)
+    crud.update("purchase_order", 1, {"status": "approved"})
+    other.fail = "second cluster down"
+    worker.run_once()
+    (ev,) = events(engine, outbox)
+    assert ev["delivered"] == ["po_es"]
+    other.fail = None
+    worker.run_once()
+    assert events(engine, outbox) == []
+    # the first sink was not replayed
+    assert [c[0] for c in stub_es.calls] == ["index"]
+    assert [c[0] for c in other.calls] == ["index"]
+
+
+def test_later_events_wait_for_a_pending_earlier_one(engine, outbox, setup, stub_es):
+    crud, worker = setup()
+    worker.backoff_base_s = 300
+    crud.update("purchase_order", 1, {"status": "approved"})
+    stub_es.fail = "es down"
+    worker.run_once()
+    stub_es.fail = None
+    crud.update("purchase_order", 1, {"status": "closed"})
+    crud.update("purchase_order", 3, {"status": "closed"})
+    # id 1's first event is backing off: its update must not overtake it
+    assert worker.run_once() == 1
+    assert [(e["id_value"], e["row"]["status"]) for e in events(engine, outbox)] == [("1", "approved"), ("1", "closed")]
+    assert stub_es.calls == [("index", INDEX, "3")]
+
+
+def test_batched_sink_failures_come_back_to_their_events(engine, outbox, setup, stub_es):
+    post = {"mode": "outbox", "sinks": [es_sink(batch={"max_actions": 100, "max_age_s": 0})]}
+    crud, worker = setup(post)
+    crud.update("purchase_order", 1, {"status": "approved"})
+    crud.update("purchase_order", 2, {"status": "approved"})
+    stub_es.item_errors = {"2": 400}
+    assert worker.run_once() == 2
+    # one _bulk call for the batch, flushed at the end of the pass
+    assert stub_es.bulk_sizes == [2]
+    (ev,) = events(engine, outbox)
+    assert (ev["id_value"], ev["attempts"], ev["delivered"]) == ("2", 1, [])
+    assert json.loads(ev["last_error"])[0]["sink"] == "po_es"
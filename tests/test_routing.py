@@ -0,0 +1,207 @@
+from __future__ import annotations
+import time
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.pool import StaticPool
+
+import app.main as main
+from bench.fixtures import bench_metadata
+from engine.post_write import PostWritePipeline
+from sources.routing import READ_SESSION, ReadRouter
+
+
+class LagEngine:
+    """
+    Engine stand-in for a postgres replica: connect() reports lag_s through the lag
+    query, or raises when down is set.
+    """
+
+    def __init__(self, lag_s: float = 0.0):
+        self.lag_s = lag_s
+        self.down = False
+
+    def connect(self):
+        if self.down:
+            raise ConnectionError("connection refused")
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    dialect = SimpleNamespace(name="postgresql")
+
+    def execute(self, stmt):
+        return SimpleNamespace(scalar=lambda: self.lag_s)
+
+
+def replica_source(name, engine):
+    return SimpleNamespace(name=name, engine=engine)
+
+
+@pytest.fixture
+def replica_engine(engine):
+    # a copy of the primary whose po_numbers say where a read went
+    meta = bench_metadata()
+    eng = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    meta.create_all(eng)
+    with engine.connect() as src, eng.begin() as dst:
+        for name in ("vendors", "purchase_orders"):
+            rows = [dict(r) for r in src.execute(select(meta.tables[name])).mappings()]
+            if name == "purchase_orders":
+                rows = [{**r, "po_number": r["po_number"] + "-replica"} for r in rows]
+            dst.execute(insert(meta.tables[name]), rows)
+    yield eng
+    eng.dispose()
+
+
+@pytest.fixture
+def routed(make_crud, replica_engine):
+    # (crud, router) with one replica, reads pinned to the primary for 30s after a write
+    router = ReadRouter([replica_source("db_replica_1", replica_engine)], read_your_writes_s=30, max_lag_s=10)
+    return make_crud(read_router=router), router
+
+
+@pytest.fixture
+def session():
+    # what the RequestContext middleware opens for every request
+    s = {"primary_until": 0.0, "wrote": False}
+    token = READ_SESSION.set(s)
+    yield s
+    READ_SESSION.reset(token)
+
+
+def po_number(crud, id_value=3):
+    return crud.get_one("purchase_order", id_value)["po_number"]
+
+
+def test_round_robin_over_healthy_replicas():
+    a, b = object(), object()
+    router = ReadRouter([replica_source("r1", a), replica_source("r2", b)])
+    assert [router.pick() for _ in range(4)] == [a, b, a, b]
+
+
+def test_least_connections_picks_the_idlest_pool():
+    def pool_engine(n):
+        return SimpleNamespace(pool=SimpleNamespace(checkedout=lambda: n))
+
+    busy, idle = pool_engine(3), pool_engine(1)
+    router = ReadRouter([replica_source("r1", busy), replica_source("r2", idle)], policy="least_connections")
+    assert router.pick() is idle
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError, match="Unknown read_policy"):
+        ReadRouter([], policy="random")
+
+
+def test_reads_go_to_the_replica(routed):
+    crud, _ = routed
+    assert po_number(crud) == "PO-0003-replica"
+    assert {r["po_number"][-8:] for r in crud.list("purchase_order", page=1, size=5)["items"]} == {"-replica"}
+
+
+def test_write_pins_the_session_to_the_primary(routed, session):
+    crud, _ = routed
+    assert po_number(crud) == "PO-0003-replica"
+    crud.update("purchase_order", 3, {"status": "void"})
+    assert session["wrote"] and session["primary_until"] > time.time() + 25
+    row = crud.get_one("purchase_order", 3)
+    assert (row["po_number"], row["status"]) == ("PO-0003", "void")
+
+    # deadline passed: back on the replica
+    session["primary_until"] = time.time() - 1
+    assert po_number(crud) == "PO-0003-replica"
+
+
+def test_write_outside_a_session_pins_nothing(routed):
+    crud, _ = routed
+    crud.update("purchase_order", 3, {"status": "void"})
+    assert po_number(crud) == "PO-0003-replica"
+
+
+def test_lagging_replica_is_evicted_until_it_catches_up(make_crud):
+    lagging = LagEngine(lag_s=42)
+    router = ReadRouter([replica_source("db_replica_1", lagging)], max_lag_s=10)
+    crud = make_crud(read_router=router)
+
+    assert router.check_lag() == {"db_replica_1": 42.0}
+    assert router.status()["replicas"]["db_replica_1"] == {"lag_s": 42.0, "evicted": "lag 42.0s > 10s"}
+    # no healthy replica: the primary serves the read
+    assert router.pick() is None
+    assert po_number(crud) == "PO-0003"
+
+    lagging.lag_s = 2
+    router.check_lag()
+    assert router.status()["replicas"]["db_replica_1"] == {"lag_s": 2.0, "evicted": None}
+    assert router.pick() is lagging
+
+
+def test_unreachable_replica_is_evicted(routed):
+    crud, router = routed
+    down = LagEngine()
+    down.down = True
+    router.replicas.append(replica_source("db_replica_2", down))
+
+    router.check_lag()
+    status = router.status()["replicas"]
+    assert status["db_replica_1"] == {"lag_s": 0.0, "evicted": None}
+    assert status["db_replica_2"]["evicted"] == "unreachable: connection refused"
+    # only the sqlite replica is left in rotation
+    assert {po_number(crud) for _ in range(4)} == {"PO-0003-replica"}
+
+
+# ---- read-your-writes through the app ----
+
+class _Manager:
+    config = {"routing": {"active_source": "db_main"}}
+    sources = {}
+
+    async def aclose(self):
+        pass
+
+
+@pytest.fixture
+def app_client(routed, monkeypatch):
+    crud, _ = routed
+    pipeline = PostWritePipeline(manager=_Manager(), entity_specs={"purchase_order": {}}, listeners=[crud.invalidate_counts])
+    monkeypatch.setattr(main, "_runtime", (crud, pipeline))
+    with TestClient(main.app) as c:
+        yield c
+
+
+def read_po_number(client, **kw):
+    r = client.get("/api/purchase_order/3", **kw)
+    assert r.status_code == 200, r.text
+    return r.json()["po_number"]
+
+
+def test_app_write_hands_back_the_deadline(app_client):
+    assert read_po_number(app_client) == "PO-0003-replica"
+    assert main.RYW_HEADER not in app_client.get("/api/purchase_order/3").headers
+
+    r = app_client.put("/api/purchase_order/3", json={"status": "void"})
+    assert r.status_code == 200, r.text
+    until = float(r.headers[main.RYW_HEADER])
+    assert until > time.time() + 25
+    assert app_client.cookies[main.RYW_COOKIE] == f"{until:.3f}"
+
+
+def test_app_cookie_pins_reads_to_the_primary(app_client):
+    app_client.put("/api/purchase_order/3", json={"status": "void"})
+    # the client sends the cookie back
+    assert read_po_number(app_client) == "PO-0003"
+    app_client.cookies.clear()
+    assert read_po_number(app_client) == "PO-0003-replica"
+
+
+def test_app_header_pins_reads_to_the_primary(app_client):
+    until = f"{time.time() + 30:.3f}"
+    assert read_po_number(app_client, headers={main.RYW_HEADER: until}) == "PO-0003"
+    assert read_po_number(app_client, headers={main.RYW_HEADER: f"{time.time() - 1:.3f}"}) == "PO-0003-replica"
+    assert read_po_number(app_client, headers={main.RYW_HEADER: "garbage"}) == "PO-0003-replica"
@@ -0,0 +1,127 @@
+from __future__ import annotations
+import gzip
+import json
+import threading
+from datetime import datetime, timezone
+
+import pytest
+
+from sinks.s3_put_json import S3PutJsonSink
+
+BUCKET = "exports"
+
+
+class StubS3:
+    # put_object / upload_fileobj into a dict; fail makes uploads (not manifests) raise
+    def __init__(self):
+        self.objects = {}
+        self.meta = {}
+        self.fail = None
+        self.lock = threading.Lock()
+
+    def put_object(self, Bucket, Key, Body, ContentType=None):
+        with self.lock:
+            self.objects[(Bucket, Key)] = Body
+
+    def upload_fileobj(self, fileobj, bucket, key, ExtraArgs=None, Config=None):
+        if self.fail:
+            raise RuntimeError(self.fail)
+        with self.lock:
+            self.objects[(bucket, key)] = fileobj.read()
+            self.meta[key] = ExtraArgs
+
+
+@pytest.fixture
+def s3():
+    return StubS3()
+
+
+@pytest.fixture
+def make_sink(make_manager, s3):
+    def make(**cfg):
+        manager = make_manager(files=s3)
+        sink = S3PutJsonSink("po_s3", {"kind": "s3_put_json", "source": "files", "bucket": BUCKET, **cfg}, manager)
+        manager.add_close_hook(sink.close)
+        return sink
+
+    return make
+
+
+def partition():
+    now = datetime.now(timezone.utc)
+    return f"purchase_order/dt={now:%Y-%m-%d}/hr={now:%H}"
+
+
+def parts(s3):
+    out = {}
+    for (_, key), body in sorted(s3.objects.items()):
+        if "/part-" in key:
+            raw = gzip.decompress(body) if key.endswith(".gz") else body
+            out[key] = [json.loads(line) for line in raw.decode("utf-8").splitlines()]
+    return out
+
+
+def manifest(s3, sink):
+    return json.loads(s3.objects[(BUCKET, f"{partition()}/_manifest/{sink.writer_id}.json")])
+
+
+def test_unbatched_put_per_row(make_sink, s3):
+    sink = make_sink(key_pattern="{entity}/{id}.json")
+    sink.on_create("purchase_order", {"id": 7, "status": "open"})
+    assert json.loads(s3.objects[(BUCKET, "purchase_order/7.json")]) == {"id": 7, "status": "open"}
+
+
+def test_parts_roll_over_at_max_rows(make_sink, s3):
+    sink = make_sink(batch={"max_rows": 3, "max_age_s": 0})
+    for i in range(1, 8):
+        sink.on_create("purchase_order", {"id": i})
+    sink.on_delete("purchase_order", 8)
+    assert sink.flush() == []
+    written = parts(s3)
+    assert [len(rows) for rows in written.values()] == [3, 3, 2]
+    rows = [r for rs in written.values() for r in rs]
+    assert [r["id"] for r in rows] == list(range(1, 9))
+    assert [r["_op"] for r in rows] == ["create"] * 7 + ["delete"]
+    for key in written:
+        assert key.startswith(partition() + "/part-") and key.endswith(".ndjson.gz")
+        assert s3.meta[key]["ContentEncoding"] == "gzip"
+
+
+def test_manifest_lists_every_part(make_sink, s3):
+    sink = make_sink(batch={"max_rows": 2, "max_age_s": 0, "compression": "none"})
+    for i in range(1, 6):
+        sink.on_update("purchase_order", {"id": i})
+    sink.flush()
+    m = manifest(s3, sink)
+    assert (m["partition"], m["writer"], m["compression"]) == (partition(), sink.writer_id, "none")
+    assert sorted(p["key"] for p in m["parts"]) == sorted(parts(s3))
+    assert sorted(p["rows"] for p in m["parts"]) == [1, 2, 2]
+    assert all(p["bytes"] == len(s3.objects[(BUCKET, p["key"])]) for p in m["parts"])
+
+
+def test_shutdown_uploads_the_open_part(make_sink, s3):
+    sink = make_sink(batch={"max_rows": 100, "max_age_s": 60})
+    sink.on_create("purchase_order", {"id": 1})
+    sink.on_create("purchase_order", {"id": 2})
+    assert parts(s3) == {}
+    assert sink.close() == []
+    assert [len(rows) for rows in parts(s3).values()] == [2]
+    assert len(manifest(s3, sink)["parts"]) == 1
+
+
+def test_upload_failures_are_reported_per_row(make_sink, s3):
+    sink = make_sink(batch={"max_rows": 2, "max_age_s": 0})
+    s3.fail = "slow down"
+    sink.on_create("purchase_order", {"id": 1})
+    sink.on_create("purchase_order", {"id": 2})
+    failures = sink.flush()
+    assert [(f["entity"], f["id"], f["error"]) for f in failures] == [
+        ("purchase_order", "1", "slow down"),
+        ("purchase_order", "2", "slow down"),
+    ]
+    assert failures[0]["key"].startswith(partition() + "/part-")
+
+
+def test_unknown_compression(make_sink):
+    with pytest.raises(ValueError, match="unknown compression"):
+        make_sink(batch={"compression": "lz4"})
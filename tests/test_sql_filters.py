@@ -0,0 +1,74 @@
+from __future__ import annotations
+from decimal import Decimal
+
+import pytest
+
+from sources.crud.sql_filters import parse_filters, split_key
+
+
+def ids(out):
+    return [r["id"] for r in out["items"]]
+
+
+def test_split_key():
+    assert split_key("status") == ("status", "eq")
+    assert split_key("total_amount__gte") == ("total_amount", "gte")
+    # an unknown suffix is part of the field name, not an operator
+    assert split_key("vendor__name") == ("vendor__name", "eq")
+
+
+def test_parse_types_values_from_the_column(crud):
+    columns = crud.plans["purchase_order"].columns
+    parsed = parse_filters(columns, {"id__in": "1,2", "total_amount__lt": "5.5", "status": "open", "vendor_name__isnull": "true"})
+    assert parsed == {"id__in": [1, 2], "total_amount__lt": Decimal("5.5"), "status": "open", "vendor_name__isnull": True}
+
+
+@pytest.mark.parametrize("raw, error", [
+    ({"id__gte": "abc"}, "Invalid"),
+    ({"id__foo": "1"}, "Unknown filter operator"),
+    ({"nofield": "1"}, "Unknown filter field"),
+    ({"id__prefix": "1"}, "prefix needs a text field"),
+    ({"vendor_name__isnull": "maybe"}, "true/false"),
+])
+def test_parse_rejects_bad_input(crud, raw, error):
+    with pytest.raises(ValueError, match=error):
+        parse_filters(crud.plans["purchase_order"].columns, raw)
+
+
+def test_parse_can_ignore_unknown_fields(crud):
+    assert parse_filters(crud.plans["purchase_order"].columns, {"nofield": "1"}, ignore_unknown=True) is None
+
+
+def test_eq_and_range(crud):
+    out = crud.list("purchase_order", page=1, size=50, filters={"status": "open", "total_amount__gte": "100", "id__lt": "16"})
+    assert ids(out) == [11, 13, 15]
+    assert out["total"] == 3
+
+
+def test_in(crud):
+    out = crud.list("purchase_order", page=1, size=50, filters={"id__in": "3,5,999"})
+    assert ids(out) == [3, 5]
+
+
+def test_prefix_escapes_like_wildcards(crud):
+    assert ids(crud.list("purchase_order", page=1, size=50, filters={"po_number__prefix": "PO-001"})) == list(range(10, 20))
+    # "_" is a literal, not LIKE's single-character wildcard
+    assert ids(crud.list("purchase_order", page=1, size=50, filters={"po_number__prefix": "PO_00"})) == []
+
+
+def test_isnull_on_a_joined_field(crud):
+    assert ids(crud.list("purchase_order", page=1, size=50, filters={"vendor_name__isnull": "true"})) == [10, 20, 30]
+    assert crud.list("purchase_order", page=1, size=50, filters={"vendor_name__isnull": "false"})["total"] == 27
+
+
+def test_filters_on_a_custom_query(crud):
+    out = crud.list("po_with_totals", page=1, size=50, filters={"status": "closed", "id__lte": "6"})
+    assert ids(out) == [2, 4, 6]
+    assert {r["items_total"] for r in out["items"]} == {6}
+
+
+def test_unknown_field_is_an_error_unless_ignored(crud, make_crud):
+    with pytest.raises(ValueError, match="Unknown filter field"):
+        crud.list("purchase_order", page=1, size=5, filters={"nofield": "1"})
+    lenient = make_crud(unknown_filters="ignore")
+    assert lenient.list("purchase_order", page=1, size=5, filters={"nofield": "1"})["total"] == 30
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import pytest
+
+
+def test_exact_total(crud):
+    out = crud.list("purchase_order", page=2, size=10)
+    assert out["total"] == 30
+    assert "total_mode" not in out
+    assert [r["id"] for r in out["items"]] == list(range(11, 21))
+
+
+def test_none_probes_for_has_more(crud):
+    out = crud.list("purchase_order", page=3, size=10, total="none")
+    assert out["total"] is None
+    assert out["total_mode"] == "none"
+    assert out["has_more"] is False
+    assert len(out["items"]) == 10
+    assert crud.list("purchase_order", page=2, size=10, total="none")["has_more"] is True
+
+
+def test_estimated_falls_back_to_a_count_off_postgres(crud):
+    out = crud.list("purchase_order", page=1, size=5, total="estimated", filters={"status": "open"})
+    assert out["total"] == 15
+    assert out["total_mode"] == "estimated"
+
+
+def test_cached_total_until_invalidated(crud):
+    assert crud.list("purchase_order", page=1, size=5, total="cached")["total"] == 30
+    crud.delete("purchase_order", 1)
+    # served from the count cache...
+    assert crud.list("purchase_order", page=1, size=5, total="cached")["total"] == 30
+    # ...until a write listener drops it
+    crud.invalidate_counts("purchase_order", "delete")
+    assert crud.list("purchase_order", page=1, size=5, total="cached")["total"] == 29
+
+
+def test_unknown_total_mode(crud):
+    with pytest.raises(ValueError, match="Unknown total mode"):
+        crud.list("purchase_order", page=1, size=5, total="approx")